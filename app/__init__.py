@@ -4,8 +4,11 @@ from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
 from config import Config
 from datetime import datetime, timezone
+from app.database import SqliteProfile, RoutingSession
+from app.json_provider import FastJSONProvider
 
-db = SQLAlchemy()
+# Lese-/Schreibzugriffe laufen bei SQLite über getrennte Pools (siehe SqliteProfile)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 csrf = CSRFProtect()
 
@@ -13,8 +16,11 @@ csrf = CSRFProtect()
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = FastJSONProvider(app)
 
+    SqliteProfile.configure(app)
     db.init_app(app)
+    SqliteProfile.init_app(app, db)
     migrate.init_app(app, db)
     csrf.init_app(app)
 
@@ -35,6 +41,17 @@ def create_app(config_class=Config):
             print(f"Fehler bei Zeitkonvertierung: {e}")
             return dt
     
+    from app.models.types import PayloadCodec
+    from app.utils.smart_cache import SmartCache
+    from app.utils.tool_registry import ToolRegistry
+    from app.utils.sysfs_scanner import SysfsScanner
+    PayloadCodec.configure(app.config['PAYLOAD_COMPRESSION'])
+    SmartCache.configure(app.config['SMART_CACHE_TTL'], app.config['SMART_CACHE_MAX_ENTRIES'])
+    ToolRegistry.configure(app.config['TOOL_SEARCH_PATH'], app.config['MAX_TOOL_PROCESSES'],
+                           app.config['MAX_WIPE_THREADS'])
+    SysfsScanner.configure(app.config['SYSFS_ROOT'], app.config['PROCFS_ROOT'],
+                           app.config['DEVFS_ROOT'], app.config['UDEV_ROOT'])
+    
     from app.routes import main
     app.register_blueprint(main.bp)
 
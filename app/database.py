@@ -0,0 +1,326 @@
+import statistics
+import threading
+import time
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.sql.elements import TextClause
+
+
+class SqliteProfile:
+    """
+    Speicherprofil für SQLite bei parallelen Zugriffen (Waitress-Threads + Wipe-Threads)
+
+    - WAL-Journal: Leser blockieren den Schreiber nicht und umgekehrt
+    - synchronous=NORMAL, Busy-Timeout, Memory-Mapped I/O und größerer Page-Cache
+    - Getrennte Engines: Schreibzugriffe laufen über einen kleinen Pool mit
+      BEGIN IMMEDIATE (die Schreibsperre wird sofort geholt, kein "database is
+      locked" beim späteren Upgrade einer Lese-Transaktion), Lesezugriffe über
+      einen eigenen Pool mit query_only-Verbindungen
+
+    Regel: Schreib-Transaktionen vor externen Programmen (smartctl, nvme, ...)
+    committen. Wer die einzige Schreibverbindung länger als das Busy-Timeout hält,
+    lässt die Fortschritts-Commits der Wipes scheitern. ToolRegistry.run warnt,
+    wenn ein Tool bei gehaltener Schreibverbindung gestartet wird (holds_writer).
+    """
+
+    READER_EXTENSION = 'sqlite_reader'
+
+    _writer_state = threading.local()
+
+    @staticmethod
+    def is_file_database(uri):
+        url = make_url(uri)
+        return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+    @staticmethod
+    def configure(app):
+        """Setzt die Engine-Optionen des Schreib-Pools (vor db.init_app aufrufen)"""
+        if not SqliteProfile.is_file_database(app.config['SQLALCHEMY_DATABASE_URI']):
+            return
+
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('pool_size', app.config['SQLITE_WRITE_POOL_SIZE'])
+        options.setdefault('max_overflow', 0)
+        # Wartezeit auf die Schreibverbindung entspricht dem Busy-Timeout
+        options.setdefault('pool_timeout', app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+        options.setdefault('connect_args', {}).setdefault('timeout', app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+
+    @staticmethod
+    def init_app(app, db):
+        """Registriert die PRAGMAs am Schreib-Pool und legt den Lese-Pool an (nach db.init_app)"""
+        if not SqliteProfile.is_file_database(app.config['SQLALCHEMY_DATABASE_URI']):
+            return
+
+        with app.app_context():
+            writer = db.engine
+
+        pragmas = SqliteProfile._pragmas(app.config)
+        SqliteProfile._listen(writer, pragmas + ['PRAGMA journal_mode=WAL'], begin='BEGIN IMMEDIATE')
+        SqliteProfile._track_writer(writer)
+
+        reader = create_engine(
+            app.config['SQLALCHEMY_DATABASE_URI'],
+            pool_size=app.config['SQLITE_READ_POOL_SIZE'],
+            max_overflow=app.config['SQLITE_READ_POOL_SIZE'],
+            pool_timeout=app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000,
+            connect_args={'timeout': app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}
+        )
+        SqliteProfile._listen(reader, pragmas + ['PRAGMA query_only=ON'])
+        app.extensions[SqliteProfile.READER_EXTENSION] = reader
+
+    @staticmethod
+    def _pragmas(config):
+        return [
+            'PRAGMA synchronous=NORMAL',
+            f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+            f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+            # Negativer Wert = Größe in KiB statt in Seiten
+            f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}",
+            'PRAGMA temp_store=MEMORY',
+        ]
+
+    @staticmethod
+    def _listen(engine, pragmas, begin=None):
+        @event.listens_for(engine, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            if begin:
+                # Transaktionen selbst steuern, sonst öffnet pysqlite sie verzögert (DEFERRED)
+                dbapi_connection.isolation_level = None
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+        if begin:
+            @event.listens_for(engine, 'begin')
+            def on_begin(connection):
+                connection.exec_driver_sql(begin)
+
+    @staticmethod
+    def _track_writer(engine):
+        """Merkt sich pro Thread, ob er gerade eine Verbindung des Schreib-Pools hält"""
+        state = SqliteProfile._writer_state
+
+        @event.listens_for(engine, 'checkout')
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            state.held = getattr(state, 'held', 0) + 1
+
+        @event.listens_for(engine, 'checkin')
+        def on_checkin(dbapi_connection, connection_record):
+            state.held = max(0, getattr(state, 'held', 0) - 1)
+
+    @staticmethod
+    def holds_writer():
+        """Prüft ob der aktuelle Thread die Schreibverbindung hält (offene Schreib-Transaktion)"""
+        return getattr(SqliteProfile._writer_state, 'held', 0) > 0
+
+    @staticmethod
+    def vacuum(engine):
+        """Gibt freien Speicher an das Dateisystem zurück (z.B. nach der Komprimierung)"""
+        if engine.dialect.name != 'sqlite':
+            return
+        # Direkt auf der DBAPI-Verbindung, VACUUM darf nicht in einer Transaktion laufen
+        connection = engine.raw_connection()
+        try:
+            connection.driver_connection.execute('VACUUM')
+            # Im WAL-Modus wird die Datei erst beim Checkpoint kleiner
+            connection.driver_connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        finally:
+            connection.close()
+
+    @staticmethod
+    def reader_engine():
+        """Lese-Engine der aktuellen App (None wenn kein Datei-SQLite)"""
+        return current_app.extensions.get(SqliteProfile.READER_EXTENSION)
+
+    @staticmethod
+    def is_read(clause):
+        """Prüft ob ein Statement rein lesend ist (SELECT bzw. textuelles SELECT/WITH)"""
+        if clause is None:
+            return False
+        if getattr(clause, 'is_select', False):
+            return True
+        if isinstance(clause, TextClause):
+            return clause.text.lstrip().lower().startswith(('select', 'with'))
+        return False
+
+    @staticmethod
+    def stress_test(app, writers=8, readers=8, seconds=10, hold_seconds=2.0):
+        """
+        Lasttest: writers Threads schreiben Wipe-Fortschritt wie _wipe_zeros (ein Commit
+        pro Update), readers Threads laden parallel Disk- und Wipe-Liste wie die UI.
+        Ein holder Thread hält seine Schreib-Transaktion abwechselnd hold_seconds lang offen
+        (wie ein Aufrufer, der vor dem Commit auf ein externes Tool wartet, 0 = aus).
+        Die Schreiber müssen das aushalten, solange hold_seconds unter dem Busy-Timeout liegt.
+        Läuft gegen die Datenbank der übergebenen App (eigene Test-Datenbank verwenden!)
+        Returns: Statistik je Rolle (Operationen, Fehler, Latenzen in ms)
+        """
+        from app import db
+        from app.models import Disk, WipeLog
+
+        with app.app_context():
+            db.create_all()
+            disk = Disk(device_path='/dev/stress', serial_number=f'STRESS-{time.time_ns()}', model='Stress')
+            db.session.add(disk)
+            db.session.flush()
+            wipe_ids = []
+            for index in range(writers + 1):
+                wipe_log = WipeLog(disk_id=disk.id, device_path=disk.device_path, serial_number=disk.serial_number,
+                                   wipe_method='zeros', status='in_progress', progress_percent=0.0)
+                db.session.add(wipe_log)
+                db.session.flush()
+                wipe_ids.append(wipe_log.id)
+            db.session.commit()
+
+        stop_at = time.monotonic() + seconds
+        results = {'writer': [], 'reader': [], 'holder': []}
+        errors = {'writer': [], 'reader': [], 'holder': []}
+        lock = threading.Lock()
+
+        def run(role, operation):
+            latencies, failures = [], []
+            with app.app_context():
+                while time.monotonic() < stop_at:
+                    started = time.perf_counter()
+                    try:
+                        operation()
+                        latencies.append((time.perf_counter() - started) * 1000)
+                    except OperationalError as e:
+                        db.session.rollback()
+                        failures.append(str(e.orig))
+                    except PoolTimeoutError as e:
+                        # Schreibverbindung nicht innerhalb von pool_timeout frei geworden
+                        db.session.rollback()
+                        failures.append(str(e))
+                    finally:
+                        db.session.remove()
+            with lock:
+                results[role].extend(latencies)
+                errors[role].extend(failures)
+
+        def write_progress(wipe_id):
+            def operation():
+                wipe_log = db.session.get(WipeLog, wipe_id)
+                wipe_log.progress_percent = (wipe_log.progress_percent + 1) % 100
+                db.session.commit()
+            return operation
+
+        def hold_writer(wipe_id):
+            def operation():
+                wipe_log = db.session.get(WipeLog, wipe_id)
+                wipe_log.progress_percent = (wipe_log.progress_percent + 1) % 100
+                db.session.flush()
+                time.sleep(hold_seconds)
+                db.session.commit()
+                # Pause ohne Transaktion, sonst holt sich der Holder die Verbindung sofort zurück
+                time.sleep(hold_seconds)
+            return operation
+
+        def read_lists():
+            [disk.to_summary_dict() for disk in Disk.query.all()]
+            WipeLog.query.order_by(WipeLog.start_time.desc()).limit(100).all()
+
+        threads = [threading.Thread(target=run, args=('writer', write_progress(wipe_id))) for wipe_id in wipe_ids[:writers]]
+        if hold_seconds:
+            threads.append(threading.Thread(target=run, args=('holder', hold_writer(wipe_ids[-1]))))
+        threads += [threading.Thread(target=run, args=('reader', read_lists)) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        def summary(role):
+            latencies = sorted(results[role])
+            return {
+                'operations': len(latencies),
+                'errors': len(errors[role]),
+                'first_error': errors[role][0] if errors[role] else None,
+                'p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+                'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1], 2) if latencies else None,
+                'max_ms': round(latencies[-1], 2) if latencies else None,
+            }
+
+        return {role: summary(role) for role in results}
+
+
+class RoutingSession(Session):
+    """
+    Session, die Lesezugriffe auf den Lese-Pool und Schreibzugriffe auf den Schreib-Pool legt
+
+    Ab dem ersten Schreibzugriff (Flush, INSERT/UPDATE/DELETE) bleibt die Session bis
+    Commit/Rollback beim Schreib-Pool, damit sie ihre eigenen Änderungen sieht.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._writing = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._writing:
+            reader = SqliteProfile.reader_engine()
+            if reader is not None:
+                if not self._flushing and SqliteProfile.is_read(clause):
+                    return reader
+                self._writing = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self._writing = False
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self._writing = False
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._writing = False
+
+
+def upgrade_schema(db):
+    """
+    Ergänzt bestehende Tabellen um neue Spalten und Indizes
+
+    db.create_all() legt nur fehlende Tabellen an. Hier werden nur additive
+    Änderungen nachgezogen: neue Spalten müssen nullable sein oder einen
+    Server-Default haben. Returns: Liste der ausgeführten Änderungen
+    """
+    with db.engine.begin() as connection:
+        # Inspector auf derselben Verbindung, der Schreib-Pool hat nur eine
+        return upgrade_tables(connection, db.metadata.sorted_tables)
+
+
+def upgrade_tables(connection, tables):
+    """Legt fehlende Spalten und Indizes der angegebenen Tabellen an (bestehende Tabellen)"""
+    changes = []
+    inspector = inspect(connection)
+    existing = set(inspector.get_table_names())
+
+    for table in tables:
+        if table.name not in existing:
+            continue
+
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                definition = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {definition}')
+                changes.append(f'{table.name}.{column.name}')
+
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(connection)
+                changes.append(index.name)
+
+    return changes
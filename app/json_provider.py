@@ -0,0 +1,50 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, ohne orjson wird das json-Modul der Standardbibliothek verwendet
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON-Provider auf Basis von orjson (deutlich schneller als json.dumps)
+
+    Verhält sich wie der Flask-Standard: datetime wird über default() serialisiert,
+    eingerückte Ausgabe (Debug-Modus) und Sonderfälle, die orjson nicht kennt
+    (z.B. Integer > 64 Bit), laufen über die Standardbibliothek.
+    """
+
+    # Sortierte Schlüssel kosten Zeit und werden vom Frontend nicht benötigt
+    sort_keys = False
+
+    def _orjson_dumps(self, obj):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs.keys() - {'separators'}:
+            try:
+                return self._orjson_dumps(obj).decode('utf-8')
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        if orjson is None or pretty:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = self._orjson_dumps(obj) + b'\n'
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -1,5 +1,9 @@
 from app.models.disk import Disk
 from app.models.wipe_log import WipeLog
+from app.models.disk_wipe_stats import DiskWipeStats
+from app.models.smart import SmartSnapshot, SmartAttribute, SmartRawBlob, SmartHistoryEntry
+from app.models.archived_wipe import ArchivedWipe
+from app.models.audit import AuditEntry, AuditCheckpoint
 
-__all__ = ['Disk', 'WipeLog']
+__all__ = ['Disk', 'WipeLog', 'DiskWipeStats', 'SmartSnapshot', 'SmartAttribute', 'SmartRawBlob', 'SmartHistoryEntry', 'ArchivedWipe', 'AuditEntry', 'AuditCheckpoint']
 
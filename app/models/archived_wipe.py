@@ -0,0 +1,33 @@
+from app import db
+
+
+class ArchivedWipe(db.Model):
+    """
+    Katalogeintrag eines archivierten Wipe-Vorgangs (siehe WipeArchive)
+
+    Der vollständige WipeLog liegt in der Monats-Archivdatei, in der aktiven
+    Datenbank bleiben nur die Felder für Suche, Kennzahlen und das Auffinden
+    der Archivdatei. Die ID entspricht der ursprünglichen WipeLog-ID.
+    """
+    __tablename__ = 'archived_wipes'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    archive = db.Column(db.String(7), nullable=False)  # Monat der Archivdatei, z.B. "2024_03"
+    disk_id = db.Column(db.Integer, db.ForeignKey('disks.id'), nullable=False)
+    device_path = db.Column(db.String(255))
+    model = db.Column(db.String(255))
+    serial_number = db.Column(db.String(255), nullable=False, index=True)
+    size_bytes = db.Column(db.BigInteger)
+    wipe_method = db.Column(db.String(100))
+    status = db.Column(db.String(50))
+    start_time = db.Column(db.DateTime)
+    smart_diff_severity = db.Column(db.String(20))
+    error_message = db.Column(db.Text)  # für die Suche, wie bei aktiven Wipes
+
+    __table_args__ = (
+        # Kennzahlen pro Disk (WipeStats)
+        db.Index('ix_archived_wipes_disk_id', 'disk_id', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<ArchivedWipe {self.id} - {self.archive}>'
@@ -0,0 +1,50 @@
+from datetime import datetime
+from app import db
+
+
+class AuditEntry(db.Model):
+    """
+    Eintrag des Audit-Ledgers: Zusammenfassung eines abgeschlossenen Wipes (siehe AuditLedger)
+
+    Append-only, Trigger verhindern UPDATE und DELETE. Die ID ist die Position
+    im Ledger, chain_hash verkettet jeden Eintrag mit seinem Vorgänger.
+    """
+    __tablename__ = 'audit_entries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    wipe_log_id = db.Column(db.Integer, nullable=False, unique=True)  # kein Fremdschlüssel, Wipes werden archiviert
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    payload = db.Column(db.Text, nullable=False)  # kanonisches JSON der Wipe-Zusammenfassung
+    record_hash = db.Column(db.String(64), nullable=False)  # SHA-256 des Payloads
+    chain_hash = db.Column(db.String(64), nullable=False)  # SHA-256(chain_hash des Vorgängers + record_hash)
+
+    def __repr__(self):
+        return f'<AuditEntry {self.id} - Wipe {self.wipe_log_id}>'
+
+
+class AuditCheckpoint(db.Model):
+    """Merkle-Checkpoint über einen zusammenhängenden Bereich von Ledger-Einträgen (append-only)"""
+    __tablename__ = 'audit_checkpoints'
+
+    id = db.Column(db.Integer, primary_key=True)
+    first_entry_id = db.Column(db.Integer, nullable=False, unique=True)
+    last_entry_id = db.Column(db.Integer, nullable=False, unique=True)
+    merkle_root = db.Column(db.String(64), nullable=False)
+    chain_hash = db.Column(db.String(64), nullable=False)  # chain_hash des letzten Eintrags
+    # SHA-256(checkpoint_hash des Vorgängers + merkle_root + chain_hash)
+    checkpoint_hash = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'first_entry': self.first_entry_id,
+            'last_entry': self.last_entry_id,
+            'merkle_root': self.merkle_root,
+            'chain_hash': self.chain_hash,
+            'checkpoint_hash': self.checkpoint_hash,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def __repr__(self):
+        return f'<AuditCheckpoint {self.id} - Einträge {self.first_entry_id}-{self.last_entry_id}>'
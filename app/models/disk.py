@@ -1,8 +1,10 @@
 from datetime import datetime
 from app import db
+from app.models.serializer import SerializerMixin
+from app.models.types import CompressedText
 
 
-class Disk(db.Model):
+class Disk(SerializerMixin, db.Model):
     __tablename__ = 'disks'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -15,30 +17,37 @@ class Disk(db.Model):
     
     # SMART Data (stored as JSON string or individual fields)
     smart_status = db.Column(db.String(50))
-    smart_data = db.Column(db.Text)  # JSON string
+    smart_data = db.deferred(db.Column(CompressedText))  # JSON string (komprimiert), wird erst bei Zugriff geladen
     
     first_seen = db.Column(db.DateTime, default=datetime.utcnow)
     last_seen = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     wipe_logs = db.relationship('WipeLog', backref='disk', lazy='dynamic', cascade='all, delete-orphan')
+    # Kennzahlen werden per JOIN mitgeladen (kein COUNT pro Disk)
+    wipe_stats = db.relationship('DiskWipeStats', uselist=False, lazy='joined', cascade='all, delete-orphan')
+
+    SUMMARY_FIELDS = ('id', 'device_path', 'model', 'serial_number', 'size_bytes', 'size_human',
+                      'is_boot_disk', 'smart_status', 'first_seen', 'last_seen', 'wipe_count',
+                      'last_wipe_status', 'last_wipe_at', 'bytes_wiped')
+    DETAIL_FIELDS = SUMMARY_FIELDS + ('smart_data',)
+    DEFERRED_FIELDS = ('smart_data',)
 
     def __repr__(self):
         return f'<Disk {self.serial_number} - {self.model}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'device_path': self.device_path,
-            'model': self.model,
-            'serial_number': self.serial_number,
-            'size_bytes': self.size_bytes,
-            'size_human': self.size_human,
-            'is_boot_disk': self.is_boot_disk,
-            'smart_status': self.smart_status,
-            'smart_data': self.smart_data,
-            'first_seen': self.first_seen.isoformat() if self.first_seen else None,
-            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
-            'wipe_count': self.wipe_logs.count()
-        }
+    @property
+    def wipe_count(self):
+        return self.wipe_stats.wipe_count if self.wipe_stats else 0
+
+    @property
+    def last_wipe_status(self):
+        return self.wipe_stats.last_wipe_status if self.wipe_stats else None
+
+    @property
+    def last_wipe_at(self):
+        return self.wipe_stats.last_wipe_at if self.wipe_stats else None
 
+    @property
+    def bytes_wiped(self):
+        return self.wipe_stats.bytes_wiped if self.wipe_stats else 0
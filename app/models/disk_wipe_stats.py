@@ -0,0 +1,21 @@
+from app import db
+
+
+class DiskWipeStats(db.Model):
+    """
+    Wipe-Kennzahlen pro Disk (Zusammenfassung von wipe_logs)
+
+    Wird von WipeStats bei Start und Ende eines Wipes aktualisiert, damit Listen
+    nicht pro Disk ein COUNT über wipe_logs ausführen müssen.
+    """
+    __tablename__ = 'disk_wipe_stats'
+
+    disk_id = db.Column(db.Integer, db.ForeignKey('disks.id'), primary_key=True)
+    wipe_count = db.Column(db.Integer, nullable=False, default=0)
+    last_wipe_id = db.Column(db.Integer)
+    last_wipe_status = db.Column(db.String(50))
+    last_wipe_at = db.Column(db.DateTime)
+    bytes_wiped = db.Column(db.BigInteger, nullable=False, default=0)  # Summe der erfolgreich gelöschten Kapazität
+
+    def __repr__(self):
+        return f'<DiskWipeStats {self.disk_id} - {self.wipe_count} Wipes>'
@@ -0,0 +1,44 @@
+from datetime import datetime
+from sqlalchemy.orm import undefer
+
+
+class SerializerMixin:
+    """
+    Gemeinsame Serialisierung für Listen- und Detailansichten
+
+    Modelle definieren SUMMARY_FIELDS (Listen, ohne große JSON-Spalten) und
+    DETAIL_FIELDS. Große Spalten sind deferred gemappt und werden nur geladen,
+    wenn ein angefordertes Feld sie benötigt (siehe load_options).
+    """
+
+    SUMMARY_FIELDS = ()
+    DETAIL_FIELDS = ()
+    DEFERRED_FIELDS = ()
+
+    def to_dict(self, fields=None):
+        """Serialisiert die angegebenen Felder (Standard: alle Detail-Felder)"""
+        result = {}
+        for field in fields or self.DETAIL_FIELDS:
+            value = getattr(self, field)
+            result[field] = value.isoformat() if isinstance(value, datetime) else value
+        return result
+
+    def to_summary_dict(self):
+        return self.to_dict(self.SUMMARY_FIELDS)
+
+    @classmethod
+    def select_fields(cls, requested=None, detail=False):
+        """
+        Bestimmt die auszugebenden Felder
+        requested: kommagetrennte Feldliste (z.B. aus ?fields=), unbekannte Felder werden ignoriert
+        """
+        if requested:
+            fields = [field for field in requested.split(',') if field in cls.DETAIL_FIELDS]
+            if fields:
+                return fields
+        return list(cls.DETAIL_FIELDS if detail else cls.SUMMARY_FIELDS)
+
+    @classmethod
+    def load_options(cls, fields):
+        """Query-Optionen, die benötigte deferred Spalten direkt mitladen (kein Nachladen pro Zeile)"""
+        return [undefer(getattr(cls, field)) for field in fields if field in cls.DEFERRED_FIELDS]
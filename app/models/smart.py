@@ -0,0 +1,128 @@
+from datetime import datetime
+from app import db
+
+
+class SmartRawBlob(db.Model):
+    """Komprimierte smartctl-Rohausgabe, über den SHA-256 dedupliziert"""
+    __tablename__ = 'smart_raw_blobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    data = db.Column(db.LargeBinary, nullable=False)  # komprimiert (PayloadCodec)
+    size_bytes = db.Column(db.Integer)  # unkomprimierte Größe
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SmartRawBlob {self.sha256[:12]} - {self.size_bytes} B>'
+
+
+class SmartSnapshot(db.Model):
+    """Eine SMART-Auslesung einer Disk (beim Scan oder vor/nach einem Wipe)"""
+    __tablename__ = 'smart_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    disk_id = db.Column(db.Integer, db.ForeignKey('disks.id'), nullable=False, index=True)
+    wipe_log_id = db.Column(db.Integer, db.ForeignKey('wipe_logs.id'), index=True)
+    phase = db.Column(db.String(20), default='scan')  # scan, before, after
+    captured_at = db.Column(db.DateTime, default=datetime.utcnow)
+    is_latest = db.Column(db.Boolean, default=True, index=True)  # jüngste Auslesung der Disk
+
+    # Zusammenfassung (häufig abgefragte Felder)
+    smart_status = db.Column(db.String(50))
+    model = db.Column(db.String(255))
+    serial = db.Column(db.String(255))
+    firmware = db.Column(db.String(100))
+    power_on_hours = db.Column(db.BigInteger)
+    power_cycle_count = db.Column(db.BigInteger)
+    temperature = db.Column(db.Integer)
+
+    raw_blob_id = db.Column(db.Integer, db.ForeignKey('smart_raw_blobs.id'))
+
+    # Relationships
+    attributes = db.relationship('SmartAttribute', backref='snapshot', lazy='selectin',
+                                 cascade='all, delete-orphan', order_by='SmartAttribute.attr_id')
+    raw_blob = db.relationship('SmartRawBlob')
+    disk = db.relationship('Disk', backref=db.backref('smart_snapshots', lazy='dynamic', cascade='all, delete-orphan'))
+    wipe_log = db.relationship('WipeLog', backref=db.backref('smart_snapshots', lazy='dynamic', cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.Index('ix_smart_snapshots_disk_captured', 'disk_id', 'captured_at'),
+    )
+
+    def __repr__(self):
+        return f'<SmartSnapshot {self.disk_id} - {self.phase} - {self.captured_at}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'disk_id': self.disk_id,
+            'wipe_log_id': self.wipe_log_id,
+            'phase': self.phase,
+            'captured_at': self.captured_at.isoformat() if self.captured_at else None,
+            'smart_status': self.smart_status,
+            'model': self.model,
+            'serial': self.serial,
+            'firmware': self.firmware,
+            'power_on_hours': self.power_on_hours,
+            'power_cycle_count': self.power_cycle_count,
+            'temperature': self.temperature,
+            'attributes': [attribute.to_dict() for attribute in self.attributes]
+        }
+
+
+class SmartAttribute(db.Model):
+    """Ein SMART-Attribut (ATA-Attributtabelle) einer Auslesung"""
+    __tablename__ = 'smart_attributes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_id = db.Column(db.Integer, db.ForeignKey('smart_snapshots.id'), nullable=False, index=True)
+    attr_id = db.Column(db.Integer)  # z.B. 5 = Reallocated_Sector_Ct
+    name = db.Column(db.String(100))
+    value = db.Column(db.Integer)
+    worst = db.Column(db.Integer)
+    thresh = db.Column(db.Integer)
+    raw = db.Column(db.BigInteger)
+
+    __table_args__ = (
+        # Flottenweite Abfragen wie "Reallocated_Sector_Ct > 0"
+        db.Index('ix_smart_attributes_attr_raw', 'attr_id', 'raw'),
+        db.Index('ix_smart_attributes_name_raw', 'name', 'raw'),
+    )
+
+    def __repr__(self):
+        return f'<SmartAttribute {self.attr_id} {self.name}={self.raw}>'
+
+    def to_dict(self):
+        return {
+            'id': self.attr_id,
+            'name': self.name,
+            'value': self.value,
+            'worst': self.worst,
+            'thresh': self.thresh,
+            'raw': self.raw
+        }
+
+
+class SmartHistoryEntry(db.Model):
+    """
+    Verlauf der SMART-Werte einer Disk (delta-kodiert)
+
+    Keyframes enthalten den vollständigen Zustand, alle anderen Einträge nur die
+    seit dem vorherigen Eintrag geänderten Werte (null = Wert entfallen).
+    """
+    __tablename__ = 'smart_history'
+
+    id = db.Column(db.Integer, primary_key=True)
+    disk_id = db.Column(db.Integer, db.ForeignKey('disks.id'), nullable=False)
+    captured_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    is_keyframe = db.Column(db.Boolean, default=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON: Zustand bzw. Änderungen
+
+    disk = db.relationship('Disk', backref=db.backref('smart_history', lazy='dynamic', cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.Index('ix_smart_history_disk_captured', 'disk_id', 'captured_at'),
+    )
+
+    def __repr__(self):
+        return f'<SmartHistoryEntry {self.disk_id} - {self.captured_at}{" (keyframe)" if self.is_keyframe else ""}>'
@@ -0,0 +1,90 @@
+import zlib
+from sqlalchemy.types import LargeBinary, Text, TypeDecorator
+
+try:
+    import zstandard
+except ImportError:  # optional, ohne zstandard wird zlib verwendet
+    zstandard = None
+
+
+class PayloadCodec:
+    """
+    Komprimierung gespeicherter Nutzdaten (SMART-JSON, Verifikationsdaten, Rohausgaben)
+
+    Das erste Byte kennzeichnet das Verfahren, so bleiben mit zlib bzw. zstd
+    geschriebene Werte unabhängig von der aktuellen Einstellung lesbar.
+    Ältere zlib-Daten ohne Kennung (beginnen mit 0x78) werden ebenfalls erkannt.
+    """
+
+    PLAIN = 0x00
+    ZLIB = 0x01
+    ZSTD = 0x02
+
+    MIN_SIZE = 64  # Kleinere Werte lohnen keine Komprimierung
+    ZLIB_LEVEL = 6
+    ZSTD_LEVEL = 9
+
+    algorithm = 'zlib'
+
+    @staticmethod
+    def configure(algorithm):
+        """Setzt das Verfahren für neue Werte ('zstd' nur wenn zstandard installiert ist)"""
+        if algorithm == 'zstd' and zstandard is None:
+            print("zstandard nicht installiert, komprimiere mit zlib")
+            algorithm = 'zlib'
+        PayloadCodec.algorithm = algorithm
+
+    @staticmethod
+    def compress(data):
+        if len(data) < PayloadCodec.MIN_SIZE:
+            return bytes([PayloadCodec.PLAIN]) + data
+        if PayloadCodec.algorithm == 'zstd':
+            return bytes([PayloadCodec.ZSTD]) + zstandard.ZstdCompressor(level=PayloadCodec.ZSTD_LEVEL).compress(data)
+        return bytes([PayloadCodec.ZLIB]) + zlib.compress(data, PayloadCodec.ZLIB_LEVEL)
+
+    @staticmethod
+    def decompress(data):
+        data = bytes(data)
+        if not data:
+            return data
+
+        header = data[0]
+        if header == PayloadCodec.PLAIN:
+            return data[1:]
+        if header == PayloadCodec.ZLIB:
+            return zlib.decompress(data[1:])
+        if header == PayloadCodec.ZSTD:
+            if zstandard is None:
+                raise RuntimeError("zstd-komprimierte Daten, aber zstandard ist nicht installiert")
+            return zstandard.ZstdDecompressor().decompress(data[1:])
+        if header == 0x78:
+            # zlib-Stream ohne Kennung (smart_raw_blobs vor Einführung des Codecs)
+            return zlib.decompress(data)
+        raise ValueError(f"Unbekanntes Komprimierungsformat: 0x{header:02x}")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text-Spalte, die komprimiert als BLOB gespeichert wird (siehe PayloadCodec)
+
+    Bestehende unkomprimierte TEXT-Werte bleiben lesbar, bis sie umgeschrieben
+    werden (SmartStore.migrate_compression). Vergleiche (LIKE, ==) laufen gegen
+    den gespeicherten Wert und treffen daher nur unkomprimierte Zeilen.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return PayloadCodec.compress(value.encode('utf-8'))
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        return PayloadCodec.decompress(value).decode('utf-8')
+
+    def coerce_compared_value(self, op, value):
+        # Vergleichswerte nicht komprimieren (z.B. like('%"raw_data"%') auf Altbestand)
+        return Text()
@@ -1,8 +1,10 @@
 from datetime import datetime
 from app import db
+from app.models.serializer import SerializerMixin
+from app.models.types import CompressedText
 
 
-class WipeLog(db.Model):
+class WipeLog(SerializerMixin, db.Model):
     __tablename__ = 'wipe_logs'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -15,8 +17,8 @@ class WipeLog(db.Model):
     size_bytes = db.Column(db.BigInteger)
     
     # SMART Data before and after wipe
-    smart_data_before = db.Column(db.Text)  # JSON string
-    smart_data_after = db.Column(db.Text)  # JSON string
+    smart_data_before = db.deferred(db.Column(CompressedText), group='smart')  # JSON string (komprimiert)
+    smart_data_after = db.deferred(db.Column(CompressedText), group='smart')  # JSON string (komprimiert)
     
     # Wipe Details
     wipe_method = db.Column(db.String(100))  # e.g., "DoD 5220.22-M", "zeros", "random"
@@ -34,30 +36,38 @@ class WipeLog(db.Model):
     
     # Verification
     verified = db.Column(db.Boolean, default=False)
-    verification_data = db.Column(db.Text)  # JSON string with verification results
+    verification_data = db.deferred(db.Column(CompressedText))  # JSON string with verification results (komprimiert)
+
+    # SMART-Vergleich vor/nach, beim Abschluss berechnet (siehe SmartDiff)
+    smart_diff = db.deferred(db.Column(CompressedText))  # JSON: nur geänderte Werte (komprimiert)
+    smart_changed_count = db.Column(db.Integer)
+    smart_diff_severity = db.Column(db.String(20))  # none, info, warning, critical, unavailable
+
+    # Kein DB-Feld: True für Wipes, die aus einer Archivdatei geladen wurden (siehe WipeArchive)
+    archived = False
+    # Kein DB-Feld: vorab geladener Audit-Nachweis für Reports (siehe AuditLedger, ReportArchive)
+    audit_proof = None
+    # Kein DB-Feld: vorab geladene smartctl-Rohausgaben {phase: Text} für Reports in Worker-Prozessen
+    smart_raw = None
+
+    SUMMARY_FIELDS = ('id', 'disk_id', 'device_path', 'model', 'serial_number', 'size_bytes',
+                      'wipe_method', 'wipe_passes', 'status', 'start_time', 'end_time',
+                      'duration_seconds', 'progress_percent', 'error_message', 'verified', 'archived',
+                      'smart_changed_count', 'smart_diff_severity')
+    DETAIL_FIELDS = SUMMARY_FIELDS + ('smart_data_before', 'smart_data_after', 'verification_data', 'smart_diff')
+    DEFERRED_FIELDS = ('smart_data_before', 'smart_data_after', 'verification_data', 'smart_diff')
+
+    __table_args__ = (
+        # Keyset-Pagination der Historie (neueste zuerst), optional nach Status/Methode gefiltert
+        db.Index('ix_wipe_logs_start_id', 'start_time', 'id'),
+        db.Index('ix_wipe_logs_status_start_id', 'status', 'start_time', 'id'),
+        db.Index('ix_wipe_logs_method_start_id', 'wipe_method', 'start_time', 'id'),
+        # Kennzahlen pro Disk (WipeStats)
+        db.Index('ix_wipe_logs_disk_id', 'disk_id', 'id'),
+        # Wipes mit auffälligen SMART-Änderungen (Filter smart_severity)
+        db.Index('ix_wipe_logs_smart_severity_start_id', 'smart_diff_severity', 'start_time', 'id'),
+    )
 
     def __repr__(self):
         return f'<WipeLog {self.serial_number} - {self.status}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'disk_id': self.disk_id,
-            'device_path': self.device_path,
-            'model': self.model,
-            'serial_number': self.serial_number,
-            'size_bytes': self.size_bytes,
-            'smart_data_before': self.smart_data_before,
-            'smart_data_after': self.smart_data_after,
-            'wipe_method': self.wipe_method,
-            'wipe_passes': self.wipe_passes,
-            'status': self.status,
-            'start_time': self.start_time.isoformat() if self.start_time else None,
-            'end_time': self.end_time.isoformat() if self.end_time else None,
-            'duration_seconds': self.duration_seconds,
-            'progress_percent': self.progress_percent,
-            'error_message': self.error_message,
-            'verified': self.verified,
-            'verification_data': self.verification_data
-        }
-
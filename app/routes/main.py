@@ -1,14 +1,22 @@
-from flask import Blueprint, render_template, jsonify, request, send_file
-from app import db
-from app.models import Disk, WipeLog
-from app.utils import DiskManager, SmartReader, WipeEngine, ReportGenerator
-from datetime import datetime
+from flask import Blueprint, render_template, jsonify, request, send_file, Response, stream_with_context, current_app, url_for
+from app import db, csrf
+from app.models import Disk, WipeLog, AuditCheckpoint
+from app.utils import SmartCache, SmartStore, SmartHistory, WipeEngine, ReportGenerator, DiskInventory, EventBus, ScanJob, WipeQuery, SearchIndex, WipeArchive, WipeExport, ReportArchive, ReportCache, AuditLedger
+from datetime import datetime, timedelta
 import json
 import io
 
 bp = Blueprint('main', __name__)
 
 
+def _requested_fields(model, detail=False):
+    """
+    Felder für die JSON-Ausgabe: ?fields=a,b wählt einzelne Felder, ?detail=1 alle
+    Listen liefern standardmäßig nur die Zusammenfassung (ohne SMART-/Verifikations-JSON)
+    """
+    return model.select_fields(request.args.get('fields'), detail=detail or request.args.get('detail') == '1')
+
+
 @bp.route('/')
 def index():
     """Hauptseite mit Festplattenübersicht"""
@@ -17,62 +25,52 @@ def index():
 
 @bp.route('/api/disks/scan')
 def scan_disks():
-    """Scannt alle verfügbaren Festplatten und aktualisiert die Datenbank"""
+    """
+    Startet einen Festplatten-Scan im Hintergrund und gibt sofort das zuletzt bekannte Inventar zurück
+    Die Disk-Karten werden per Server-Sent-Events (/api/events) nachgeliefert
+    """
     try:
-        disks = DiskManager.get_all_disks()
-        
-        updated_disks = []
-        for disk_info in disks:
-            # Suche nach existierender Disk in DB
-            disk = Disk.query.filter_by(serial_number=disk_info['serial_number']).first()
-            
-            if disk:
-                # Update existierende Disk
-                disk.device_path = disk_info['device_path']
-                disk.model = disk_info['model']
-                disk.size_bytes = disk_info['size_bytes']
-                disk.size_human = disk_info['size_human']
-                disk.is_boot_disk = disk_info['is_boot_disk']
-                disk.last_seen = datetime.utcnow()
-            else:
-                # Erstelle neue Disk
-                disk = Disk(
-                    device_path=disk_info['device_path'],
-                    model=disk_info['model'],
-                    serial_number=disk_info['serial_number'],
-                    size_bytes=disk_info['size_bytes'],
-                    size_human=disk_info['size_human'],
-                    is_boot_disk=disk_info['is_boot_disk']
-                )
-                db.session.add(disk)
-            
-            # SMART-Daten automatisch beim Scannen auslesen und speichern
-            try:
-                smart_data = SmartReader.get_smart_data(disk_info['device_path'])
-                if 'error' not in smart_data:
-                    disk.smart_data = json.dumps(smart_data)
-                    disk.smart_status = smart_data.get('smart_status', 'UNKNOWN')
-            except Exception as smart_error:
-                # Fehler beim Auslesen der SMART-Daten nicht kritisch
-                print(f"Fehler beim Auslesen der SMART-Daten für {disk_info['device_path']}: {smart_error}")
-            
-            updated_disks.append(disk)
-        
-        db.session.commit()
+        ScanJob.start(current_app._get_current_object(), force=request.args.get('force') == '1')
         
         # Render Partial Template für HTMX
-        return render_template('partials/disk_list.html', disks=updated_disks)
+        return render_template('partials/disk_list.html', disks=DiskInventory.load_disks(), scanning=True)
+        
+    except Exception as e:
+        return f'<div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">Fehler: {str(e)}</div>', 500
+
+
+@bp.route('/api/disks/list')
+def list_disks():
+    """Gibt das aktuelle Inventar als HTML zurück, ohne einen Scan auszulösen"""
+    try:
+        return render_template('partials/disk_list.html',
+                               disks=DiskInventory.load_disks(),
+                               scanning=ScanJob.is_running())
         
     except Exception as e:
         return f'<div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">Fehler: {str(e)}</div>', 500
 
 
+@bp.route('/api/events')
+def event_stream():
+    """Server-Sent-Events: Hotplug- und Scan-Ereignisse für verbundene Clients"""
+    subscriber = EventBus.subscribe()
+    response = Response(
+        stream_with_context(EventBus.stream(subscriber, max_duration=current_app.config['SSE_MAX_DURATION'])),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @bp.route('/api/disks')
 def get_disks():
     """Gibt alle Festplatten aus der Datenbank zurück"""
     try:
-        disks = Disk.query.all()
-        disks_data = [disk.to_dict() for disk in disks]
+        fields = _requested_fields(Disk)
+        disks = Disk.query.options(*Disk.load_options(fields)).all()
+        disks_data = [disk.to_dict(fields) for disk in disks]
         
         return jsonify({
             'success': True,
@@ -90,11 +88,12 @@ def get_disks():
 def get_disk(disk_id):
     """Gibt Details einer spezifischen Festplatte zurück"""
     try:
-        disk = Disk.query.get_or_404(disk_id)
+        fields = _requested_fields(Disk, detail=True)
+        disk = Disk.query.options(*Disk.load_options(fields)).get_or_404(disk_id)
         
         return jsonify({
             'success': True,
-            'disk': disk.to_dict()
+            'disk': disk.to_dict(fields)
         })
         
     except Exception as e:
@@ -110,12 +109,15 @@ def get_disk_smart(disk_id):
     try:
         disk = Disk.query.get_or_404(disk_id)
         
-        # SMART-Daten auslesen
-        smart_data = SmartReader.get_smart_data(disk.device_path)
+        # SMART-Daten auslesen (aus dem Cache, außer bei force=1)
+        smart_data = SmartCache.get_smart_data(disk.device_path, disk.serial_number,
+                                               timeout=current_app.config['SMART_TIMEOUT'],
+                                               force=request.args.get('force') == '1')
         
-        # In Datenbank speichern
-        disk.smart_data = json.dumps(smart_data)
-        disk.smart_status = smart_data.get('smart_status', 'UNKNOWN')
+        # In Datenbank speichern (Snapshot + Attribute, Rohdaten komprimiert)
+        if not SmartStore.save(disk, smart_data):
+            disk.smart_data = SmartStore.to_json(smart_data)
+            disk.smart_status = smart_data.get('smart_status', 'UNKNOWN')
         db.session.commit()
         
         # Wenn HTMX-Request, gebe HTML zurück
@@ -138,6 +140,34 @@ def get_disk_smart(disk_id):
         }), 500
 
 
+@bp.route('/api/disks/<int:disk_id>/smart/trend')
+def get_disk_smart_trend(disk_id):
+    """
+    Gibt den SMART-Verlauf einer Festplatte als Trend-Reihen zurück
+    Parameter: metrics (kommagetrennt), days (Zeitraum), points (max. Punkte pro Reihe)
+    """
+    try:
+        disk = Disk.query.get_or_404(disk_id)
+        
+        metrics = [metric for metric in request.args.get('metrics', '').split(',') if metric] or None
+        days = request.args.get('days', type=int)
+        since = datetime.utcnow() - timedelta(days=days) if days else None
+        points = min(max(request.args.get('points', 200, type=int), 2), 2000)
+        
+        return jsonify({
+            'success': True,
+            'disk_id': disk.id,
+            'serial_number': disk.serial_number,
+            'series': SmartHistory.series(disk.id, metrics, since=since, max_points=points)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @bp.route('/api/disks/<int:disk_id>/wipe', methods=['POST'])
 def wipe_disk(disk_id):
     """Startet einen Wipe-Vorgang für eine Festplatte"""
@@ -162,10 +192,13 @@ def wipe_disk(disk_id):
                 'error': 'Anzahl Pässe muss zwischen 1 und 10 liegen'
             }), 400
         
-        # SMART-Daten vor Wipe auslesen und speichern
-        smart_data = SmartReader.get_smart_data(disk.device_path)
-        disk.smart_data = json.dumps(smart_data)
-        disk.smart_status = smart_data.get('smart_status', 'UNKNOWN')
+        # SMART-Daten vor Wipe auslesen und speichern (ein frischer Scan-/Modal-Wert genügt)
+        smart_data = SmartCache.get_smart_data(disk.device_path, disk.serial_number,
+                                               timeout=current_app.config['SMART_TIMEOUT'],
+                                               force=data.get('force') in (True, 1, '1'))
+        if not SmartStore.save(disk, smart_data):
+            disk.smart_data = SmartStore.to_json(smart_data)
+            disk.smart_status = smart_data.get('smart_status', 'UNKNOWN')
         db.session.commit()
         
         # Wipe starten
@@ -197,21 +230,130 @@ def wipe_disk(disk_id):
 
 @bp.route('/api/wipes')
 def get_wipes():
-    """Gibt alle Wipe-Vorgänge zurück (als HTML für HTMX)"""
+    """
+    Gibt die Wipe-Vorgänge seitenweise zurück (als HTML für HTMX oder JSON)
+    Parameter: status, method, from, to (YYYY-MM-DD), limit, cursor (aus next_cursor der vorherigen Seite)
+    """
     try:
-        wipes = WipeLog.query.order_by(WipeLog.start_time.desc()).all()
+        filters = WipeQuery.parse_filters(request.args)
+        limit = min(max(request.args.get('limit', WipeQuery.PAGE_SIZE, type=int), 1), WipeQuery.MAX_PAGE_SIZE)
+        cursor = request.args.get('cursor')
+        fields = _requested_fields(WipeLog)
         
-        # Wenn HTMX-Request, gebe Partial zurück
+        query = WipeQuery.filtered(**filters).options(*WipeLog.load_options(fields))
+        wipes, next_cursor = WipeQuery.page(query, cursor, limit)
+        
+        # Wenn HTMX-Request, gebe Partial zurück (Folgeseiten werden beim Scrollen nachgeladen)
         if request.headers.get('HX-Request'):
-            return render_template('partials/wipe_list.html', wipes=wipes)
+            next_url = None
+            if next_cursor:
+                params = {key: value for key, value in request.args.items() if key != 'cursor'}
+                next_url = url_for('main.get_wipes', cursor=next_cursor, **params)
+            return render_template('partials/wipe_list.html', wipes=wipes, next_url=next_url, continuation=bool(cursor))
         
         # Sonst JSON
-        wipes_data = [wipe.to_dict() for wipe in wipes]
+        wipes_data = [wipe.to_dict(fields) for wipe in wipes]
         return jsonify({
             'success': True,
-            'wipes': wipes_data
+            'wipes': wipes_data,
+            'next_cursor': next_cursor
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/wipes/export')
+def export_wipes():
+    """
+    Exportiert Wipe-Vorgänge gestreamt, aufsteigend nach ID
+    Parameter: format (ndjson, csv), status, method, from, to, since_id (nur neuere IDs),
+    archived=0 (ohne Archiv), fields bzw. detail=1
+    """
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in WipeExport.FORMATS:
+            raise ValueError(f"Ungültiges Format: {export_format}")
+        
+        filters = WipeQuery.parse_filters(request.args)
+        since_id = request.args.get('since_id', type=int)
+        fields = _requested_fields(WipeLog)
+        include_archived = request.args.get('archived', '1') != '0'
+        
+        filename = f"wipes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+        return Response(
+            stream_with_context(WipeExport.stream(export_format, fields, filters=filters, since_id=since_id,
+                                                  include_archived=include_archived)),
+            mimetype=WipeExport.FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/wipes/reports', methods=['GET', 'POST'])
+@csrf.exempt
+def export_wipe_reports():
+    """
+    Exportiert die Reports mehrerer Wipe-Vorgänge als ZIP (gestreamt)
+    Nur lesend, POST nimmt lange ID-Listen als JSON an (ohne CSRF-Token, z.B. für Audit-Tools)
+    Parameter: ids (kommagetrennt oder JSON-Liste) oder Filter status, method, from, to;
+    formats (pdf, html, json, kommagetrennt), archived=0 (ohne Archiv)
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids') or request.values.get('ids')
+        if isinstance(ids, str):
+            ids = [part for part in ids.split(',') if part.strip()]
+        if ids:
+            ids = [int(wipe_id) for wipe_id in ids]
+        
+        formats = data.get('formats') or request.values.get('formats', 'pdf')
+        if isinstance(formats, str):
+            formats = formats.split(',')
+        formats = [report_format.strip() for report_format in formats if report_format.strip()]
+        invalid = [report_format for report_format in formats if report_format not in ReportArchive.FORMATS]
+        if invalid or not formats:
+            raise ValueError(f"Ungültiges Format: {', '.join(invalid) or '-'}")
+        
+        filters = WipeQuery.parse_filters(request.values)
+        include_archived = request.values.get('archived', '1') != '0'
+        wipe_ids = ReportArchive.select_ids(ids or None, filters, include_archived)
+        if not wipe_ids:
+            return jsonify({
+                'success': False,
+                'error': 'Keine Wipe-Vorgänge gefunden'
+            }), 404
+        
+        filename = f"wipe_reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        return Response(
+            stream_with_context(ReportArchive.stream(wipe_ids, formats)),
+            mimetype='application/zip',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -223,11 +365,18 @@ def get_wipes():
 def get_wipe(wipe_id):
     """Gibt Details eines Wipe-Vorgangs zurück"""
     try:
-        wipe = WipeLog.query.get_or_404(wipe_id)
+        fields = _requested_fields(WipeLog, detail=True)
+        # Aktive Datenbank oder Archiv
+        wipe = WipeArchive.get(wipe_id, fields)
+        if wipe is None:
+            return jsonify({
+                'success': False,
+                'error': 'Wipe-Vorgang nicht gefunden'
+            }), 404
         
         return jsonify({
             'success': True,
-            'wipe': wipe.to_dict()
+            'wipe': wipe.to_dict(fields)
         })
         
     except Exception as e:
@@ -237,6 +386,52 @@ def get_wipe(wipe_id):
         }), 404
 
 
+@bp.route('/api/wipes/<int:wipe_id>/smart/raw')
+def get_wipe_smart_raw(wipe_id):
+    """Gibt die smartctl-Rohausgabe vor (phase=before) bzw. nach (phase=after) einem Wipe zurück"""
+    try:
+        phase = request.args.get('phase', 'before')
+        if phase not in SmartStore.WIPE_PHASES:
+            raise ValueError(f"Ungültige Phase: {phase}")
+        
+        raw = SmartStore.load_wipe_raw([wipe_id], [phase]).get(wipe_id, {}).get(phase)
+        if raw is None:
+            return jsonify({
+                'success': False,
+                'error': 'Keine SMART-Rohdaten vorhanden'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'phase': phase,
+            'raw': raw
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/wipes/<int:wipe_id>/card')
+def get_wipe_card(wipe_id):
+    """Gibt die Karte eines Wipe-Vorgangs als HTML zurück (laufende Wipes aktualisieren sich darüber)"""
+    try:
+        wipe = WipeArchive.get(wipe_id, WipeLog.SUMMARY_FIELDS)
+        if wipe is None:
+            return '<div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">Wipe-Vorgang nicht gefunden</div>', 404
+        return render_template('partials/wipe_item.html', wipe=wipe)
+        
+    except Exception as e:
+        return f'<div class="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded">Fehler: {str(e)}</div>', 500
+
+
 @bp.route('/api/wipes/<int:wipe_id>/status')
 def get_wipe_status(wipe_id):
     """Gibt den aktuellen Status eines Wipe-Vorgangs zurück"""
@@ -265,14 +460,32 @@ def get_wipe_status(wipe_id):
 def get_wipe_report(wipe_id):
     """Generiert und gibt einen Report für einen Wipe-Vorgang zurück"""
     try:
-        wipe = WipeLog.query.get_or_404(wipe_id)
+        wipe = WipeArchive.get(wipe_id)
+        if wipe is None:
+            return jsonify({
+                'success': False,
+                'error': 'Wipe-Vorgang nicht gefunden'
+            }), 404
         
         # Format bestimmen
         report_format = request.args.get('format', 'json')
         
+        if ReportCache.cacheable(wipe, report_format):
+            # Abgeschlossene Wipes: fertige Datei aus dem Report-Cache, 304 wenn der ETag passt
+            path, etag = ReportCache.fetch(wipe, report_format)
+            return send_file(
+                path,
+                mimetype=ReportCache.FORMATS[report_format],
+                as_attachment=report_format == 'pdf',
+                download_name=f"wipe_report_{wipe.serial_number}_{wipe.id}.{report_format}",
+                etag=etag,
+                conditional=True
+            )
+        
         if report_format == 'html':
-            html = ReportGenerator.generate_html_report(wipe)
-            return html
+            # Gestreamt, die SMART-Rohdaten lädt der Browser erst beim Aufklappen nach
+            html = ReportGenerator.stream_html_report(wipe, raw_data_url=url_for('main.get_wipe_smart_raw', wipe_id=wipe.id))
+            return Response(stream_with_context(html), mimetype='text/html')
         elif report_format == 'pdf':
             pdf_file = ReportGenerator.generate_pdf_report(wipe)
             filename = f"wipe_report_{wipe.serial_number}_{wipe.id}.pdf"
@@ -296,26 +509,77 @@ def get_wipe_report(wipe_id):
         }), 500
 
 
+@bp.route('/api/wipes/<int:wipe_id>/proof')
+def get_wipe_proof(wipe_id):
+    """
+    Gibt den Audit-Nachweis eines Wipe-Vorgangs zurück (offline prüfbar, siehe AuditLedger.verify_proof)
+    record_unchanged: der aktuelle Datensatz entspricht noch dem Ledger-Eintrag
+    """
+    try:
+        proof = AuditLedger.proof(wipe_id)
+        if proof is None:
+            return jsonify({
+                'success': False,
+                'error': 'Kein Eintrag im Audit-Ledger'
+            }), 404
+        
+        wipe = WipeArchive.get(wipe_id, AuditLedger.FIELDS)
+        return jsonify({
+            'success': True,
+            'proof': proof,
+            'record_unchanged': wipe is not None and AuditLedger.matches(wipe, proof)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/audit/checkpoints')
+def list_audit_checkpoints():
+    """Gibt die Checkpoints des Audit-Ledgers zurück, neueste zuerst (Hashes zum Veröffentlichen)"""
+    try:
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        checkpoints = (AuditCheckpoint.query
+                       .order_by(AuditCheckpoint.last_entry_id.desc())
+                       .limit(limit)
+                       .all())
+        
+        return jsonify({
+            'success': True,
+            'checkpoints': [checkpoint.to_dict() for checkpoint in checkpoints]
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @bp.route('/api/search')
 def search_disks():
-    """Sucht nach Festplatten anhand von Seriennummer oder Modell"""
+    """
+    Sucht Festplatten und Wipe-Vorgänge nach Seriennummer, Modell, Device Path oder Fehlertext
+    Parameter: q, limit (Treffer pro Tabelle)
+    """
     try:
-        query = request.args.get('q', '')
+        query = request.args.get('q', '').strip()
         
         if not query:
             return render_template('partials/search_results.html', disks=[], wipe_logs=[], query='')
         
-        # Suche in Disk-Tabelle
-        disks = Disk.query.filter(
-            (Disk.serial_number.ilike(f'%{query}%')) |
-            (Disk.model.ilike(f'%{query}%'))
-        ).all()
+        disk_fields = _requested_fields(Disk)
+        wipe_fields = _requested_fields(WipeLog)
+        limit = min(max(request.args.get('limit', current_app.config['SEARCH_RESULT_LIMIT'], type=int), 1), 500)
         
-        # Suche in WipeLog-Tabelle
-        wipe_logs = WipeLog.query.filter(
-            (WipeLog.serial_number.ilike(f'%{query}%')) |
-            (WipeLog.model.ilike(f'%{query}%'))
-        ).all()
+        # Volltextindex (FTS5), bei kurzen Begriffen bzw. ohne FTS5 per LIKE
+        disks = SearchIndex.search(Disk, query, limit, Disk.load_options(disk_fields))
+        wipe_logs = SearchIndex.search(WipeLog, query, limit, WipeLog.load_options(wipe_fields))
+        # Archivierte Wipes über den Katalog ergänzen
+        wipe_logs += WipeArchive.search(query, limit - len(wipe_logs), wipe_fields)
         
         # Wenn HTMX-Request, gebe Partial zurück
         if request.headers.get('HX-Request'):
@@ -323,8 +587,8 @@ def search_disks():
         
         return jsonify({
             'success': True,
-            'disks': [disk.to_dict() for disk in disks],
-            'wipe_logs': [wipe.to_dict() for wipe in wipe_logs]
+            'disks': [disk.to_dict(disk_fields) for disk in disks],
+            'wipe_logs': [wipe.to_dict(wipe_fields) for wipe in wipe_logs]
         })
         
     except Exception as e:
@@ -334,6 +598,47 @@ def search_disks():
         }), 500
 
 
+@bp.route('/api/smart/fleet')
+def smart_fleet_query():
+    """
+    Flottenweite SMART-Abfrage über die jeweils jüngste Auslesung jeder Disk
+    Beispiel: /api/smart/fleet?attribute=5&op=gt&value=0 (Reallocated Sectors > 0)
+    """
+    try:
+        attribute = request.args.get('attribute', '')
+        if not attribute:
+            return jsonify({
+                'success': False,
+                'error': 'Parameter attribute fehlt'
+            }), 400
+        
+        fields = _requested_fields(Disk)
+        results = SmartStore.fleet_query(
+            attribute,
+            op=request.args.get('op', 'gt'),
+            value=int(request.args.get('value', 0))
+        )
+        
+        return jsonify({
+            'success': True,
+            'disks': [
+                dict(disk.to_dict(fields), attribute=smart_attribute.to_dict())
+                for disk, smart_attribute in results
+            ]
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @bp.route('/wipes')
 def wipes_page():
     """Seite mit Wipe-Historie"""
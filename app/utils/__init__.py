@@ -1,7 +1,27 @@
 from app.utils.disk_manager import DiskManager
+from app.utils.sysfs_scanner import SysfsScanner
 from app.utils.smart_reader import SmartReader
+from app.utils.smart_cache import SmartCache
+from app.utils.smart_store import SmartStore
+from app.utils.smart_history import SmartHistory
 from app.utils.wipe_engine import WipeEngine
 from app.utils.report_generator import ReportGenerator
+from app.utils.disk_inventory import DiskInventory
+from app.utils.event_bus import EventBus
+from app.utils.hotplug_monitor import HotplugMonitor
+from app.utils.scan_job import ScanJob
+from app.utils.single_flight import SingleFlight
+from app.utils.tool_registry import ToolRegistry
+from app.utils.wipe_query import WipeQuery
+from app.utils.wipe_stats import WipeStats
+from app.utils.search_index import SearchIndex
+from app.utils.wipe_archive import WipeArchive
+from app.utils.wipe_export import WipeExport
+from app.utils.report_archive import ReportArchive
+from app.utils.report_cache import ReportCache
+from app.utils.pdf_report_engine import PdfReportEngine
+from app.utils.smart_diff import SmartDiff
+from app.utils.audit_ledger import AuditLedger
 
-__all__ = ['DiskManager', 'SmartReader', 'WipeEngine', 'ReportGenerator']
+__all__ = ['DiskManager', 'SysfsScanner', 'SmartReader', 'SmartCache', 'SmartStore', 'SmartHistory', 'WipeEngine', 'ReportGenerator', 'DiskInventory', 'EventBus', 'HotplugMonitor', 'ScanJob', 'SingleFlight', 'ToolRegistry', 'WipeQuery', 'WipeStats', 'SearchIndex', 'WipeArchive', 'WipeExport', 'ReportArchive', 'ReportCache', 'PdfReportEngine', 'SmartDiff', 'AuditLedger']
 
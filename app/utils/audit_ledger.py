@@ -0,0 +1,628 @@
+import hashlib
+import html
+import json
+import re
+import threading
+import zlib
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape, unescape
+from flask import current_app
+from sqlalchemy import select, tuple_
+from app import db
+from app.models import ArchivedWipe, AuditCheckpoint, AuditEntry, WipeLog
+
+
+class AuditLedger:
+    """
+    Append-only Audit-Ledger der abgeschlossenen Wipes mit Merkle-Checkpoints
+
+    Beim Abschluss eines Wipes wird seine Zusammenfassung (FIELDS) als
+    kanonisches JSON angehängt. Jeder Eintrag ist über chain_hash mit seinem
+    Vorgänger verkettet, ein Anhängen kostet nur den Hash des Vorgängers.
+    Alle AUDIT_CHECKPOINT_SIZE Einträge (bzw. nach AUDIT_CHECKPOINT_MAX_AGE_MINUTES)
+    wird der Bereich mit einem Merkle-Baum versiegelt, die Checkpoints sind
+    ebenfalls verkettet. Der Nachweis für einen Wipe (proof()) enthält Payload,
+    Hashes und den Merkle-Pfad zur Wurzel seines Checkpoints (log2 der
+    Checkpoint-Größe) und lässt sich mit verify_proof() ohne Datenbank prüfen.
+    Trigger verhindern UPDATE und DELETE auf beiden Tabellen.
+
+    Hashes: record_hash = SHA-256(payload), chain_hash = SHA-256(vorheriger
+    chain_hash + record_hash), Merkle-Blatt = SHA-256(0x00 + record_hash),
+    Knoten = SHA-256(0x01 + links + rechts), ein übrig bleibender Knoten wird
+    unverändert eine Ebene höher übernommen, checkpoint_hash = SHA-256(vorheriger
+    checkpoint_hash + merkle_root + chain_hash). Verkettete Werte als Hex-Strings.
+    """
+
+    VERSION = 1
+    GENESIS = '0' * 64
+
+    STATUSES = ('completed',)
+
+    # Felder des WipeLogs im Payload (Reihenfolge egal, das JSON ist sortiert)
+    FIELDS = ('id', 'disk_id', 'serial_number', 'model', 'device_path', 'size_bytes', 'wipe_method',
+              'wipe_passes', 'status', 'start_time', 'end_time', 'duration_seconds', 'verified',
+              'smart_diff_severity')
+
+    TABLES = ('audit_entries', 'audit_checkpoints')
+    BACKFILL_BATCH_SIZE = 500
+
+    # Nachweis-JSON im HTML-Report
+    HTML_PROOF_PATTERN = re.compile(r'<script type="application/json" id="audit-proof">(.*?)</script>', re.S)
+
+    # Nachweis-JSON in den XMP-Metadaten des PDF-Reports
+    XMP_NAMESPACE = 'urn:disk-wiper:audit:1'
+    PDF_PROOF_PATTERN = re.compile(rb'<dw:AuditProof>(.*?)</dw:AuditProof>', re.S)
+
+    # Sichtbare Angaben der PDF-/HTML-Reports, die gegen den Payload geprüft werden (Beschriftung -> Feld)
+    VISIBLE_FIELDS = {
+        'Status:': 'status',
+        'Modell:': 'model',
+        'Seriennummer:': 'serial_number',
+        'Device Path:': 'device_path',
+        'Methode:': 'wipe_method',
+        'Anzahl Pässe:': 'wipe_passes',
+    }
+    # Seiten-Streams und Textoperanden im PDF (ReportLab schreibt je Tabellenzelle Beschriftung, dann Wert)
+    PDF_STREAM_PATTERN = re.compile(rb'<<([^<>]*)>>\s*stream\r?\n')
+    PDF_TEXT_PATTERN = re.compile(rb'\(((?:\\.|[^\\)])*)\)\s*Tj', re.S)
+    PDF_ESCAPE_PATTERN = re.compile(rb'\\([0-7]{1,3}|.)', re.S)
+    PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+    HTML_FIELD_PATTERN = re.compile(r'<div class="info-label">(.*?)</div>\s*<div class="info-value[^"]*">(.*?)</div>', re.S)
+    HTML_STATUS_PATTERN = re.compile(r'<div class="status-badge">(.*?)</div>', re.S)
+
+    _last_checkpoint_check = None
+    _checkpoint_lock = threading.Lock()
+
+    @staticmethod
+    def install():
+        """Legt die Trigger an, die Einträge und Checkpoints unveränderlich machen (idempotent)"""
+        if db.engine.dialect.name != 'sqlite':
+            return False
+
+        with db.engine.begin() as connection:
+            for table in AuditLedger.TABLES:
+                for operation in ('UPDATE', 'DELETE'):
+                    connection.exec_driver_sql(
+                        f"CREATE TRIGGER IF NOT EXISTS {table}_no_{operation.lower()} BEFORE {operation} ON {table} "
+                        f"BEGIN SELECT RAISE(ABORT, '{table} ist append-only'); END"
+                    )
+        return True
+
+    @staticmethod
+    def payload(wipe_log):
+        """Kanonisches JSON der Wipe-Zusammenfassung (sortierte Schlüssel, ohne Leerzeichen)"""
+        values = {}
+        for field in AuditLedger.FIELDS:
+            value = getattr(wipe_log, field, None)
+            values[field] = value.isoformat() if isinstance(value, datetime) else value
+        return json.dumps(values, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+    @staticmethod
+    def sha256(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def chain(previous_hash, record_hash):
+        return AuditLedger.sha256(previous_hash + record_hash)
+
+    @staticmethod
+    def checkpoint_hash(previous_hash, merkle_root, chain_hash):
+        return AuditLedger.sha256(previous_hash + merkle_root + chain_hash)
+
+    @staticmethod
+    def _leaf(record_hash):
+        return hashlib.sha256(b'\x00' + bytes.fromhex(record_hash)).digest()
+
+    @staticmethod
+    def _node(left, right):
+        return hashlib.sha256(b'\x01' + left + right).digest()
+
+    @staticmethod
+    def _levels(record_hashes):
+        """Alle Ebenen des Merkle-Baums, von den Blättern bis zur Wurzel"""
+        level = [AuditLedger._leaf(record_hash) for record_hash in record_hashes]
+        levels = [level]
+        while len(level) > 1:
+            level = [AuditLedger._node(level[index], level[index + 1]) if index + 1 < len(level) else level[index]
+                     for index in range(0, len(level), 2)]
+            levels.append(level)
+        return levels
+
+    @staticmethod
+    def merkle_root(record_hashes):
+        return AuditLedger._levels(record_hashes)[-1][0].hex()
+
+    @staticmethod
+    def _path(levels, index):
+        """Geschwister-Hashes vom Blatt index bis unter die Wurzel"""
+        path = []
+        for level in levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append(level[sibling].hex())
+            index //= 2
+        return path
+
+    @staticmethod
+    def root_from_path(record_hash, index, size, path):
+        """
+        Berechnet die Merkle-Wurzel aus Blatt und Pfad
+        Die Seite jedes Geschwisters ergibt sich aus Position und Größe des Bereichs.
+        Wirft ValueError wenn der Pfad nicht zur Position passt.
+        """
+        node = AuditLedger._leaf(record_hash)
+        siblings = iter(path)
+        try:
+            while size > 1:
+                if index % 2:
+                    node = AuditLedger._node(bytes.fromhex(next(siblings)), node)
+                elif index + 1 < size:
+                    node = AuditLedger._node(node, bytes.fromhex(next(siblings)))
+                index //= 2
+                size = (size + 1) // 2
+        except StopIteration:
+            raise ValueError("Merkle-Pfad zu kurz")
+        if next(siblings, None) is not None:
+            raise ValueError("Merkle-Pfad zu lang")
+        return node.hex()
+
+    @staticmethod
+    def append(wipe_log):
+        """
+        Hängt die Zusammenfassung eines abgeschlossenen Wipes an (Commit durch den Aufrufer)
+        Returns: AuditEntry, None wenn der Status nicht protokolliert wird oder der Wipe schon im Ledger steht
+        """
+        entries = AuditLedger._append_many([wipe_log])
+        return entries[0] if entries else None
+
+    @staticmethod
+    def _append_many(wipe_logs):
+        wipe_logs = [wipe_log for wipe_log in wipe_logs if wipe_log.status in AuditLedger.STATUSES]
+        if not wipe_logs:
+            return []
+
+        # Schreibverbindung vorab belegen (BEGIN IMMEDIATE): parallele Abschlüsse lesen nie denselben Vorgänger
+        db.session.connection()
+
+        ids = [wipe_log.id for wipe_log in wipe_logs]
+        existing = {row.wipe_log_id for row in
+                    db.session.query(AuditEntry.wipe_log_id).filter(AuditEntry.wipe_log_id.in_(ids))}
+        previous = db.session.query(AuditEntry.chain_hash).order_by(AuditEntry.id.desc()).first()
+        chain_hash = previous.chain_hash if previous else AuditLedger.GENESIS
+
+        entries = []
+        for wipe_log in wipe_logs:
+            if wipe_log.id in existing:
+                continue
+            existing.add(wipe_log.id)
+            payload = AuditLedger.payload(wipe_log)
+            record_hash = AuditLedger.sha256(payload)
+            chain_hash = AuditLedger.chain(chain_hash, record_hash)
+            entry = AuditEntry(wipe_log_id=wipe_log.id, payload=payload, record_hash=record_hash, chain_hash=chain_hash)
+            db.session.add(entry)
+            entries.append(entry)
+
+        if entries:
+            db.session.flush()
+            AuditLedger.checkpoint(full_only=True)
+        return entries
+
+    @staticmethod
+    def checkpoint(full_only=False):
+        """
+        Versiegelt offene Einträge in Checkpoints zu je höchstens AUDIT_CHECKPOINT_SIZE Einträgen
+        full_only: nur volle Bereiche (beim Anhängen), sonst auch den angebrochenen Rest
+        Commit durch den Aufrufer. Returns: Anzahl neuer Checkpoints
+        """
+        size = current_app.config['AUDIT_CHECKPOINT_SIZE']
+        created = 0
+        while True:
+            last = db.session.query(AuditCheckpoint).order_by(AuditCheckpoint.last_entry_id.desc()).first()
+            start = last.last_entry_id + 1 if last else 1
+            rows = db.session.execute(
+                select(AuditEntry.id, AuditEntry.record_hash, AuditEntry.chain_hash)
+                .where(AuditEntry.id >= start)
+                .order_by(AuditEntry.id)
+                .limit(size)
+            ).all()
+            if not rows or (full_only and len(rows) < size):
+                return created
+
+            merkle_root = AuditLedger.merkle_root([row.record_hash for row in rows])
+            db.session.add(AuditCheckpoint(
+                first_entry_id=rows[0].id,
+                last_entry_id=rows[-1].id,
+                merkle_root=merkle_root,
+                chain_hash=rows[-1].chain_hash,
+                checkpoint_hash=AuditLedger.checkpoint_hash(last.checkpoint_hash if last else AuditLedger.GENESIS,
+                                                            merkle_root, rows[-1].chain_hash)
+            ))
+            db.session.flush()
+            created += 1
+
+    @staticmethod
+    def maybe_checkpoint(app, interval=timedelta(minutes=10)):
+        """Versiegelt offene Einträge, die älter als AUDIT_CHECKPOINT_MAX_AGE_MINUTES sind (höchstens einmal pro Intervall)"""
+        with AuditLedger._checkpoint_lock:
+            now = datetime.utcnow()
+            if AuditLedger._last_checkpoint_check and now - AuditLedger._last_checkpoint_check < interval:
+                return 0
+            AuditLedger._last_checkpoint_check = now
+
+        try:
+            last = db.session.query(AuditCheckpoint.last_entry_id).order_by(AuditCheckpoint.last_entry_id.desc()).first()
+            oldest = (db.session.query(AuditEntry.created_at)
+                      .filter(AuditEntry.id > (last.last_entry_id if last else 0))
+                      .order_by(AuditEntry.id)
+                      .first())
+            max_age = timedelta(minutes=app.config['AUDIT_CHECKPOINT_MAX_AGE_MINUTES'])
+            if oldest is None or now - oldest.created_at < max_age:
+                db.session.commit()
+                return 0
+
+            created = AuditLedger.checkpoint()
+            db.session.commit()
+            return created
+        except Exception as e:
+            db.session.rollback()
+            print(f"Fehler beim Versiegeln des Audit-Ledgers: {e}")
+            return 0
+
+    @staticmethod
+    def backfill():
+        """
+        Nimmt abgeschlossene Wipes ohne Ledger-Eintrag auf (z.B. aus der Zeit vor dem Ledger), läuft beim Start
+        Erst die aktive Datenbank, dann bereits archivierte Wipes aus ihren Monatsdateien.
+        Returns: Anzahl neuer Einträge
+        """
+        from app.utils.wipe_archive import WipeArchive
+
+        added = 0
+        last = None
+        fields = [getattr(WipeLog, field) for field in AuditLedger.FIELDS]
+        while True:
+            # Chronologisch entlang ix_wipe_logs_status_start_id (kein Sortieren), Keyset über (start_time, id)
+            query = (db.session.query(*fields)
+                     .outerjoin(AuditEntry, AuditEntry.wipe_log_id == WipeLog.id)
+                     .filter(AuditEntry.id.is_(None), WipeLog.status.in_(AuditLedger.STATUSES)))
+            if last is not None:
+                query = query.filter(tuple_(WipeLog.start_time, WipeLog.id) > (last.start_time, last.id))
+            wipe_logs = query.order_by(WipeLog.start_time, WipeLog.id).limit(AuditLedger.BACKFILL_BATCH_SIZE).all()
+            if not wipe_logs:
+                break
+
+            added += len(AuditLedger._append_many(wipe_logs))
+            db.session.commit()
+            last = wipe_logs[-1]
+
+        last_id = 0
+        while True:
+            ids = [row.id for row in (db.session.query(ArchivedWipe.id)
+                                      .outerjoin(AuditEntry, AuditEntry.wipe_log_id == ArchivedWipe.id)
+                                      .filter(AuditEntry.id.is_(None),
+                                              ArchivedWipe.status.in_(AuditLedger.STATUSES),
+                                              ArchivedWipe.id > last_id)
+                                      .order_by(ArchivedWipe.id)
+                                      .limit(AuditLedger.BACKFILL_BATCH_SIZE))]
+            if not ids:
+                break
+
+            added += len(AuditLedger._append_many(WipeArchive.load(ids, AuditLedger.FIELDS)))
+            db.session.commit()
+            last_id = ids[-1]
+
+        return added
+
+    @staticmethod
+    def state(wipe_log_id):
+        """(Eintrag, Checkpoint) eines Wipes als IDs, None ohne Eintrag (z.B. als Teil eines Cache-Schlüssels)"""
+        entry = db.session.query(AuditEntry.id).filter_by(wipe_log_id=wipe_log_id).first()
+        if entry is None:
+            return None
+        checkpoint = AuditLedger._checkpoint_of(entry.id)
+        return entry.id, checkpoint.id if checkpoint else None
+
+    @staticmethod
+    def _checkpoint_of(entry_id):
+        checkpoint = (db.session.query(AuditCheckpoint)
+                      .filter(AuditCheckpoint.last_entry_id >= entry_id)
+                      .order_by(AuditCheckpoint.last_entry_id)
+                      .first())
+        return checkpoint if checkpoint and checkpoint.first_entry_id <= entry_id else None
+
+    @staticmethod
+    def proof(wipe_log_id):
+        """Nachweis für einen Wipe (dict, offline prüfbar mit verify_proof) oder None ohne Ledger-Eintrag"""
+        return AuditLedger.proofs([wipe_log_id]).get(wipe_log_id)
+
+    @staticmethod
+    def proofs(wipe_log_ids):
+        """Nachweise mehrerer Wipes {wipe_log_id: proof}, jeder Merkle-Baum wird nur einmal aufgebaut"""
+        entries = db.session.query(AuditEntry).filter(AuditEntry.wipe_log_id.in_(wipe_log_ids)).all()
+        if not entries:
+            return {}
+
+        previous_ids = [entry.id - 1 for entry in entries]
+        previous = dict(db.session.query(AuditEntry.id, AuditEntry.chain_hash).filter(AuditEntry.id.in_(previous_ids)))
+
+        trees = {}
+        proofs = {}
+        for entry in entries:
+            proof = {
+                'version': AuditLedger.VERSION,
+                'algorithm': 'sha256',
+                'entry': entry.id,
+                'wipe_log_id': entry.wipe_log_id,
+                'created_at': entry.created_at.isoformat() if entry.created_at else None,
+                'payload': entry.payload,
+                'record_hash': entry.record_hash,
+                'previous_chain_hash': previous.get(entry.id - 1, AuditLedger.GENESIS),
+                'chain_hash': entry.chain_hash,
+                'checkpoint': None,
+                'merkle_path': [],
+            }
+
+            checkpoint = AuditLedger._checkpoint_of(entry.id)
+            if checkpoint is not None:
+                if checkpoint.id not in trees:
+                    record_hashes = db.session.execute(
+                        select(AuditEntry.record_hash)
+                        .where(AuditEntry.id.between(checkpoint.first_entry_id, checkpoint.last_entry_id))
+                        .order_by(AuditEntry.id)
+                    ).scalars().all()
+                    predecessor = (db.session.query(AuditCheckpoint.checkpoint_hash)
+                                   .filter(AuditCheckpoint.last_entry_id < checkpoint.first_entry_id)
+                                   .order_by(AuditCheckpoint.last_entry_id.desc())
+                                   .first())
+                    trees[checkpoint.id] = (AuditLedger._levels(record_hashes),
+                                            predecessor.checkpoint_hash if predecessor else AuditLedger.GENESIS)
+
+                levels, previous_checkpoint_hash = trees[checkpoint.id]
+                proof['checkpoint'] = dict(checkpoint.to_dict(), previous_checkpoint_hash=previous_checkpoint_hash)
+                proof['merkle_path'] = AuditLedger._path(levels, entry.id - checkpoint.first_entry_id)
+
+            proofs[entry.wipe_log_id] = proof
+
+        return proofs
+
+    @staticmethod
+    def matches(wipe_log, proof):
+        """Prüft ob der aktuelle Datensatz noch dem Ledger-Eintrag entspricht"""
+        return bool(proof) and AuditLedger.payload(wipe_log) == proof['payload']
+
+    @staticmethod
+    def verify_proof(proof, checkpoint_hash=None):
+        """
+        Prüft einen Nachweis ohne Datenbank (Payload-Hash, Verkettung, Merkle-Pfad, Checkpoint-Hash)
+        checkpoint_hash: veröffentlichter Checkpoint-Hash, dem der Prüfer vertraut (optional)
+        Returns: Liste der Fehler (leer = gültig)
+        """
+        errors = []
+        try:
+            if proof.get('version') != AuditLedger.VERSION:
+                return [f"Unbekannte Nachweis-Version: {proof.get('version')}"]
+
+            record_hash = AuditLedger.sha256(proof['payload'])
+            if record_hash != proof['record_hash']:
+                errors.append("Payload passt nicht zum record_hash (Zusammenfassung verändert)")
+            if AuditLedger.chain(proof['previous_chain_hash'], proof['record_hash']) != proof['chain_hash']:
+                errors.append("chain_hash passt nicht zu Vorgänger und record_hash")
+
+            checkpoint = proof.get('checkpoint')
+            if checkpoint is None:
+                if checkpoint_hash:
+                    errors.append("Eintrag ist noch keinem Checkpoint zugeordnet")
+                return errors
+
+            first, last, entry = checkpoint['first_entry'], checkpoint['last_entry'], proof['entry']
+            if not first <= entry <= last:
+                errors.append("Eintrag liegt nicht im Bereich des Checkpoints")
+                return errors
+
+            root = AuditLedger.root_from_path(proof['record_hash'], entry - first, last - first + 1, proof['merkle_path'])
+            if root != checkpoint['merkle_root']:
+                errors.append("Merkle-Pfad führt nicht zur Wurzel des Checkpoints")
+            if entry == last and proof['chain_hash'] != checkpoint['chain_hash']:
+                errors.append("chain_hash des letzten Eintrags weicht vom Checkpoint ab")
+            expected = AuditLedger.checkpoint_hash(checkpoint['previous_checkpoint_hash'],
+                                                   checkpoint['merkle_root'], checkpoint['chain_hash'])
+            if expected != checkpoint['checkpoint_hash']:
+                errors.append("checkpoint_hash passt nicht zum Checkpoint")
+            if checkpoint_hash and checkpoint_hash != checkpoint['checkpoint_hash']:
+                errors.append("Checkpoint entspricht nicht dem angegebenen checkpoint_hash")
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append(f"Ungültiger Nachweis: {e}")
+
+        return errors
+
+    @staticmethod
+    def xmp_packet(proof):
+        """XMP-Paket mit dem Nachweis als JSON (nur ASCII, für die Metadaten des PDF-Reports)"""
+        return (
+            '<?xpacket begin="\ufeff" id="W5M0MpCehiHzreSzNTczkc9d"?>\n'
+            '<x:xmpmeta xmlns:x="adobe:ns:meta/">\n'
+            '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">\n'
+            f'<rdf:Description rdf:about="" xmlns:dw="{AuditLedger.XMP_NAMESPACE}">\n'
+            f'<dw:AuditProof>{escape(json.dumps(proof, separators=(",", ":")))}</dw:AuditProof>\n'
+            '</rdf:Description>\n'
+            '</rdf:RDF>\n'
+            '</x:xmpmeta>\n'
+            '<?xpacket end="r"?>'
+        )
+
+    @staticmethod
+    def verify_report(content, checkpoint_hash=None):
+        """
+        Prüft einen Report offline: PDF-, JSON- oder HTML-Report bzw. reinen Nachweis (bytes oder Text)
+        Zusätzlich zu verify_proof() müssen die Angaben des JSON-Reports bzw. die sichtbaren Angaben
+        (VISIBLE_FIELDS) des PDF-/HTML-Reports zum Payload passen.
+        Ohne checkpoint_hash ist der Nachweis nur in sich stimmig: wer den Report ändert, kann
+        auch Hashes und Merkle-Pfad neu berechnen. Erst ein extern abgelegter Checkpoint-Hash
+        authentifiziert ihn.
+        Returns: (Nachweis oder None, Liste der Fehler)
+        """
+        visible = None
+        if isinstance(content, bytes):
+            if content.startswith(b'%PDF'):
+                match = AuditLedger.PDF_PROOF_PATTERN.search(content)
+                if not match:
+                    return None, ["PDF enthält keinen maschinenlesbaren Audit-Nachweis"]
+                visible = AuditLedger._pdf_fields(content)
+                content = unescape(match.group(1).decode('ascii', 'replace'))
+            else:
+                try:
+                    content = content.decode('utf-8')
+                except UnicodeDecodeError:
+                    return None, ["Unbekanntes Dateiformat (PDF-, JSON- oder HTML-Report erwartet)"]
+
+        match = AuditLedger.HTML_PROOF_PATTERN.search(content)
+        if match and visible is None:
+            visible = AuditLedger._html_fields(content)
+        try:
+            document = json.loads(match.group(1) if match else content)
+        except ValueError:
+            return None, ["Kein Nachweis gefunden (PDF-, JSON- oder HTML-Report erwartet)"]
+
+        if isinstance(document, dict) and isinstance(document.get('report'), dict):
+            # Antwort von /api/wipes/<id>/report?format=json
+            document = document['report']
+        proof = document.get('audit', document) if isinstance(document, dict) else None
+        if not isinstance(proof, dict) or 'payload' not in proof:
+            return None, ["Report enthält keinen Audit-Nachweis"]
+
+        errors = AuditLedger.verify_proof(proof, checkpoint_hash)
+
+        # Angaben des JSON-Reports (Abschnitte wipe_information, timing, verification) gegen den Payload
+        try:
+            payload = json.loads(proof['payload'])
+        except (TypeError, ValueError):
+            payload = {}
+        for section in ('wipe_information', 'timing', 'verification'):
+            for field, value in (document.get(section) or {}).items():
+                if field in payload and payload[field] != value:
+                    errors.append(f"Angabe im Report weicht vom Ledger ab: {field}")
+
+        # Sichtbare Angaben des PDF-/HTML-Reports (Darstellung wie in den Reports, Status ohne Groß-/Kleinschreibung)
+        if visible is not None:
+            for label, field in AuditLedger.VISIBLE_FIELDS.items():
+                expected = payload.get(field)
+                expected = 'N/A' if expected is None else str(expected)
+                if label not in visible:
+                    errors.append(f"Sichtbare Angabe im Report nicht gefunden: {label.rstrip(':')}")
+                elif visible[label].casefold() != expected.casefold():
+                    errors.append(f"Sichtbare Angabe im Report weicht vom Ledger ab: {field}")
+
+        return proof, errors
+
+    @staticmethod
+    def _pdf_fields(content):
+        """Sichtbare Angaben eines PDF-Reports: Text nach der jeweils ersten Beschriftung aus VISIBLE_FIELDS"""
+        strings = []
+        for match in AuditLedger.PDF_STREAM_PATTERN.finditer(content):
+            end = content.find(b'endstream', match.end())
+            data = content[match.end():end]
+            if b'/FlateDecode' in match.group(1):
+                try:
+                    data = zlib.decompressobj().decompress(data)
+                except zlib.error:
+                    continue
+            for text in AuditLedger.PDF_TEXT_PATTERN.finditer(data):
+                raw = AuditLedger.PDF_ESCAPE_PATTERN.sub(AuditLedger._pdf_unescape, text.group(1))
+                # Standardschriften von ReportLab sind WinAnsi-kodiert
+                strings.append(raw.decode('cp1252', 'replace'))
+
+        fields = {}
+        for label, value in zip(strings, strings[1:]):
+            if label in AuditLedger.VISIBLE_FIELDS and label not in fields:
+                fields[label] = value.strip()
+        return fields
+
+    @staticmethod
+    def _pdf_unescape(match):
+        escaped = match.group(1)
+        if escaped[:1].isdigit():
+            return bytes([int(escaped, 8) & 0xFF])
+        return AuditLedger.PDF_ESCAPES.get(escaped, escaped)
+
+    @staticmethod
+    def _html_fields(content):
+        """Sichtbare Angaben eines HTML-Reports (Beschriftung -> Wert, Status aus dem Badge)"""
+        fields = {}
+        for label, value in AuditLedger.HTML_FIELD_PATTERN.findall(content):
+            label = html.unescape(label).strip()
+            if label in AuditLedger.VISIBLE_FIELDS and label not in fields:
+                fields[label] = html.unescape(value).strip()
+        status = AuditLedger.HTML_STATUS_PATTERN.search(content)
+        if status:
+            fields['Status:'] = html.unescape(status.group(1)).strip()
+        return fields
+
+    @staticmethod
+    def verify_chain():
+        """
+        Vollständige Prüfung: alle Hashes, Verkettung und Checkpoints neu berechnen und jeden
+        Eintrag mit dem aktuellen Datensatz vergleichen (aktive Datenbank und Archiv)
+        Returns: dict mit entries, checkpoints, errors, altered (IDs veränderter Wipes)
+        """
+        from app.utils.wipe_archive import WipeArchive
+
+        checkpoints = {checkpoint.first_entry_id: checkpoint
+                       for checkpoint in db.session.query(AuditCheckpoint).order_by(AuditCheckpoint.last_entry_id)}
+        errors = []
+        altered = []
+        chain_hash = AuditLedger.GENESIS
+        checkpoint_hash = AuditLedger.GENESIS
+        current = None
+        record_hashes = []
+        batch = []
+        count = 0
+
+        def compare(batch):
+            ids = [wipe_log_id for wipe_log_id, _ in batch]
+            fields = list(AuditLedger.FIELDS)
+            wipes = {wipe.id: wipe for wipe in WipeLog.query.options(*WipeLog.load_options(fields)).filter(WipeLog.id.in_(ids))}
+            missing = [wipe_id for wipe_id in ids if wipe_id not in wipes]
+            if missing:
+                wipes.update((wipe.id, wipe) for wipe in WipeArchive.load(missing, fields))
+            for wipe_log_id, payload in batch:
+                wipe = wipes.get(wipe_log_id)
+                if wipe is None or AuditLedger.payload(wipe) != payload:
+                    altered.append(wipe_log_id)
+
+        rows = db.session.execute(
+            select(AuditEntry.id, AuditEntry.wipe_log_id, AuditEntry.payload, AuditEntry.record_hash, AuditEntry.chain_hash)
+            .order_by(AuditEntry.id)
+            .execution_options(yield_per=1000)
+        )
+        for row in rows:
+            count += 1
+            if AuditLedger.sha256(row.payload) != row.record_hash:
+                errors.append(f"Eintrag {row.id}: record_hash passt nicht zum Payload")
+            chain_hash = AuditLedger.chain(chain_hash, row.record_hash)
+            if chain_hash != row.chain_hash:
+                errors.append(f"Eintrag {row.id}: Verkettung unterbrochen")
+                chain_hash = row.chain_hash
+
+            if row.id in checkpoints:
+                current = checkpoints[row.id]
+                record_hashes = []
+            if current is not None:
+                record_hashes.append(row.record_hash)
+                if row.id == current.last_entry_id:
+                    merkle_root = AuditLedger.merkle_root(record_hashes)
+                    checkpoint_hash = AuditLedger.checkpoint_hash(checkpoint_hash, merkle_root, row.chain_hash)
+                    if merkle_root != current.merkle_root or row.chain_hash != current.chain_hash:
+                        errors.append(f"Checkpoint {current.id}: Merkle-Wurzel bzw. chain_hash weicht ab")
+                    if checkpoint_hash != current.checkpoint_hash:
+                        errors.append(f"Checkpoint {current.id}: checkpoint_hash weicht ab")
+                        checkpoint_hash = current.checkpoint_hash
+                    current = None
+
+            batch.append((row.wipe_log_id, row.payload))
+            if len(batch) >= 1000:
+                compare(batch)
+                batch = []
+        if batch:
+            compare(batch)
+
+        return {'entries': count, 'checkpoints': len(checkpoints), 'errors': errors, 'altered': altered}
@@ -0,0 +1,127 @@
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update, or_
+from sqlalchemy.orm import undefer
+from app import db
+from app.models import Disk
+
+
+class DiskInventory:
+    """In-Memory-Inventar der aktuell angeschlossenen Festplatten (device_path -> disk_info)"""
+
+    # Spalten, die ein Scan liefert (nur Änderungen werden geschrieben)
+    SCAN_COLUMNS = ('device_path', 'model', 'size_bytes', 'size_human', 'is_boot_disk')
+    # last_seen unveränderter Disks höchstens so oft schreiben
+    LAST_SEEN_RESOLUTION = timedelta(minutes=1)
+    # SQLite erlaubt nur eine begrenzte Anzahl gebundener Parameter pro Statement
+    QUERY_CHUNK_SIZE = 500
+
+    _disks = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def replace(disks):
+        """Ersetzt das Inventar nach einem vollständigen Scan"""
+        with DiskInventory._lock:
+            DiskInventory._disks = {disk['device_path']: disk for disk in disks}
+
+    @staticmethod
+    def put(disk_info):
+        with DiskInventory._lock:
+            DiskInventory._disks[disk_info['device_path']] = disk_info
+
+    @staticmethod
+    def remove(device_path):
+        """Entfernt eine Disk, gibt das bisherige disk_info (oder None) zurück"""
+        with DiskInventory._lock:
+            return DiskInventory._disks.pop(device_path, None)
+
+    @staticmethod
+    def get(device_path):
+        with DiskInventory._lock:
+            return DiskInventory._disks.get(device_path)
+
+    @staticmethod
+    def get_all():
+        with DiskInventory._lock:
+            return list(DiskInventory._disks.values())
+
+    @staticmethod
+    def load_disks():
+        """Gibt die Disk-Einträge der aktuell angeschlossenen Festplatten zurück (ohne neuen Scan)"""
+        disks = DiskInventory.get_all()
+        if not disks:
+            return []
+
+        order = {disk['serial_number']: index for index, disk in enumerate(disks)}
+        records = Disk.query.filter(Disk.serial_number.in_(order.keys())).all()
+        return sorted(records, key=lambda disk: order[disk.serial_number])
+
+    @staticmethod
+    def upsert_disk(disk_info):
+        """
+        Aktualisiert bzw. erstellt den Disk-Eintrag für ein disk_info-Dict
+        Commit erfolgt durch den Aufrufer
+        """
+        return DiskInventory.upsert_many([disk_info])[0]
+
+    @staticmethod
+    def upsert_many(disk_infos):
+        """
+        Aktualisiert bzw. erstellt die Disk-Einträge für mehrere disk_info-Dicts
+        Eine Abfrage für alle Seriennummern, es werden nur geänderte Spalten geschrieben,
+        last_seen unveränderter Disks wird in einem Statement (und höchstens einmal pro
+        LAST_SEEN_RESOLUTION) aktualisiert. Commit erfolgt durch den Aufrufer.
+        Returns: Disk-Objekte in der Reihenfolge von disk_infos
+        """
+        if not disk_infos:
+            return []
+
+        serials = list({disk_info['serial_number'] for disk_info in disk_infos})
+        existing = {}
+        for offset in range(0, len(serials), DiskInventory.QUERY_CHUNK_SIZE):
+            chunk = serials[offset:offset + DiskInventory.QUERY_CHUNK_SIZE]
+            # smart_data wird beim Scan mit dem Cache verglichen, daher direkt mitladen
+            for disk in Disk.query.options(undefer(Disk.smart_data)).filter(Disk.serial_number.in_(chunk)):
+                existing[disk.serial_number] = disk
+
+        now = datetime.utcnow()
+        new_rows = {}
+        unchanged_ids = []
+        for disk_info in disk_infos:
+            disk = existing.get(disk_info['serial_number'])
+
+            if disk is None:
+                new_rows.setdefault(disk_info['serial_number'], dict(
+                    {column: disk_info[column] for column in DiskInventory.SCAN_COLUMNS},
+                    serial_number=disk_info['serial_number'],
+                    first_seen=now,
+                    last_seen=now
+                ))
+                continue
+
+            changed = False
+            for column in DiskInventory.SCAN_COLUMNS:
+                if getattr(disk, column) != disk_info[column]:
+                    setattr(disk, column, disk_info[column])
+                    changed = True
+            # Geänderte Zeilen erhalten last_seen über onupdate
+            if not changed:
+                unchanged_ids.append(disk.id)
+
+        if new_rows:
+            # Ein executemany-INSERT, danach die neuen Zeilen in einer Abfrage laden
+            db.session.execute(insert(Disk), list(new_rows.values()))
+            for disk in Disk.query.filter(Disk.serial_number.in_(new_rows.keys())):
+                existing[disk.serial_number] = disk
+
+        if unchanged_ids:
+            db.session.execute(
+                update(Disk)
+                .where(Disk.id.in_(unchanged_ids))
+                .where(or_(Disk.last_seen.is_(None), Disk.last_seen < now - DiskInventory.LAST_SEEN_RESOLUTION))
+                .values(last_seen=now)
+                .execution_options(synchronize_session=False)
+            )
+
+        return [existing[disk_info['serial_number']] for disk_info in disk_infos]
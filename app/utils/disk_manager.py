@@ -1,9 +1,12 @@
 import os
 import platform
-import subprocess
 import psutil
 import json
 from pathlib import Path
+from app.utils.sysfs_scanner import SysfsScanner
+from app.utils.disk_topology import DiskTopology
+from app.utils.single_flight import SingleFlight
+from app.utils.tool_registry import ToolRegistry
 
 
 class DiskManager:
@@ -11,7 +14,14 @@ class DiskManager:
 
     @staticmethod
     def get_all_disks():
-        """Gibt alle verfügbaren Festplatten zurück"""
+        """
+        Gibt alle verfügbaren Festplatten zurück
+        Gleichzeitige Aufrufe teilen sich einen Scan
+        """
+        return SingleFlight.do('disk-scan', DiskManager._scan_disks)
+
+    @staticmethod
+    def _scan_disks():
         system = platform.system()
         
         if system == 'Linux':
@@ -25,17 +35,24 @@ class DiskManager:
 
     @staticmethod
     def _get_linux_disks():
-        """Erkennt Festplatten unter Linux"""
+        """Erkennt Festplatten unter Linux (direkt aus sysfs, lsblk als Fallback)"""
+        scanner = SysfsScanner()
+        if scanner.is_available():
+            try:
+                return scanner.scan()
+            except Exception as e:
+                print(f"sysfs-Scan fehlgeschlagen, verwende lsblk: {e}")
+        
+        return DiskManager._get_linux_disks_lsblk()
+
+    @staticmethod
+    def _get_linux_disks_lsblk():
+        """Erkennt Festplatten unter Linux via lsblk/udevadm"""
         disks = []
         
         try:
             # Alle Block-Devices finden
-            result = subprocess.run(
-                ['lsblk', '-J', '-b', '-o', 'NAME,SIZE,MODEL,SERIAL,TYPE,MOUNTPOINT'],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            result = ToolRegistry.run('lsblk', ['-J', '-b', '-o', 'NAME,SIZE,MODEL,SERIAL,TYPE,MOUNTPOINT'], check=True)
             
             data = json.loads(result.stdout)
             boot_partitions = DiskManager._get_boot_partitions()
@@ -78,12 +95,7 @@ class DiskManager:
             Get-PhysicalDisk | Select-Object DeviceID, FriendlyName, SerialNumber, Size, MediaType | ConvertTo-Json
             """
             
-            result = subprocess.run(
-                ['powershell', '-Command', ps_script],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            result = ToolRegistry.run('powershell', ['-Command', ps_script], check=True)
             
             disk_data = json.loads(result.stdout)
             if not isinstance(disk_data, list):
@@ -118,20 +130,11 @@ class DiskManager:
         disks = []
         
         try:
-            result = subprocess.run(
-                ['diskutil', 'list', '-plist'],
-                capture_output=True,
-                check=True
-            )
+            result = ToolRegistry.run('diskutil', ['list', '-plist'], check=True, text=False)
             
             # Parse plist output (würde plistlib benötigen)
             # Vereinfachte Version mit diskutil info
-            result = subprocess.run(
-                ['diskutil', 'list'],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            result = ToolRegistry.run('diskutil', ['list'], check=True)
             
             lines = result.stdout.split('\n')
             boot_disk = DiskManager._get_boot_disk_macos()
@@ -142,11 +145,7 @@ class DiskManager:
                     device_path = parts[0]
                     
                     # Detaillierte Infos abrufen
-                    info_result = subprocess.run(
-                        ['diskutil', 'info', device_path],
-                        capture_output=True,
-                        text=True
-                    )
+                    info_result = ToolRegistry.run('diskutil', ['info', device_path])
                     
                     is_boot = (device_path == boot_disk)
                     
@@ -212,12 +211,7 @@ class DiskManager:
             }}
             """
             
-            result = subprocess.run(
-                ['powershell', '-Command', ps_script],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            result = ToolRegistry.run('powershell', ['-Command', ps_script], timeout=10)
             
             if 'BOOT_DISK' in result.stdout:
                 return True
@@ -234,12 +228,7 @@ class DiskManager:
             }}
             """
             
-            result2 = subprocess.run(
-                ['powershell', '-Command', ps_script2],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            result2 = ToolRegistry.run('powershell', ['-Command', ps_script2], timeout=10)
             
             if 'IS_SYSTEM' in result2.stdout:
                 return True
@@ -256,11 +245,7 @@ class DiskManager:
     def _get_boot_disk_macos():
         """Ermittelt Boot-Disk unter macOS"""
         try:
-            result = subprocess.run(
-                ['diskutil', 'info', '/'],
-                capture_output=True,
-                text=True
-            )
+            result = ToolRegistry.run('diskutil', ['info', '/'])
             
             for line in result.stdout.split('\n'):
                 if 'Part of Whole' in line:
@@ -279,11 +264,7 @@ class DiskManager:
         
         # Versuche via udevadm
         try:
-            result = subprocess.run(
-                ['udevadm', 'info', '--query=property', '--name=' + device_path],
-                capture_output=True,
-                text=True
-            )
+            result = ToolRegistry.run('udevadm', ['info', '--query=property', '--name=' + device_path])
             
             for line in result.stdout.split('\n'):
                 if line.startswith('ID_SERIAL_SHORT='):
@@ -321,6 +302,12 @@ class DiskManager:
         Gibt True zurück wenn sicher, False wenn Boot-Disk oder unsicher
         """
         try:
+            # Linux: O(1)-Lookup im gecachten Topologie-Schnappschuss
+            if platform.system() == 'Linux':
+                scanner = SysfsScanner()
+                if scanner.is_available():
+                    return DiskTopology.current(scanner).check(device_path)
+            
             all_disks = DiskManager.get_all_disks()
             
             for disk in all_disks:
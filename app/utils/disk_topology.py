@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from types import MappingProxyType
+from app.utils.sysfs_scanner import SysfsScanner
+
+
+class TopologySnapshot:
+    """
+    Unveränderlicher Schnappschuss der Block-Device-Topologie (Linux)
+
+    Enthält Disks, Partitionen, Holder-Ketten (dm/md/LVM), Mounts und Swap.
+    Sicherheitsprüfungen sind reine Dictionary-Lookups.
+    """
+
+    __slots__ = ('fingerprint', 'created_at', 'disks', 'partitions', 'stacks', 'protected')
+
+    def __init__(self, fingerprint, disks, partitions, stacks, protected):
+        object.__setattr__(self, 'fingerprint', fingerprint)
+        object.__setattr__(self, 'created_at', time.monotonic())
+        object.__setattr__(self, 'disks', MappingProxyType(disks))
+        object.__setattr__(self, 'partitions', MappingProxyType(partitions))
+        object.__setattr__(self, 'stacks', MappingProxyType(stacks))
+        object.__setattr__(self, 'protected', MappingProxyType(protected))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('TopologySnapshot ist unveränderlich')
+
+    def check(self, device_path):
+        """
+        Prüft ob eine Disk gelöscht werden darf
+        Returns: (is_safe, message) - bei jeder Unsicherheit (False, ...)
+        """
+        name = DiskTopology.kernel_name(device_path)
+
+        if name in self.partitions:
+            return False, "Partitionen können nicht einzeln gelöscht werden"
+
+        if name not in self.disks:
+            return False, "Disk konnte nicht verifiziert werden"
+
+        reason = self.protected.get(name)
+        if reason:
+            return False, reason
+
+        return True, "Disk ist sicher zu löschen"
+
+
+class DiskTopology:
+    """Verwaltet den gecachten Topologie-Schnappschuss und baut ihn bei Änderungen neu"""
+
+    _snapshot = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def current(scanner=None):
+        """
+        Gibt den aktuellen Schnappschuss zurück
+        Neuaufbau nur wenn sich mountinfo, swaps oder die Block-Device-Menge geändert haben
+        """
+        scanner = scanner or SysfsScanner()
+        fingerprint = DiskTopology._fingerprint(scanner)
+
+        snapshot = DiskTopology._snapshot
+        if snapshot is not None and snapshot.fingerprint == fingerprint:
+            return snapshot
+
+        with DiskTopology._lock:
+            snapshot = DiskTopology._snapshot
+            if snapshot is None or snapshot.fingerprint != fingerprint:
+                snapshot = DiskTopology._build(scanner, fingerprint)
+                DiskTopology._snapshot = snapshot
+
+        return snapshot
+
+    @staticmethod
+    def invalidate():
+        """Verwirft den Schnappschuss (z.B. nach Hotplug-Events)"""
+        with DiskTopology._lock:
+            DiskTopology._snapshot = None
+
+    @staticmethod
+    def kernel_name(device_path):
+        """Löst /dev/sdX bzw. /dev/disk/by-id/... auf den Kernel-Namen auf"""
+        try:
+            return os.path.basename(os.path.realpath(device_path))
+        except OSError:
+            return os.path.basename(device_path)
+
+    @staticmethod
+    def _fingerprint(scanner):
+        mountinfo = scanner._read(os.path.join(scanner.proc_root, 'self', 'mountinfo'), strip=False)
+        swaps = scanner._read(os.path.join(scanner.proc_root, 'swaps'), strip=False)
+        return hash((mountinfo, swaps, tuple(scanner.list_block_devices())))
+
+    @staticmethod
+    def _build(scanner, fingerprint):
+        """Baut einen neuen Schnappschuss aus sysfs/procfs"""
+        disks = {}
+        partitions = {}
+        stacks = {}
+        protected = {}
+
+        swap_devices = set()
+        for source in scanner.read_swaps():
+            resolved = scanner.resolve_source(source)
+            if resolved:
+                swap_devices.add(resolved)
+
+        for disk_info in scanner.scan():
+            name = os.path.basename(disk_info['device_path'])
+            disks[name] = disk_info
+
+            part_names = [part['name'] for part in disk_info.get('partitions', [])]
+            for part_name in part_names:
+                partitions[part_name] = name
+
+            stack = frozenset(scanner.stacked_devices(name, part_names))
+            stacks[name] = stack
+
+            if disk_info['is_boot_disk']:
+                protected[name] = "Dies ist eine Boot-Disk und kann nicht gelöscht werden!"
+            elif swap_devices & ({name} | set(part_names) | stack):
+                protected[name] = "Disk enthält einen aktiven Swap-Bereich und kann nicht gelöscht werden!"
+
+        return TopologySnapshot(fingerprint, disks, partitions, stacks, protected)
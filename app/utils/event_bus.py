@@ -0,0 +1,62 @@
+import queue
+import threading
+import time
+
+
+class EventBus:
+    """Verteilt Server-Events (Hotplug, Scan-Fortschritt, ...) an verbundene Clients"""
+
+    _subscribers = set()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def subscribe(max_queue=256):
+        """Registriert einen neuen Client und gibt dessen Queue zurück"""
+        subscriber = queue.Queue(maxsize=max_queue)
+        with EventBus._lock:
+            EventBus._subscribers.add(subscriber)
+        return subscriber
+
+    @staticmethod
+    def unsubscribe(subscriber):
+        with EventBus._lock:
+            EventBus._subscribers.discard(subscriber)
+
+    @staticmethod
+    def publish(event, data):
+        """Sendet ein Event an alle Clients (langsame Clients verlieren Events statt zu blockieren)"""
+        with EventBus._lock:
+            subscribers = list(EventBus._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event, data))
+            except queue.Full:
+                pass
+
+    @staticmethod
+    def stream(subscriber, heartbeat=15, max_duration=300):
+        """
+        Generator für eine Server-Sent-Events-Antwort
+        Endet nach max_duration Sekunden, der Browser verbindet sich automatisch neu
+        """
+        deadline = time.monotonic() + max_duration
+        try:
+            yield 'retry: 3000\n\n'
+            while time.monotonic() < deadline:
+                try:
+                    event, data = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    # Kommentarzeile hält die Verbindung offen
+                    yield ': keepalive\n\n'
+                    continue
+                yield EventBus.format_sse(event, data)
+        finally:
+            EventBus.unsubscribe(subscriber)
+
+    @staticmethod
+    def format_sse(event, data):
+        """Formatiert ein Event im SSE-Format (mehrzeilige Daten erlaubt)"""
+        lines = [f'event: {event}']
+        lines.extend(f'data: {line}' for line in str(data).splitlines() or [''])
+        return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,217 @@
+import os
+import json
+import socket
+import struct
+import threading
+import time
+from datetime import datetime
+from flask import render_template
+from app import db
+from app.models import Disk
+from app.utils.sysfs_scanner import SysfsScanner
+from app.utils.disk_topology import DiskTopology
+from app.utils.disk_inventory import DiskInventory
+from app.utils.event_bus import EventBus
+from app.utils.smart_cache import SmartCache
+from app.utils.smart_store import SmartStore
+
+
+class HotplugMonitor:
+    """
+    Überwacht das Hinzufügen/Entfernen von Festplatten (Linux)
+
+    Liest Uevents über den Netlink-Socket (udev-Gruppe wenn udevd läuft, sonst
+    Kernel-Gruppe). Ohne Netlink wird /sys/block periodisch verglichen.
+    Es wird immer nur das geänderte Gerät neu gelesen.
+    """
+
+    NETLINK_KOBJECT_UEVENT = 15
+    GROUP_KERNEL = 1
+    GROUP_UDEV = 2
+
+    _thread = None
+    _stop = threading.Event()
+    _known = set()
+
+    @staticmethod
+    def start(app, poll_interval=5):
+        """Startet den Monitor-Thread (idempotent)"""
+        if HotplugMonitor._thread and HotplugMonitor._thread.is_alive():
+            return
+
+        scanner = SysfsScanner()
+        if not scanner.is_available():
+            print("Hotplug-Monitor: sysfs nicht verfügbar, Monitor deaktiviert")
+            return
+
+        # Ausgangszustand ohne DB-Zugriff erfassen
+        DiskInventory.replace(scanner.scan())
+        HotplugMonitor._known = set(scanner.list_disk_names())
+        HotplugMonitor._stop.clear()
+
+        HotplugMonitor._thread = threading.Thread(
+            target=HotplugMonitor._run,
+            args=(app, scanner, poll_interval),
+            name='hotplug-monitor',
+            daemon=True
+        )
+        HotplugMonitor._thread.start()
+
+    @staticmethod
+    def stop():
+        HotplugMonitor._stop.set()
+
+    @staticmethod
+    def _run(app, scanner, poll_interval):
+        sock = HotplugMonitor._open_socket(poll_interval)
+        if sock is None:
+            print("Hotplug-Monitor: Netlink nicht verfügbar, verwende Polling")
+
+        while not HotplugMonitor._stop.is_set():
+            try:
+                if sock is None:
+                    HotplugMonitor._stop.wait(poll_interval)
+                    HotplugMonitor._reconcile(app, scanner)
+                    continue
+
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    # Verpasste Events (z.B. ENOBUFS) durch Abgleich auffangen
+                    HotplugMonitor._reconcile(app, scanner)
+                    continue
+
+                properties = HotplugMonitor.parse_uevent(data)
+                if properties.get('SUBSYSTEM') == 'block':
+                    HotplugMonitor._handle_event(app, scanner, properties)
+
+            except Exception as e:
+                print(f"Hotplug-Monitor Fehler: {e}")
+                time.sleep(1)
+
+        if sock is not None:
+            sock.close()
+
+    @staticmethod
+    def _open_socket(poll_interval=5):
+        """Öffnet den Uevent-Netlink-Socket, gibt None zurück wenn nicht möglich"""
+        if not hasattr(socket, 'AF_NETLINK'):
+            return None
+
+        # udev-Events kommen erst nach Abschluss der udev-Regeln (Seriennummer in udev-DB vorhanden)
+        group = HotplugMonitor.GROUP_UDEV if os.path.exists('/run/udev/control') else HotplugMonitor.GROUP_KERNEL
+
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, HotplugMonitor.NETLINK_KOBJECT_UEVENT)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+            sock.bind((0, group))
+            sock.settimeout(poll_interval)
+            return sock
+        except OSError as e:
+            print(f"Hotplug-Monitor: Netlink-Socket konnte nicht geöffnet werden: {e}")
+            return None
+
+    @staticmethod
+    def parse_uevent(data):
+        """Parst eine Kernel- oder libudev-Netlink-Nachricht in ein Property-Dict"""
+        if data.startswith(b'libudev\0'):
+            # Header: prefix[8], magic, header_size, properties_off, properties_len, ...
+            properties_off, properties_len = struct.unpack_from('=II', data, 16)
+            payload = data[properties_off:properties_off + properties_len]
+        else:
+            # Kernel-Format: "action@devpath\0KEY=VALUE\0..."
+            payload = data.split(b'\0', 1)[1] if b'\0' in data else b''
+
+        properties = {}
+        for entry in payload.split(b'\0'):
+            if b'=' in entry:
+                key, value = entry.split(b'=', 1)
+                properties[key.decode('utf-8', 'replace')] = value.decode('utf-8', 'replace')
+
+        return properties
+
+    @staticmethod
+    def _handle_event(app, scanner, properties):
+        action = properties.get('ACTION')
+        devtype = properties.get('DEVTYPE')
+        devpath = properties.get('DEVPATH', '')
+        name = os.path.basename(properties.get('DEVNAME', '')) or os.path.basename(devpath)
+
+        if devtype == 'partition':
+            # Partitionsänderung: nur die übergeordnete Disk neu lesen (ohne SMART)
+            parent = os.path.basename(os.path.dirname(devpath))
+            if parent in HotplugMonitor._known:
+                DiskTopology.invalidate()
+                HotplugMonitor._device_added(app, scanner, parent, read_smart=False)
+            return
+
+        if devtype != 'disk':
+            return
+
+        if action == 'add':
+            HotplugMonitor._device_added(app, scanner, name)
+        elif action == 'remove':
+            HotplugMonitor._device_removed(app, name)
+        elif action == 'change' and name in HotplugMonitor._known:
+            DiskTopology.invalidate()
+            HotplugMonitor._device_added(app, scanner, name, read_smart=False)
+
+    @staticmethod
+    def _reconcile(app, scanner):
+        """Vergleicht /sys/block mit dem bekannten Zustand"""
+        current = set(scanner.list_disk_names())
+        known = HotplugMonitor._known
+
+        for name in sorted(current - known):
+            HotplugMonitor._device_added(app, scanner, name)
+        for name in sorted(known - current):
+            HotplugMonitor._device_removed(app, name)
+
+    @staticmethod
+    def _device_added(app, scanner, name, read_smart=True):
+        disk_info = scanner.scan_device(name)
+        if not disk_info:
+            return
+
+        HotplugMonitor._known.add(name)
+        DiskInventory.put(disk_info)
+        SmartCache.invalidate(disk_info['device_path'], disk_info['serial_number'])
+
+        with app.app_context():
+            disk = DiskInventory.upsert_disk(disk_info)
+            # Schreibverbindung vor smartctl freigeben, sonst blockiert eine hängende Disk alle Wipes
+            db.session.commit()
+
+            if read_smart:
+                try:
+                    smart_data = SmartCache.get_smart_data(disk_info['device_path'], disk_info['serial_number'],
+                                                           timeout=app.config['SMART_TIMEOUT'])
+                    SmartStore.save(disk, smart_data)
+                    db.session.commit()
+                except Exception as smart_error:
+                    db.session.rollback()
+                    print(f"Fehler beim Auslesen der SMART-Daten für {disk_info['device_path']}: {smart_error}")
+
+            EventBus.publish('disk-added', render_template('partials/disk_card.html', disk=disk))
+
+    @staticmethod
+    def _device_removed(app, name):
+        HotplugMonitor._known.discard(name)
+        disk_info = DiskInventory.remove(f"/dev/{name}")
+        SmartCache.invalidate(f"/dev/{name}")
+        if not disk_info:
+            return
+
+        with app.app_context():
+            disk = Disk.query.filter_by(serial_number=disk_info['serial_number']).first()
+            if not disk:
+                return
+
+            disk.last_seen = datetime.utcnow()
+            db.session.commit()
+
+            EventBus.publish('disk-removed', json.dumps({
+                'dom_id': f'disk-card-{disk.id}',
+                'device_path': disk_info['device_path'],
+                'model': disk.model
+            }))
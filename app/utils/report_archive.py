@@ -0,0 +1,184 @@
+import json
+import multiprocessing
+import re
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from flask import current_app
+from app import db
+from app.models import ArchivedWipe, WipeLog
+from app.utils.audit_ledger import AuditLedger
+from app.utils.report_generator import ReportGenerator
+from app.utils.smart_store import SmartStore
+from app.utils.wipe_archive import WipeArchive
+from app.utils.wipe_query import WipeQuery
+
+
+def _render_reports(values, formats):
+    """Läuft im Worker-Prozess: rendert die Reports eines Wipes, Returns: [(format, bytes)]"""
+    wipe_log = SimpleNamespace(**values)
+    reports = []
+    for report_format in formats:
+        if report_format == 'pdf':
+            reports.append((report_format, ReportGenerator.generate_pdf_report(wipe_log).getvalue()))
+        elif report_format == 'html':
+            reports.append((report_format, ReportGenerator.generate_html_report(wipe_log).encode('utf-8')))
+        else:
+            report = ReportGenerator.generate_wipe_report(wipe_log)
+            reports.append((report_format, json.dumps(report, indent=2, ensure_ascii=False).encode('utf-8')))
+    return reports
+
+
+class _ZipStream:
+    """Nicht-seekbares Schreibziel für ZipFile, geschriebene Bytes werden per drain() abgeholt"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ReportArchive:
+    """
+    Sammel-Export von Reports (PDF, HTML, JSON) als ZIP
+
+    Gerendert wird in einem Prozess-Pool (spawn, kein fork aus dem Webserver mit
+    seinen Threads), der Waitress-Thread verteilt nur die Arbeit und schreibt
+    fertige Reports sofort in den gestreamten ZIP. Pro Worker sind höchstens
+    PENDING_PER_WORKER Wipes unterwegs, die Wipes werden in Blöcken geladen.
+    Die Worker erhalten die Spaltenwerte des Wipes, keine ORM-Objekte.
+    """
+
+    FORMATS = ('pdf', 'html', 'json')
+    LOAD_CHUNK_SIZE = 100
+    PENDING_PER_WORKER = 4
+
+    _executor = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def executor():
+        """Gemeinsamer Prozess-Pool, beim ersten Export gestartet"""
+        with ReportArchive._lock:
+            if ReportArchive._executor is None:
+                ReportArchive._executor = ProcessPoolExecutor(
+                    max_workers=current_app.config['REPORT_WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return ReportArchive._executor
+
+    @staticmethod
+    def _discard(executor):
+        """Verwirft einen defekten Pool (z.B. Worker durch Speichermangel beendet), der nächste Export startet neu"""
+        with ReportArchive._lock:
+            if ReportArchive._executor is executor:
+                ReportArchive._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def select_ids(ids=None, filters=None, include_archived=True):
+        """
+        IDs der zu exportierenden Wipes: die angegebenen oder alle zu den Filtern passenden (inkl. Archiv)
+        Wirft ValueError wenn mehr als REPORT_BATCH_MAX_WIPES Wipes betroffen sind
+        """
+        if ids is None:
+            filters = filters or {}
+            ids = [row.id for row in db.session.query(WipeLog.id).filter(*WipeQuery.conditions(WipeLog, **filters))]
+            if include_archived:
+                ids += [row.id for row in db.session.query(ArchivedWipe.id).filter(*WipeQuery.conditions(ArchivedWipe, **filters))]
+            ids.sort()
+        else:
+            ids = list(dict.fromkeys(ids))
+
+        limit = current_app.config['REPORT_BATCH_MAX_WIPES']
+        if len(ids) > limit:
+            raise ValueError(f"Zu viele Wipe-Vorgänge für einen Export: {len(ids)} (max. {limit})")
+        return ids
+
+    @staticmethod
+    def _load(ids):
+        """Spaltenwerte der Wipes (aktiv oder archiviert) in Reihenfolge der IDs"""
+        options = WipeLog.load_options(WipeLog.DETAIL_FIELDS)
+        wipes = {wipe.id: wipe for wipe in WipeLog.query.options(*options).filter(WipeLog.id.in_(ids))}
+        missing = [wipe_id for wipe_id in ids if wipe_id not in wipes]
+        if missing:
+            wipes.update((wipe.id, wipe) for wipe in WipeArchive.load(missing))
+
+        # Audit-Nachweise und SMART-Rohausgaben vorab laden, die Worker-Prozesse haben keine Datenbank ({} = keine)
+        proofs = AuditLedger.proofs(list(wipes))
+        raw = SmartStore.load_wipe_raw(list(wipes))
+        columns = [column.key for column in WipeLog.__table__.columns]
+        return [dict({column: getattr(wipes[wipe_id], column) for column in columns},
+                     audit_proof=proofs.get(wipe_id, {}), smart_raw=raw.get(wipe_id, {}))
+                for wipe_id in ids if wipe_id in wipes]
+
+    @staticmethod
+    def filename(values, report_format):
+        serial = re.sub(r'[^\w.-]', '_', values['serial_number'] or 'unknown')
+        return f"wipe_report_{serial}_{values['id']}.{report_format}"
+
+    @staticmethod
+    def stream(ids, formats=FORMATS):
+        """Generator für die Response: ZIP-Daten, jeweils sobald ein Wipe fertig gerendert ist"""
+        executor = ReportArchive.executor()
+        max_pending = current_app.config['REPORT_WORKERS'] * ReportArchive.PENDING_PER_WORKER
+        output = _ZipStream()
+        pending = {}
+        errors = []
+
+        def collect(archive, done):
+            for future in done:
+                values = pending.pop(future)
+                try:
+                    for report_format, data in future.result():
+                        # PDF ist bereits komprimiert
+                        compression = zipfile.ZIP_STORED if report_format == 'pdf' else zipfile.ZIP_DEFLATED
+                        archive.writestr(ReportArchive.filename(values, report_format), data, compress_type=compression)
+                except BrokenProcessPool:
+                    # Kein Fehler dieses Wipes: Pool ist unbrauchbar, auch wenn nichts mehr eingereicht wird
+                    ReportArchive._discard(executor)
+                    raise
+                except Exception as e:
+                    errors.append(f"Wipe {values['id']}: {e}")
+
+        try:
+            with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                for start in range(0, len(ids), ReportArchive.LOAD_CHUNK_SIZE):
+                    for values in ReportArchive._load(ids[start:start + ReportArchive.LOAD_CHUNK_SIZE]):
+                        while len(pending) >= max_pending:
+                            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                            collect(archive, done)
+                            yield output.drain()
+                        pending[executor.submit(_render_reports, values, formats)] = values
+                    # Lese-Transaktion nicht über die gesamte Renderzeit offen halten
+                    db.session.commit()
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(archive, done)
+                    yield output.drain()
+
+                if errors:
+                    archive.writestr('errors.txt', '\n'.join(errors))
+
+            yield output.drain()
+        except BrokenProcessPool:
+            # Worker abgestürzt (z.B. Speichermangel) beim Einreichen, der nächste Export startet einen neuen Pool
+            ReportArchive._discard(executor)
+            raise
+        finally:
+            # Download abgebrochen: noch nicht gestartete Reports verwerfen
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,173 @@
+import hashlib
+import os
+import tempfile
+import threading
+from datetime import datetime
+from flask import current_app
+from app.models import WipeLog
+from app.utils.audit_ledger import AuditLedger
+from app.utils.report_generator import ReportGenerator
+from app.utils.single_flight import SingleFlight
+
+
+class ReportCache:
+    """
+    Dateicache für Reports abgeschlossener Wipes (PDF, HTML)
+
+    Abgeschlossene Wipes ändern sich nicht mehr, ihr Report wird deshalb einmal
+    gerendert und als Datei abgelegt. Der Dateiname enthält einen Hash über alle
+    Spalten des WipeLogs, den Stand im Audit-Ledger, das Format und RENDER_VERSION:
+    ändert sich der Inhalt (oder das Layout), entsteht ein neuer Eintrag, der
+    alte altert heraus. Der Hash dient zugleich als ETag. Die Gesamtgröße ist
+    auf REPORT_CACHE_MAX_BYTES begrenzt, verdrängt werden die am längsten nicht
+    genutzten Dateien (mtime wird bei jedem Treffer aktualisiert).
+    """
+
+    FORMATS = {
+        'pdf': 'application/pdf',
+        'html': 'text/html',
+    }
+    CACHEABLE_STATUSES = ('completed', 'failed')
+
+    # Erhöhen, wenn sich das Layout der Reports ändert (macht alle Einträge ungültig)
+    RENDER_VERSION = 6
+
+    # Nach dem Verdrängen bleibt etwas Luft, damit nicht jeder Eintrag erneut aufräumt
+    EVICT_TARGET = 0.9
+
+    _size = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def enabled():
+        return current_app.config['REPORT_CACHE_MAX_BYTES'] > 0
+
+    @staticmethod
+    def cacheable(wipe_log, report_format):
+        return (ReportCache.enabled() and report_format in ReportCache.FORMATS
+                and wipe_log.status in ReportCache.CACHEABLE_STATUSES)
+
+    @staticmethod
+    def digest(wipe_log, report_format):
+        """Inhalts-Hash des WipeLogs (alle Spalten) für das Format, dient auch als ETag"""
+        content = hashlib.sha256(f'{report_format}:{ReportCache.RENDER_VERSION}'.encode('utf-8'))
+        for column in WipeLog.__table__.columns:
+            value = getattr(wipe_log, column.key)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            content.update(f'\x1f{column.key}={value!r}'.encode('utf-8'))
+        # Der Nachweis im Report ändert sich mit dem Ledger-Eintrag und seinem Checkpoint
+        content.update(f'\x1faudit={AuditLedger.state(wipe_log.id)!r}'.encode('utf-8'))
+        return content.hexdigest()
+
+    @staticmethod
+    def path(wipe_log, report_format, digest):
+        return os.path.join(current_app.config['REPORT_CACHE_DIR'], f'{wipe_log.id}-{digest[:32]}.{report_format}')
+
+    @staticmethod
+    def fetch(wipe_log, report_format):
+        """
+        Gibt (Pfad, ETag) des Reports zurück, rendert und speichert ihn bei Bedarf
+        Gleichzeitige Anfragen für denselben Report rendern nur einmal
+        """
+        digest = ReportCache.digest(wipe_log, report_format)
+        path = ReportCache.path(wipe_log, report_format, digest)
+
+        try:
+            # Treffer: als zuletzt genutzt markieren
+            os.utime(path)
+        except FileNotFoundError:
+            SingleFlight.do(('report', path), ReportCache._render, wipe_log, report_format, path)
+
+        return path, digest
+
+    @staticmethod
+    def prerender(wipe_log, formats=None):
+        """Legt die Reports eines gerade abgeschlossenen Wipes im Voraus an (Fehler werden nur protokolliert)"""
+        try:
+            for report_format in formats or current_app.config['REPORT_CACHE_PRERENDER']:
+                if ReportCache.cacheable(wipe_log, report_format):
+                    ReportCache.fetch(wipe_log, report_format)
+        except Exception as e:
+            print(f"Report für Wipe {wipe_log.id} konnte nicht vorab erstellt werden: {e}")
+
+    @staticmethod
+    def _render(wipe_log, report_format, path):
+        if report_format == 'pdf':
+            chunks = [ReportGenerator.generate_pdf_report(wipe_log).getvalue()]
+        else:
+            # Eigenständige Datei: Rohdaten eingebettet (zugeklappt), stückweise geschrieben
+            chunks = (chunk.encode('utf-8') for chunk in ReportGenerator.stream_html_report(wipe_log))
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Erst vollständig schreiben, dann umbenennen: Leser sehen nie halbe Dateien
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                size = file.tell()
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        ReportCache._added(size)
+
+    @staticmethod
+    def _entries(directory):
+        """(mtime, Größe, Pfad) aller Cache-Dateien"""
+        entries = []
+        with os.scandir(directory) as iterator:
+            for entry in iterator:
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    @staticmethod
+    def _added(size):
+        """Führt die Gesamtgröße nach und verdrängt bei Überschreitung die ältesten Einträge"""
+        max_bytes = current_app.config['REPORT_CACHE_MAX_BYTES']
+        directory = current_app.config['REPORT_CACHE_DIR']
+
+        with ReportCache._lock:
+            if ReportCache._size is None:
+                ReportCache._size = sum(entry[1] for entry in ReportCache._entries(directory))
+            else:
+                ReportCache._size += size
+
+            if ReportCache._size <= max_bytes:
+                return
+
+            entries = sorted(ReportCache._entries(directory))
+            total = sum(entry[1] for entry in entries)
+            for _, entry_size, entry_path in entries:
+                if total <= max_bytes * ReportCache.EVICT_TARGET:
+                    break
+                try:
+                    os.remove(entry_path)
+                    total -= entry_size
+                except FileNotFoundError:
+                    pass
+            ReportCache._size = total
+
+    @staticmethod
+    def clear():
+        """Löscht alle Einträge, Returns: Anzahl gelöschter Dateien"""
+        directory = current_app.config['REPORT_CACHE_DIR']
+        if not os.path.isdir(directory):
+            return 0
+
+        removed = 0
+        with ReportCache._lock:
+            for _, _, entry_path in ReportCache._entries(directory):
+                try:
+                    os.remove(entry_path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            ReportCache._size = 0
+        return removed
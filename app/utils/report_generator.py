@@ -1,18 +1,38 @@
 from datetime import datetime, timezone
 import json
-import io
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+import threading
+from flask import has_app_context
+from jinja2 import Environment, PackageLoader
+from app.utils.smart_diff import SmartDiff
+from app.utils.audit_ledger import AuditLedger
+from app.utils.smart_store import SmartStore
 
 
 class ReportGenerator:
     """Generiert Reports für Wipe-Vorgänge"""
 
+    HTML_TEMPLATE = 'wipe_report.html'
+
+    # Anzahl Template-Stücke pro gestreamtem Block
+    STREAM_BUFFER = 64
+
+    # Abschnitte der SMART-Rohausgaben (Phase, Bezeichnung)
+    RAW_SECTIONS = (
+        ('before', 'vor Wipe'),
+        ('after', 'nach Wipe'),
+    )
+
+    # Status-Badge-Farbe
+    STATUS_COLORS = {
+        'completed': 'green',
+        'failed': 'red',
+        'in_progress': 'blue',
+        'pending': 'gray'
+    }
+
+    _environment = None
+    _lock = threading.Lock()
+
     @staticmethod
     def generate_wipe_report(wipe_log):
         """Erstellt einen detaillierten Report für einen Wipe-Vorgang"""
@@ -58,621 +78,189 @@ class ReportGenerator:
             except:
                 report['smart_data_after_wipe'] = wipe_log.smart_data_after
         
+        # smartctl-Rohausgaben (aus smart_raw_blobs)
+        for phase, raw in ReportGenerator._smart_raw(wipe_log).items():
+            if raw:
+                report[f'smart_raw_{phase}_wipe'] = ReportGenerator._parse_raw(raw)
+        
+        # Beim Abschluss gespeicherter Vergleich vor/nach
+        changes = SmartDiff.for_wipe(wipe_log)
+        if changes is not None:
+            report['smart_changes'] = {
+                'count': len(changes),
+                'severity': SmartDiff.severity_of(changes),
+                'changes': changes
+            }
+        
         # Fehler hinzufügen falls vorhanden
         if wipe_log.error_message:
             report['error'] = wipe_log.error_message
         
+        # Nachweis aus dem Audit-Ledger (offline prüfbar, siehe AuditLedger.verify_report)
+        proof = ReportGenerator._audit_proof(wipe_log)
+        if proof:
+            report['audit'] = proof
+        
         return report
 
     @staticmethod
     def generate_pdf_report(wipe_log):
-        """Erstellt einen PDF-Report für einen Wipe-Vorgang mit ReportLab"""
-        pdf_file = io.BytesIO()
-        
-        # PDF-Dokument erstellen
-        doc = SimpleDocTemplate(
-            pdf_file,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=30,
-            alignment=1  # Center
-        )
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=12,
-            borderColor=colors.HexColor('#e5e7eb'),
-            borderWidth=0,
-            borderPadding=5
+        """Erstellt einen PDF-Report für einen Wipe-Vorgang mit ReportLab (siehe PdfReportEngine)"""
+        # Erst hier importieren, die Engine nutzt die Formatierungen dieser Klasse
+        from app.utils.pdf_report_engine import PdfReportEngine
+        return PdfReportEngine.render(wipe_log)
+
+    @staticmethod
+    def environment():
+        """Jinja-Umgebung der Reports, einmal pro Prozess angelegt (auch ohne Flask-App, z.B. in Worker-Prozessen)"""
+        if ReportGenerator._environment is None:
+            with ReportGenerator._lock:
+                if ReportGenerator._environment is None:
+                    environment = Environment(
+                        loader=PackageLoader('app', 'templates/reports'),
+                        autoescape=True,
+                        trim_blocks=True,
+                        lstrip_blocks=True,
+                        # Templates werden einmal kompiliert, keine Prüfung auf Änderungen pro Aufruf
+                        auto_reload=False
+                    )
+                    environment.filters.update(
+                        format_datetime=ReportGenerator._format_datetime,
+                        format_size=ReportGenerator._format_size,
+                        format_duration=ReportGenerator._format_duration,
+                        json_chunks=ReportGenerator._json_chunks
+                    )
+                    environment.get_template(ReportGenerator.HTML_TEMPLATE)
+                    ReportGenerator._environment = environment
+        return ReportGenerator._environment
+
+    @staticmethod
+    def stream_html_report(wipe_log, for_pdf=False, raw_data_url=None):
+        """
+        Rendert den HTML-Report stückweise (Generator von Strings)
+
+        raw_data_url: URL der Rohausgaben (/api/wipes/<id>/smart/raw), die smartctl-Ausgaben
+        werden dann erst beim Aufklappen nachgeladen statt in den Report eingebettet
+        """
+        smart_before = ReportGenerator._parse_smart(wipe_log.smart_data_before)
+        smart_after = ReportGenerator._parse_smart(wipe_log.smart_data_after)
+        changes = SmartDiff.for_wipe(wipe_log)
+
+        if raw_data_url:
+            phases = SmartStore.raw_phases(wipe_log.id)
+            raw_sections = [(phase, label, None) for phase, label in ReportGenerator.RAW_SECTIONS if phase in phases]
+        else:
+            raw = ReportGenerator._smart_raw(wipe_log)
+            raw_sections = [(phase, label, ReportGenerator._parse_raw(raw[phase]))
+                            for phase, label in ReportGenerator.RAW_SECTIONS if raw.get(phase)]
+
+        template = ReportGenerator.environment().get_template(ReportGenerator.HTML_TEMPLATE)
+        stream = template.stream(
+            wipe_log=wipe_log,
+            for_pdf=for_pdf,
+            raw_data_url=raw_data_url,
+            status_color=ReportGenerator.STATUS_COLORS.get(wipe_log.status, 'gray'),
+            generated_at=datetime.now(),
+            smart_before=smart_before,
+            smart_after=smart_after,
+            smart_changes=changes,
+            smart_severity=SmartDiff.severity_of(changes),
+            smart_severity_label=SmartDiff.SEVERITY_LABELS[SmartDiff.severity_of(changes)],
+            smart_rows=ReportGenerator._smart_rows(smart_before, smart_after, changes or {}),
+            raw_sections=raw_sections,
+            audit_proof=ReportGenerator._audit_proof(wipe_log)
         )
-        
-        # Story (Inhalt des PDFs)
-        story = []
-        
-        # Titel
-        story.append(Paragraph('Disk Wipe Report', title_style))
-        story.append(Spacer(1, 0.5*cm))
-        
-        # Generierungsdatum und Status
-        status_color = {
-            'completed': colors.green,
-            'failed': colors.red,
-            'in_progress': colors.blue,
-            'pending': colors.grey
-        }.get(wipe_log.status, colors.grey)
-        
-        info_data = [
-            ['Generiert am:', ReportGenerator._format_datetime(datetime.now())],
-            ['Status:', wipe_log.status.upper()],
-        ]
-        info_table = Table(info_data, colWidths=[4*cm, 12*cm])
-        info_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('TEXTCOLOR', (1, 1), (1, 1), status_color),
-            ('FONTNAME', (1, 1), (1, 1), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        story.append(info_table)
-        story.append(Spacer(1, 0.8*cm))
-        
-        # Festplatten-Informationen
-        story.append(Paragraph('Festplatten-Informationen', heading_style))
-        disk_data = [
-            ['Modell:', wipe_log.model or 'N/A'],
-            ['Seriennummer:', wipe_log.serial_number],
-            ['Device Path:', wipe_log.device_path],
-            ['Größe:', ReportGenerator._format_size(wipe_log.size_bytes) if wipe_log.size_bytes else 'N/A'],
-        ]
-        disk_table = Table(disk_data, colWidths=[4*cm, 12*cm])
-        disk_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#4b5563')),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f9fafb')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
-        ]))
-        story.append(disk_table)
-        story.append(Spacer(1, 0.8*cm))
-        
-        # Wipe-Vorgang
-        story.append(Paragraph('Wipe-Vorgang', heading_style))
-        wipe_data = [
-            ['Methode:', wipe_log.wipe_method],
-            ['Anzahl Pässe:', str(wipe_log.wipe_passes)],
-            ['Startzeit:', ReportGenerator._format_datetime(wipe_log.start_time)],
-            ['Endzeit:', ReportGenerator._format_datetime(wipe_log.end_time)],
-            ['Dauer:', ReportGenerator._format_duration(wipe_log.duration_seconds) if wipe_log.duration_seconds else 'N/A'],
-            ['Verifiziert:', '✓ Ja' if wipe_log.verified else '✗ Nein'],
-        ]
-        wipe_table = Table(wipe_data, colWidths=[4*cm, 12*cm])
-        wipe_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#4b5563')),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f9fafb')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
-            ('TEXTCOLOR', (1, 5), (1, 5), colors.green if wipe_log.verified else colors.grey),
-        ]))
-        story.append(wipe_table)
-        
-        # Fehler falls vorhanden
-        if wipe_log.error_message:
-            story.append(Spacer(1, 0.8*cm))
-            story.append(Paragraph('Fehler', heading_style))
-            error_para = Paragraph(f'<para textColor="red">{wipe_log.error_message}</para>', styles['Normal'])
-            story.append(error_para)
-        
-        # SMART-Daten auf neuer Seite
-        if wipe_log.smart_data_before or wipe_log.smart_data_after:
-            story.append(PageBreak())
-            story.append(Paragraph('SMART-Daten Vergleich', heading_style))
-            story.append(Spacer(1, 0.5*cm))
-            
-            # Parse SMART-Daten
-            smart_before = None
-            smart_after = None
-            
-            try:
-                if wipe_log.smart_data_before:
-                    smart_before = json.loads(wipe_log.smart_data_before)
-            except:
-                pass
-            
-            try:
-                if wipe_log.smart_data_after:
-                    smart_after = json.loads(wipe_log.smart_data_after)
-            except:
-                pass
-            
-            # SMART-Tabelle erstellen
-            smart_table_data = [['Attribut', 'Vor Wipe', 'Nach Wipe']]
-            
-            # Wichtige SMART-Attribute
-            attributes_to_show = [
-                ('model', 'Modell'),
-                ('serial', 'Seriennummer'),
-                ('smart_status', 'SMART Status'),
-                ('health_status', 'Gesundheit'),
-                ('power_on_hours', 'Betriebsstunden'),
-                ('power_cycle_count', 'Power Cycles'),
-                ('temperature', 'Temperatur'),
-            ]
-            
-            for key, label in attributes_to_show:
-                value_before = smart_before.get(key) if smart_before else 'N/A'
-                value_after = smart_after.get(key) if smart_after else 'N/A'
-                
-                if value_before == 'N/A' and value_after == 'N/A':
-                    continue
-                
-                smart_table_data.append([
-                    label,
-                    str(value_before) if value_before else 'N/A',
-                    str(value_after) if value_after else 'N/A'
-                ])
-            
-            if len(smart_table_data) > 1:
-                smart_table = Table(smart_table_data, colWidths=[5*cm, 5.5*cm, 5.5*cm])
-                smart_table.setStyle(TableStyle([
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f9fafb')),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                    ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ]))
-                story.append(smart_table)
-        
-        # Footer
-        story.append(Spacer(1, 1*cm))
-        footer_text = f'Dieser Report wurde automatisch vom Disk Wiper Tool generiert. | Report ID: {wipe_log.id}'
-        footer_para = Paragraph(f'<para alignment="center" fontSize="8" textColor="#6b7280">{footer_text}</para>', styles['Normal'])
-        story.append(footer_para)
-        
-        # PDF bauen
-        doc.build(story)
-        pdf_file.seek(0)
-        
-        return pdf_file
+        # Kleine Template-Stücke zu größeren Blöcken zusammenfassen
+        stream.enable_buffering(ReportGenerator.STREAM_BUFFER)
+        return stream
 
     @staticmethod
-    def generate_html_report(wipe_log, for_pdf=False):
+    def generate_html_report(wipe_log, for_pdf=False, raw_data_url=None):
         """Erstellt einen HTML-Report für einen Wipe-Vorgang"""
-        
-        report_data = ReportGenerator.generate_wipe_report(wipe_log)
-        
-        # Status-Badge-Farbe
-        status_color = {
-            'completed': 'green',
-            'failed': 'red',
-            'in_progress': 'blue',
-            'pending': 'gray'
-        }.get(wipe_log.status, 'gray')
-        
-        html = f"""
-<!DOCTYPE html>
-<html lang="de">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Disk Wipe Report - {wipe_log.serial_number}</title>
-    <style>
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            max-width: 900px;
-            margin: 40px auto;
-            padding: 20px;
-            background-color: #f5f5f5;
-        }}
-        .report-container {{
-            background: white;
-            border-radius: 8px;
-            padding: 30px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        .header {{
-            border-bottom: 3px solid #2563eb;
-            padding-bottom: 20px;
-            margin-bottom: 30px;
-        }}
-        .header h1 {{
-            margin: 0 0 10px 0;
-            color: #1e40af;
-        }}
-        .header p {{
-            color: #4b5563;
-            font-size: 15px;
-            margin: 8px 0;
-        }}
-        .status-badge {{
-            display: inline-block;
-            padding: 6px 16px;
-            border-radius: 20px;
-            font-weight: bold;
-            text-transform: uppercase;
-            font-size: 14px;
-            background-color: {status_color};
-            color: white;
-        }}
-        .section {{
-            margin-bottom: 30px;
-        }}
-        .section-title {{
-            font-size: 20px;
-            font-weight: bold;
-            color: #1e40af;
-            margin-bottom: 15px;
-            border-bottom: 2px solid #e5e7eb;
-            padding-bottom: 8px;
-        }}
-        .info-grid {{
-            display: grid;
-            grid-template-columns: 200px 1fr;
-            gap: 12px;
-            line-height: 1.8;
-        }}
-        .info-label {{
-            font-weight: bold;
-            color: #4b5563;
-        }}
-        .info-value {{
-            color: #1f2937;
-        }}
-        .datetime-value {{
-            color: #1f2937;
-            font-family: 'Courier New', monospace;
-            font-weight: 500;
-            background: #f3f4f6;
-            padding: 2px 8px;
-            border-radius: 4px;
-        }}
-        .success {{
-            color: green;
-            font-weight: bold;
-        }}
-        .error {{
-            color: red;
-            font-weight: bold;
-            background-color: #fee;
-            padding: 15px;
-            border-radius: 6px;
-            border-left: 4px solid red;
-        }}
-        .footer {{
-            margin-top: 40px;
-            padding-top: 20px;
-            border-top: 2px solid #e5e7eb;
-            color: #6b7280;
-            font-size: 14px;
-            text-align: center;
-        }}
-        .smart-data {{
-            background: #f9fafb;
-            padding: 15px;
-            border-radius: 6px;
-            border: 1px solid #e5e7eb;
-            max-height: 400px;
-            overflow-y: auto;
-        }}
-        .smart-table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin-bottom: 20px;
-            background: white;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        }}
-        .smart-table th {{
-            background: #2563eb;
-            color: white;
-            padding: 12px;
-            text-align: left;
-            font-weight: bold;
-        }}
-        .smart-table td {{
-            padding: 10px 12px;
-            border-bottom: 1px solid #e5e7eb;
-        }}
-        .smart-table tr:hover {{
-            background: #f9fafb;
-        }}
-        .smart-table .attr-name {{
-            font-weight: 600;
-            color: #374151;
-        }}
-        .smart-value-changed {{
-            background: #fef3c7;
-            font-weight: bold;
-        }}
-        .smart-value-improved {{
-            color: #059669;
-        }}
-        .smart-value-degraded {{
-            color: #dc2626;
-        }}
-        details {{
-            margin-top: 15px;
-            border: 1px solid #e5e7eb;
-            border-radius: 6px;
-            padding: 10px;
-            background: #f9fafb;
-        }}
-        summary {{
-            cursor: pointer;
-            font-weight: bold;
-            color: #2563eb;
-            padding: 8px;
-            user-select: none;
-        }}
-        summary:hover {{
-            background: #eff6ff;
-            border-radius: 4px;
-        }}
-        details[open] summary {{
-            margin-bottom: 15px;
-            border-bottom: 2px solid #e5e7eb;
-        }}
-        .raw-data {{
-            background: #1f2937;
-            color: #f3f4f6;
-            padding: 15px;
-            border-radius: 6px;
-            overflow-x: auto;
-            font-family: 'Courier New', monospace;
-            font-size: 13px;
-            line-height: 1.5;
-        }}
-        {f'''
-        /* PDF-spezifische Styles */
-        .smart-section {{
-            page-break-before: always;
-            break-before: page;
-        }}
-        @media print {{
-            .smart-section {{
-                page-break-before: always;
-            }}
-        }}
-        ''' if for_pdf else ''}
-    </style>
-</head>
-<body>
-    <div class="report-container">
-        <div class="header">
-            <h1>🗑️ Disk Wipe Report</h1>
-            <p><strong>Generiert am:</strong> {ReportGenerator._format_datetime(datetime.now())}</p>
-            <div class="status-badge">{wipe_log.status}</div>
-        </div>
-        
-        <div class="section">
-            <div class="section-title">Festplatten-Informationen</div>
-            <div class="info-grid">
-                <div class="info-label">Modell:</div>
-                <div class="info-value">{wipe_log.model or 'N/A'}</div>
-                
-                <div class="info-label">Seriennummer:</div>
-                <div class="info-value">{wipe_log.serial_number}</div>
-                
-                <div class="info-label">Device Path:</div>
-                <div class="info-value">{wipe_log.device_path}</div>
-                
-                <div class="info-label">Größe:</div>
-                <div class="info-value">{report_data['wipe_information']['size_human']}</div>
-            </div>
-        </div>
-        
-        <div class="section">
-            <div class="section-title">Wipe-Vorgang</div>
-            <div class="info-grid">
-                <div class="info-label">Methode:</div>
-                <div class="info-value">{wipe_log.wipe_method}</div>
-                
-                <div class="info-label">Anzahl Pässe:</div>
-                <div class="info-value">{wipe_log.wipe_passes}</div>
-                
-                <div class="info-label">Startzeit:</div>
-                <div class="datetime-value">{ReportGenerator._format_datetime(wipe_log.start_time)}</div>
-                
-                <div class="info-label">Endzeit:</div>
-                <div class="datetime-value">{ReportGenerator._format_datetime(wipe_log.end_time)}</div>
-                
-                <div class="info-label">Dauer:</div>
-                <div class="info-value">{report_data['timing']['duration_human']}</div>
-                
-                <div class="info-label">Verifiziert:</div>
-                <div class="info-value {'success' if wipe_log.verified else ''}">
-                    {'✓ Ja' if wipe_log.verified else '✗ Nein'}
-                </div>
-            </div>
-        </div>
-        
-        {'<div class="section"><div class="section-title">Fehler</div><div class="error">' + wipe_log.error_message + '</div></div>' if wipe_log.error_message else ''}
-        
-        {ReportGenerator._generate_smart_comparison_section(wipe_log.smart_data_before, wipe_log.smart_data_after) if (wipe_log.smart_data_before or wipe_log.smart_data_after) else ''}
-        
-        <div class="footer">
-            <p>Dieser Report wurde automatisch vom Disk Wiper Tool generiert.</p>
-            <p>Report ID: {wipe_log.id}</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-        
-        return html
+        return ''.join(ReportGenerator.stream_html_report(wipe_log, for_pdf, raw_data_url))
 
     @staticmethod
-    def _generate_smart_comparison_section(smart_data_before_str, smart_data_after_str):
-        """Generiert HTML-Abschnitt mit SMART-Daten-Vergleich"""
-        if not smart_data_before_str and not smart_data_after_str:
-            return ''
-        
-        # Parse SMART-Daten
-        smart_before = None
-        smart_after = None
-        
+    def _audit_proof(wipe_log):
+        """Audit-Nachweis des Wipes: vorab geladen (wipe_log.audit_proof) oder aus dem Ledger, None ohne Eintrag"""
+        proof = getattr(wipe_log, 'audit_proof', None)
+        if proof is not None:
+            return proof or None
+        if has_app_context() and wipe_log.id is not None:
+            return AuditLedger.proof(wipe_log.id)
+        return None
+
+    @staticmethod
+    def _smart_raw(wipe_log):
+        """smartctl-Rohausgaben {phase: Text}: vorab geladen (wipe_log.smart_raw) oder aus den Snapshots des Wipes"""
+        raw = getattr(wipe_log, 'smart_raw', None)
+        if raw is not None:
+            return raw
+        if has_app_context() and wipe_log.id is not None:
+            return SmartStore.load_wipe_raw([wipe_log.id]).get(wipe_log.id, {})
+        return {}
+
+    @staticmethod
+    def _parse_raw(raw):
+        """Rohausgabe als JSON-Struktur (smartctl -j), sonst unverändert als Text"""
         try:
-            if smart_data_before_str:
-                smart_before = json.loads(smart_data_before_str)
-        except:
-            smart_before = {'raw': smart_data_before_str}
-        
+            return json.loads(raw)
+        except ValueError:
+            return raw
+
+    @staticmethod
+    def _parse_smart(smart_data_str):
+        """SMART-JSON des WipeLogs als dict, nicht lesbare Daten als {'raw': ...}"""
+        if not smart_data_str:
+            return None
         try:
-            if smart_data_after_str:
-                smart_after = json.loads(smart_data_after_str)
+            return json.loads(smart_data_str)
         except:
-            smart_after = {'raw': smart_data_after_str}
-        
-        # Generiere Tabellen-HTML
-        table_html = ReportGenerator._generate_smart_table(smart_before, smart_after)
-        
-        # Generiere Rohdaten-HTML (ausklappbar)
-        raw_data_html = ReportGenerator._generate_raw_smart_data(smart_before, smart_after)
-        
-        return f"""
-        <div class="section smart-section">
-            <div class="section-title">📊 SMART-Daten Vergleich</div>
-            {table_html}
-            {raw_data_html}
-        </div>
-        """
-    
+            return {'raw': smart_data_str}
+
     @staticmethod
-    def _generate_smart_table(smart_before, smart_after):
-        """Generiert eine Vergleichstabelle für SMART-Werte"""
+    def _smart_rows(smart_before, smart_after, changes):
+        """Zeilen der SMART-Vergleichstabelle: dicts mit label, before, after, changed (aus SmartDiff)"""
         if not smart_before and not smart_after:
-            return '<p>Keine SMART-Daten verfügbar.</p>'
-        
-        # Wichtige SMART-Attribute zum Anzeigen
-        attributes_to_show = [
-            ('model', 'Modell'),
-            ('serial', 'Seriennummer'),
-            ('smart_status', 'SMART Status'),
-            ('health_status', 'Gesundheitsstatus'),
-            ('power_on_hours', 'Betriebsstunden'),
-            ('power_cycle_count', 'Power Cycle Count'),
-            ('temperature', 'Temperatur (°C)'),
-            ('wear', 'Abnutzung'),
-            ('read_errors', 'Lesefehler'),
-            ('write_errors', 'Schreibfehler'),
-        ]
-        
+            return []
+
         rows = []
-        for key, label in attributes_to_show:
+        for key, label in SmartDiff.FIELDS:
             value_before = smart_before.get(key) if smart_before else None
             value_after = smart_after.get(key) if smart_after else None
-            
+
             # Überspringe Zeilen wo beide Werte None/leer sind
             if value_before is None and value_after is None:
                 continue
-            
-            # Formatiere Werte
-            value_before_str = ReportGenerator._format_smart_value(value_before)
-            value_after_str = ReportGenerator._format_smart_value(value_after)
-            
-            # Prüfe ob Wert sich geändert hat
-            changed = value_before != value_after and value_before is not None and value_after is not None
-            changed_class = 'smart-value-changed' if changed else ''
-            
-            rows.append(f"""
-                <tr>
-                    <td class="attr-name">{label}</td>
-                    <td>{value_before_str}</td>
-                    <td class="{changed_class}">{value_after_str}</td>
-                </tr>
-            """)
-        
+
+            rows.append({
+                'label': label,
+                'before': ReportGenerator._format_smart_value(value_before),
+                'after': ReportGenerator._format_smart_value(value_after),
+                'changed': key in changes,
+            })
+
         # Wenn wir SMART-Attribute haben (z.B. von Linux), zeige diese auch
         if smart_before and 'attributes' in smart_before:
+            attributes_after = (smart_after or {}).get('attributes', {})
             for attr_name, attr_data in smart_before.get('attributes', {}).items():
                 value_before = attr_data.get('raw', attr_data.get('value', 'N/A'))
-                
-                value_after = 'N/A'
-                if smart_after and 'attributes' in smart_after:
-                    attr_after = smart_after.get('attributes', {}).get(attr_name, {})
-                    value_after = attr_after.get('raw', attr_after.get('value', 'N/A'))
-                
-                changed = value_before != value_after and value_before != 'N/A' and value_after != 'N/A'
-                changed_class = 'smart-value-changed' if changed else ''
-                
-                rows.append(f"""
-                    <tr>
-                        <td class="attr-name">{attr_name}</td>
-                        <td>{value_before}</td>
-                        <td class="{changed_class}">{value_after}</td>
-                    </tr>
-                """)
-        
-        if not rows:
-            return '<p>Keine vergleichbaren SMART-Daten verfügbar.</p>'
-        
-        return f"""
-        <table class="smart-table">
-            <thead>
-                <tr>
-                    <th>Attribut</th>
-                    <th>Vor Wipe</th>
-                    <th>Nach Wipe</th>
-                </tr>
-            </thead>
-            <tbody>
-                {''.join(rows)}
-            </tbody>
-        </table>
-        """
-    
+                attr_after = attributes_after.get(attr_name, {})
+                value_after = attr_after.get('raw', attr_after.get('value', 'N/A'))
+
+                rows.append({
+                    'label': attr_name,
+                    'before': value_before,
+                    'after': value_after,
+                    'changed': f'attr.{attr_name}' in changes,
+                })
+
+        return rows
+
     @staticmethod
-    def _generate_raw_smart_data(smart_before, smart_after):
-        """Generiert ausklappbaren Bereich für Roh-SMART-Daten"""
-        sections = []
-        
-        if smart_before:
-            raw_before = json.dumps(smart_before, indent=2, ensure_ascii=False)
-            sections.append(f"""
-            <details>
-                <summary>🔍 Rohdaten vor Wipe anzeigen</summary>
-                <div class="raw-data">
-                    <pre>{raw_before}</pre>
-                </div>
-            </details>
-            """)
-        
-        if smart_after:
-            raw_after = json.dumps(smart_after, indent=2, ensure_ascii=False)
-            sections.append(f"""
-            <details>
-                <summary>🔍 Rohdaten nach Wipe anzeigen</summary>
-                <div class="raw-data">
-                    <pre>{raw_after}</pre>
-                </div>
-            </details>
-            """)
-        
-        return ''.join(sections)
-    
+    def _json_chunks(data):
+        """Eingerückte JSON-Ausgabe stückweise, die Rohdaten werden nie als ganzer String aufgebaut"""
+        return json.JSONEncoder(indent=2, ensure_ascii=False).iterencode(data)
+
     @staticmethod
     def _format_smart_value(value):
         """Formatiert einen SMART-Wert für die Anzeige"""
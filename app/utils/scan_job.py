@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from flask import render_template
+from app import db
+from app.utils.disk_manager import DiskManager
+from app.utils.disk_inventory import DiskInventory
+from app.utils.event_bus import EventBus
+from app.utils.smart_reader import SmartReader
+from app.utils.smart_cache import SmartCache
+from app.utils.smart_store import SmartStore
+from app.utils.smart_history import SmartHistory
+from app.utils.wipe_archive import WipeArchive
+from app.utils.audit_ledger import AuditLedger
+
+
+class ScanJob:
+    """
+    Festplatten-Scan als Hintergrund-Job
+
+    Nach der Aufzählung wird sofort jede Disk-Karte per EventBus verschickt,
+    SMART-Ergebnisse folgen einzeln sobald sie vorliegen ('disk-updated').
+    Zum Abschluss wird 'scan-complete' gesendet.
+    """
+
+    _thread = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def start(app, force=False):
+        """
+        Startet einen Scan, sofern nicht bereits einer läuft
+        Returns: True wenn ein neuer Scan gestartet wurde
+        """
+        with ScanJob._lock:
+            if ScanJob._thread and ScanJob._thread.is_alive():
+                return False
+
+            ScanJob._thread = threading.Thread(
+                target=ScanJob._run,
+                args=(app, force),
+                name='disk-scan',
+                daemon=True
+            )
+            ScanJob._thread.start()
+            return True
+
+    @staticmethod
+    def is_running():
+        thread = ScanJob._thread
+        return bool(thread and thread.is_alive())
+
+    @staticmethod
+    def _run(app, force):
+        started = time.monotonic()
+
+        with app.app_context():
+            try:
+                EventBus.publish('scan-started', '')
+
+                disks = DiskManager.get_all_disks()
+                DiskInventory.replace(disks)
+
+                # Eine Abfrage + Sammel-Insert/-Update für alle gefundenen Disks
+                updated_disks = DiskInventory.upsert_many(disks)
+                pending = {}
+                for disk_info, disk in zip(disks, updated_disks):
+                    # Frische Daten aus dem Cache übernehmen, nur der Rest wird mit smartctl gelesen
+                    cached = None if force else SmartCache.get(disk.device_path, disk.serial_number)
+                    if cached is not None:
+                        # Bereits als Snapshot gespeichert, nur eine geänderte Zusammenfassung schreiben
+                        smart_json = SmartStore.to_json(cached)
+                        if disk.smart_data != smart_json:
+                            disk.smart_data = smart_json
+                            disk.smart_status = cached.get('smart_status', 'UNKNOWN')
+                    else:
+                        pending[disk_info['device_path']] = disk
+
+                db.session.commit()
+
+                # Karten sofort verschicken, SMART-Status wird nachgereicht
+                for disk in updated_disks:
+                    EventBus.publish('disk-updated', render_template('partials/disk_card.html', disk=disk))
+
+                # SMART-Daten parallel auslesen (Deadline pro Gerät), Ergebnisse in Fertigstellungsreihenfolge übernehmen
+                for device_path, smart_data in SmartReader.iter_smart_data(
+                        pending.keys(),
+                        timeout=app.config['SMART_TIMEOUT'],
+                        max_workers=app.config['SMART_MAX_WORKERS']):
+                    disk = pending[device_path]
+                    SmartCache.put(device_path, disk.serial_number, smart_data)
+                    if 'error' not in smart_data:
+                        SmartStore.save(disk, smart_data)
+                    elif smart_data.get('timed_out'):
+                        # Fehler beim Auslesen der SMART-Daten nicht kritisch
+                        disk.smart_status = 'TIMEOUT'
+                        print(f"SMART-Timeout für {device_path}: {smart_data['error']}")
+                    else:
+                        continue
+
+                    db.session.commit()
+                    EventBus.publish('disk-updated', render_template('partials/disk_card.html', disk=disk))
+
+                # Durch ersetzte Scan-Snapshots verwaiste Rohdaten entfernen
+                SmartStore.prune_blobs()
+                db.session.commit()
+                SmartHistory.maybe_compact(app)
+                WipeArchive.maybe_run(app)
+                AuditLedger.maybe_checkpoint(app)
+
+                EventBus.publish('scan-complete', json.dumps({
+                    'success': True,
+                    'count': len(disks),
+                    'duration': round(time.monotonic() - started, 2)
+                }))
+
+            except Exception as e:
+                db.session.rollback()
+                print(f"Fehler beim Festplatten-Scan: {e}")
+                EventBus.publish('scan-complete', json.dumps({'success': False, 'error': str(e)}))
+
+            finally:
+                db.session.remove()
@@ -0,0 +1,192 @@
+from sqlalchemy import text
+from app import db
+from app.models import Disk, WipeLog
+
+
+class SearchIndex:
+    """
+    Volltextsuche über Seriennummer, Modell, Device Path (und Fehlertext bei Wipes)
+
+    Nutzt SQLite-FTS5-Tabellen mit Trigram-Tokenizer als External-Content-Index
+    auf disks, wipe_logs und dem Archivkatalog archived_wipes, Trigger halten
+    sie synchron. Teilstring-Treffer ab
+    drei Zeichen kommen aus dem Index: die jüngsten CANDIDATE_FACTOR * limit
+    Treffer werden gerankt (passender Anfang der Seriennummer zuerst, dann bm25),
+    damit sehr allgemeine Begriffe nicht alle Treffer bewerten müssen. Kürzere
+    Begriffe suchen den Anfang von Seriennummer, Modell bzw. Device Path ohne
+    Beachtung der Groß-/Kleinschreibung (Bereich auf NOCASE-Indizes), ohne
+    FTS5/Trigram (ältere SQLite-Versionen, andere Datenbanken) wird mit LIKE gesucht.
+    """
+
+    # Tabelle -> (FTS-Tabelle, indizierte Spalten)
+    INDEXES = {
+        'disks': ('disks_fts', ('serial_number', 'model', 'device_path')),
+        'wipe_logs': ('wipe_logs_fts', ('serial_number', 'model', 'device_path', 'error_message')),
+        # Katalog der archivierten Wipes
+        'archived_wipes': ('archived_wipes_fts', ('serial_number', 'model', 'device_path', 'error_message')),
+    }
+
+    # Kurze Begriffe: Anfang dieser Spalten, in dieser Reihenfolge (NOCASE-Index je Spalte)
+    PREFIX_COLUMNS = ('serial_number', 'model', 'device_path')
+    PREFIX_TABLES = ('disks', 'wipe_logs', 'archived_wipes')
+
+    MIN_QUERY_LENGTH = 3  # Trigram-Index findet erst ab drei Zeichen
+    CANDIDATE_FACTOR = 20
+
+    _available = None
+
+    @staticmethod
+    def install():
+        """
+        Legt FTS-Tabellen und Trigger an (idempotent) und befüllt neue Indizes aus den Daten
+        Returns: True wenn der Index verfügbar ist
+        """
+        if db.engine.dialect.name != 'sqlite':
+            SearchIndex._available = False
+            return False
+
+        with db.engine.begin() as connection:
+            for table in SearchIndex.PREFIX_TABLES:
+                for column in SearchIndex.PREFIX_COLUMNS:
+                    connection.exec_driver_sql(
+                        f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_nocase ON {table} ({column} COLLATE NOCASE)"
+                    )
+
+        try:
+            with db.engine.begin() as connection:
+                for table, (fts_table, columns) in SearchIndex.INDEXES.items():
+                    exists = connection.exec_driver_sql(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+                    ).first()
+                    if exists and SearchIndex._columns(connection, fts_table) != columns:
+                        # Indizierte Spalten haben sich geändert: Index samt Triggern neu anlegen
+                        for suffix in ('ai', 'ad', 'au'):
+                            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+                        connection.exec_driver_sql(f"DROP TABLE {fts_table}")
+                        exists = None
+                    for statement in SearchIndex._ddl(table, fts_table, columns):
+                        connection.exec_driver_sql(statement)
+                    if not exists:
+                        connection.exec_driver_sql(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+            SearchIndex._available = True
+        except Exception as e:
+            # z.B. SQLite < 3.34 ohne Trigram-Tokenizer
+            print(f"Suchindex nicht verfügbar, Suche per LIKE: {e}")
+            SearchIndex._available = False
+
+        return SearchIndex._available
+
+    @staticmethod
+    def _columns(connection, fts_table):
+        return tuple(row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({fts_table})"))
+
+    @staticmethod
+    def _ddl(table, fts_table, columns):
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        delete = f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+        insert = f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});"
+
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+            f"{column_list}, content='{table}', content_rowid='id', tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+            # Nur bei Änderung indizierter Spalten (nicht bei jedem Fortschritts-Update)
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {table} "
+            f"BEGIN {delete} {insert} END",
+        ]
+
+    @staticmethod
+    def available():
+        if SearchIndex._available is None:
+            SearchIndex._available = db.engine.dialect.name == 'sqlite' and db.session.execute(
+                text("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name IN "
+                     "('disks_fts', 'wipe_logs_fts', 'archived_wipes_fts')")
+            ).scalar() == len(SearchIndex.INDEXES)
+        return SearchIndex._available
+
+    @staticmethod
+    def search(model, query, limit=50, options=()):
+        """Sucht Disks bzw. WipeLogs, höchstens limit Treffer in Ranking-Reihenfolge"""
+        ids = SearchIndex.search_ids(model, query, limit)
+        if not ids:
+            return []
+
+        records = {record.id: record for record in model.query.options(*options).filter(model.id.in_(ids))}
+        return [records[record_id] for record_id in ids if record_id in records]
+
+    @staticmethod
+    def search_ids(model, query, limit=50):
+        """IDs der Treffer in Ranking-Reihenfolge (Disks, WipeLogs oder archivierte Wipes)"""
+        query = query.strip()
+        if not query or limit <= 0:
+            return []
+
+        if len(query) < SearchIndex.MIN_QUERY_LENGTH:
+            return SearchIndex.prefix_ids(model, query, limit)
+        if not SearchIndex.available():
+            return SearchIndex._like_ids(model, query, limit)
+
+        fts_table = SearchIndex.INDEXES[model.__tablename__][0]
+        return db.session.execute(
+            text(f"SELECT t.id FROM ("
+                 f"SELECT rowid, rank FROM {fts_table} WHERE {fts_table} MATCH :match "
+                 f"ORDER BY rowid DESC LIMIT :candidates"
+                 f") m JOIN {model.__tablename__} t ON t.id = m.rowid "
+                 f"ORDER BY t.serial_number LIKE :prefix ESCAPE '\\' DESC, m.rank LIMIT :limit"),
+            {
+                'match': SearchIndex._match_expression(query),
+                'prefix': SearchIndex._like_prefix(query),
+                'candidates': limit * SearchIndex.CANDIDATE_FACTOR,
+                'limit': limit
+            }
+        ).scalars().all()
+
+    @staticmethod
+    def prefix_ids(model, query, limit):
+        """
+        IDs mit diesem Anfang in PREFIX_COLUMNS, ohne Beachtung der Groß-/Kleinschreibung
+        Treffer der Seriennummer zuerst, jede Spalte ist ein Bereich auf ihrem NOCASE-Index (kein Sortieren)
+        """
+        ids = []
+        for name in SearchIndex.PREFIX_COLUMNS:
+            if len(ids) >= limit:
+                break
+            column = getattr(model, name)
+            if db.engine.dialect.name == 'sqlite':
+                column = column.collate('NOCASE')
+                condition = db.and_(column >= query, column < query + '\U0010ffff')
+            else:
+                condition = column.ilike(SearchIndex._like_prefix(query), escape='\\')
+            rows = (db.session.query(model.id)
+                    .filter(condition)
+                    .order_by(column, model.id)
+                    .limit(limit))
+            ids += [row.id for row in rows if row.id not in ids]
+        return ids[:limit]
+
+    @staticmethod
+    def _like_ids(model, query, limit):
+        pattern = f'%{SearchIndex._escape_like(query)}%'
+        columns = SearchIndex.INDEXES[model.__tablename__][1]
+        condition = db.or_(*(getattr(model, column).ilike(pattern, escape='\\') for column in columns))
+        rows = (db.session.query(model.id)
+                .filter(condition)
+                .order_by(model.serial_number.ilike(SearchIndex._like_prefix(query), escape='\\').desc(), model.id.desc())
+                .limit(limit))
+        return [row.id for row in rows]
+
+    @staticmethod
+    def _match_expression(query):
+        # Als FTS5-String quoten: Sonderzeichen (-, :, *, ...) werden nicht als Operatoren interpretiert
+        return '"' + query.replace('"', '""') + '"'
+
+    @staticmethod
+    def _escape_like(query):
+        return query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    @staticmethod
+    def _like_prefix(query):
+        return SearchIndex._escape_like(query) + '%'
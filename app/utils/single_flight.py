@@ -0,0 +1,51 @@
+import threading
+
+
+class _Call:
+    """Eine laufende Operation, auf die weitere Aufrufer warten"""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Fasst gleichzeitige Aufrufe mit demselben Schlüssel zusammen
+
+    Der erste Aufrufer führt die Funktion aus, alle weiteren warten und erhalten
+    dasselbe Ergebnis (bzw. dieselbe Exception). Nach Abschluss wird der Schlüssel
+    freigegeben, spätere Aufrufe starten eine neue Ausführung.
+    """
+
+    _calls = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def do(key, fn, *args, **kwargs):
+        with SingleFlight._lock:
+            call = SingleFlight._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                SingleFlight._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with SingleFlight._lock:
+                SingleFlight._calls.pop(key, None)
+            call.done.set()
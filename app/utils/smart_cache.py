@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+from app.utils.smart_reader import SmartReader
+
+
+class SmartCache:
+    """
+    Zwischenspeicher für SMART-Daten (TTL + LRU)
+
+    Schlüssel ist (device_path, serial_number), damit ein Gerätepfad, der nach
+    einem Hotplug an eine andere Disk vergeben wurde, keine fremden Daten liefert.
+    Nur erfolgreiche Auslesungen werden gespeichert.
+    """
+
+    DEFAULT_TTL = 300  # Sekunden
+    DEFAULT_MAX_ENTRIES = 256
+
+    _entries = OrderedDict()
+    _lock = threading.Lock()
+    _ttl = DEFAULT_TTL
+    _max_entries = DEFAULT_MAX_ENTRIES
+
+    @staticmethod
+    def configure(ttl=None, max_entries=None):
+        """Setzt TTL und maximale Anzahl Einträge (ttl=0 deaktiviert den Cache)"""
+        with SmartCache._lock:
+            if ttl is not None:
+                SmartCache._ttl = ttl
+            if max_entries is not None:
+                SmartCache._max_entries = max(1, max_entries)
+            while len(SmartCache._entries) > SmartCache._max_entries:
+                SmartCache._entries.popitem(last=False)
+
+    @staticmethod
+    def get(device_path, serial_number):
+        """Gibt die gespeicherten SMART-Daten zurück, oder None wenn nicht vorhanden/abgelaufen"""
+        key = (device_path, serial_number)
+        with SmartCache._lock:
+            entry = SmartCache._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, smart_data = entry
+            if time.monotonic() - stored_at > SmartCache._ttl:
+                del SmartCache._entries[key]
+                return None
+
+            SmartCache._entries.move_to_end(key)
+            return smart_data
+
+    @staticmethod
+    def put(device_path, serial_number, smart_data):
+        """Speichert SMART-Daten (fehlerhafte Auslesungen werden ignoriert)"""
+        if not smart_data or 'error' in smart_data or SmartCache._ttl <= 0:
+            return
+
+        key = (device_path, serial_number)
+        with SmartCache._lock:
+            SmartCache._entries[key] = (time.monotonic(), smart_data)
+            SmartCache._entries.move_to_end(key)
+            while len(SmartCache._entries) > SmartCache._max_entries:
+                SmartCache._entries.popitem(last=False)
+
+    @staticmethod
+    def invalidate(device_path=None, serial_number=None):
+        """Entfernt alle Einträge zum Gerätepfad und/oder zur Seriennummer"""
+        with SmartCache._lock:
+            for key in list(SmartCache._entries):
+                if key[0] == device_path or (serial_number is not None and key[1] == serial_number):
+                    del SmartCache._entries[key]
+
+    @staticmethod
+    def clear():
+        with SmartCache._lock:
+            SmartCache._entries.clear()
+
+    @staticmethod
+    def get_smart_data(device_path, serial_number, timeout=None, force=False):
+        """
+        Wie SmartReader.get_smart_data, verwendet aber den Cache
+        force=True liest immer neu aus und aktualisiert den Cache
+        """
+        if not force:
+            smart_data = SmartCache.get(device_path, serial_number)
+            if smart_data is not None:
+                return smart_data
+
+        smart_data = SmartReader.get_smart_data(device_path, timeout=timeout)
+        SmartCache.put(device_path, serial_number, smart_data)
+        return smart_data
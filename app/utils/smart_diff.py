@@ -0,0 +1,233 @@
+import json
+from sqlalchemy import select, update
+from app import db
+from app.models import WipeLog
+
+
+class SmartDiff:
+    """
+    Änderungen der SMART-Werte während eines Wipes (vor/nach)
+
+    Der Vergleich wird einmal beim Abschluss des Wipes berechnet und im WipeLog
+    gespeichert: smart_diff enthält nur die geänderten Werte ({Schlüssel:
+    {before, after, delta, severity}}), smart_changed_count und
+    smart_diff_severity erlauben Listen und Flotten-Abfragen ohne die
+    SMART-JSONs zu lesen. Schlüssel sind die Felder der Zusammenfassung (z.B.
+    temperature), attr.<Name> für ATA-Attribute (Raw-Wert) und nvme.<Feld>.
+    """
+
+    NONE = 'none'
+    INFO = 'info'
+    WARNING = 'warning'
+    CRITICAL = 'critical'
+    # Vor- oder Nach-Auslesung fehlt, kein Vergleich möglich
+    UNAVAILABLE = 'unavailable'
+
+    # Aufsteigend, smart_diff_severity ist der höchste Wert aller Änderungen
+    SEVERITIES = (NONE, INFO, WARNING, CRITICAL)
+    SEVERITY_LABELS = {
+        NONE: 'keine Änderungen',
+        INFO: 'unauffällig',
+        WARNING: 'Warnung',
+        CRITICAL: 'kritisch',
+        UNAVAILABLE: 'nicht verfügbar',
+    }
+
+    # Felder der Zusammenfassung (Schlüssel, Bezeichnung im Report)
+    FIELDS = (
+        ('model', 'Modell'),
+        ('serial', 'Seriennummer'),
+        ('smart_status', 'SMART Status'),
+        ('health_status', 'Gesundheitsstatus'),
+        ('power_on_hours', 'Betriebsstunden'),
+        ('power_cycle_count', 'Power Cycle Count'),
+        ('temperature', 'Temperatur (°C)'),
+        ('wear', 'Abnutzung'),
+        ('read_errors', 'Lesefehler'),
+        ('write_errors', 'Schreibfehler'),
+    )
+
+    # Statuswerte, deren Wechsel unkritisch ist
+    HEALTHY_STATUSES = ('PASSED', 'OK', 'HEALTHY', 'GOOD')
+    STATUS_FIELDS = ('smart_status', 'health_status')
+    # Zunahme deutet auf Fehler hin
+    WARNING_FIELDS = ('read_errors', 'write_errors')
+
+    # ATA-Attribute (ID), deren Zunahme defekte Sektoren bzw. Medienfehler anzeigt
+    CRITICAL_ATTRIBUTES = (5, 187, 188, 196, 197, 198)
+    # Zunahme auffällig, aber kein Medienfehler (Spin-Retry, Übertragungs- und Schreibfehler)
+    WARNING_ATTRIBUTES = (10, 171, 172, 183, 184, 199)
+
+    CRITICAL_NVME_FIELDS = ('critical_warning', 'media_errors')
+    WARNING_NVME_FIELDS = ('num_err_log_entries',)
+
+    BACKFILL_STATUSES = ('completed', 'failed')
+
+    @staticmethod
+    def compute(smart_before, smart_after):
+        """
+        Vergleicht zwei SMART-Auslesungen (dicts)
+        Returns: (Änderungen, Anzahl, Schweregrad), ohne beide Auslesungen (None, None, UNAVAILABLE)
+        """
+        if not smart_before or not smart_after:
+            return None, None, SmartDiff.UNAVAILABLE
+
+        changes = {}
+        before_values = SmartDiff._values(smart_before)
+        after_values = SmartDiff._values(smart_after)
+
+        for key, (value_before, attribute_id) in before_values.items():
+            if key not in after_values:
+                continue
+            value_after = after_values[key][0]
+            if value_before == value_after or value_before is None or value_after is None:
+                continue
+
+            change = {'before': value_before, 'after': value_after}
+            delta = SmartDiff._delta(value_before, value_after)
+            if delta is not None:
+                change['delta'] = delta
+            change['severity'] = SmartDiff._severity(key, attribute_id, value_after, delta)
+            changes[key] = change
+
+        return changes, len(changes), SmartDiff.severity_of(changes)
+
+    @staticmethod
+    def apply(wipe_log):
+        """Berechnet den Vergleich aus smart_data_before/after und setzt die Spalten (Commit durch den Aufrufer)"""
+        changes, count, severity = SmartDiff.compute(SmartDiff._loads(wipe_log.smart_data_before),
+                                                     SmartDiff._loads(wipe_log.smart_data_after))
+        wipe_log.smart_diff = json.dumps(changes, separators=(',', ':')) if changes is not None else None
+        wipe_log.smart_changed_count = count
+        wipe_log.smart_diff_severity = severity
+        return changes
+
+    @staticmethod
+    def for_wipe(wipe_log):
+        """Gespeicherte Änderungen eines Wipes, für Wipes ohne gespeicherten Vergleich neu berechnet (None wenn nicht möglich)"""
+        if getattr(wipe_log, 'smart_diff_severity', None) is not None:
+            return SmartDiff._loads(wipe_log.smart_diff)
+        return SmartDiff.compute(SmartDiff._loads(wipe_log.smart_data_before),
+                                 SmartDiff._loads(wipe_log.smart_data_after))[0]
+
+    @staticmethod
+    def severity_of(changes):
+        """Schweregrad einer Änderungsliste (UNAVAILABLE für None)"""
+        if changes is None:
+            return SmartDiff.UNAVAILABLE
+        return max((change['severity'] for change in changes.values()),
+                   key=SmartDiff.SEVERITIES.index, default=SmartDiff.NONE)
+
+    @staticmethod
+    def at_least(severity):
+        """Schweregrade ab severity (für Filter), wirft ValueError bei unbekanntem Wert"""
+        if severity not in SmartDiff.SEVERITIES:
+            raise ValueError(f"Ungültiger SMART-Schweregrad: {severity}")
+        return SmartDiff.SEVERITIES[SmartDiff.SEVERITIES.index(severity):]
+
+    @staticmethod
+    def backfill(batch_size=200):
+        """
+        Berechnet den Vergleich für abgeschlossene Wipes, die noch keinen haben (läuft beim Start)
+        Returns: Anzahl aktualisierter Wipes
+        """
+        updated = 0
+        while True:
+            # Bearbeitete Wipes erhalten immer einen Schweregrad und fallen aus der Abfrage heraus,
+            # die Sortierung folgt dem Index ix_wipe_logs_smart_severity_start_id (kein Sortieren)
+            rows = db.session.execute(
+                select(WipeLog.id, WipeLog.smart_data_before, WipeLog.smart_data_after)
+                .where(WipeLog.smart_diff_severity.is_(None),
+                       WipeLog.status.in_(SmartDiff.BACKFILL_STATUSES))
+                .order_by(WipeLog.start_time, WipeLog.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            values = []
+            for wipe_id, smart_data_before, smart_data_after in rows:
+                changes, count, severity = SmartDiff.compute(SmartDiff._loads(smart_data_before),
+                                                             SmartDiff._loads(smart_data_after))
+                values.append({
+                    'id': wipe_id,
+                    'smart_diff': json.dumps(changes, separators=(',', ':')) if changes is not None else None,
+                    'smart_changed_count': count,
+                    'smart_diff_severity': severity,
+                })
+            # Bulk-Update über den Primärschlüssel (executemany)
+            db.session.execute(update(WipeLog), values)
+            db.session.commit()
+            updated += len(rows)
+
+        return updated
+
+    @staticmethod
+    def label(key):
+        """Anzeigename eines Schlüssels"""
+        for field, label in SmartDiff.FIELDS:
+            if field == key:
+                return label
+        return key.split('.', 1)[-1]
+
+    @staticmethod
+    def _values(smart_data):
+        """Flache Sicht einer Auslesung: Schlüssel -> (Wert, ATA-Attribut-ID)"""
+        values = {key: (smart_data.get(key), None) for key, _ in SmartDiff.FIELDS if key in smart_data}
+
+        for name, attribute in (smart_data.get('attributes') or {}).items():
+            if isinstance(attribute, dict):
+                values[f'attr.{name}'] = (attribute.get('raw', attribute.get('value')), attribute.get('id'))
+
+        for key, value in (smart_data.get('nvme_health') or {}).items():
+            values[f'nvme.{key}'] = (value, None)
+
+        return values
+
+    @staticmethod
+    def _delta(value_before, value_after):
+        numbers = (int, float)
+        if (isinstance(value_before, numbers) and isinstance(value_after, numbers)
+                and not isinstance(value_before, bool) and not isinstance(value_after, bool)):
+            return value_after - value_before
+        return None
+
+    @staticmethod
+    def _severity(key, attribute_id, value_after, delta):
+        increased = delta is not None and delta > 0
+
+        if key in SmartDiff.STATUS_FIELDS:
+            return SmartDiff.INFO if str(value_after).upper() in SmartDiff.HEALTHY_STATUSES else SmartDiff.CRITICAL
+        if key in SmartDiff.WARNING_FIELDS:
+            return SmartDiff.WARNING if increased else SmartDiff.INFO
+
+        if key.startswith('attr.'):
+            if attribute_id in SmartDiff.CRITICAL_ATTRIBUTES:
+                return SmartDiff.CRITICAL if increased else SmartDiff.WARNING
+            if attribute_id in SmartDiff.WARNING_ATTRIBUTES and increased:
+                return SmartDiff.WARNING
+            return SmartDiff.INFO
+
+        if key.startswith('nvme.'):
+            field = key[len('nvme.'):]
+            if field in SmartDiff.CRITICAL_NVME_FIELDS and increased:
+                return SmartDiff.CRITICAL
+            if field in SmartDiff.WARNING_NVME_FIELDS and increased:
+                return SmartDiff.WARNING
+            if field == 'available_spare' and delta is not None and delta < 0:
+                return SmartDiff.WARNING
+            return SmartDiff.INFO
+
+        # Modell/Seriennummer sollten sich nie ändern
+        if key in ('model', 'serial'):
+            return SmartDiff.WARNING
+        return SmartDiff.INFO
+
+    @staticmethod
+    def _loads(value):
+        if not value:
+            return None
+        try:
+            return json.loads(value)
+        except (ValueError, TypeError):
+            return None
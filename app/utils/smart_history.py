@@ -0,0 +1,277 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from app import db
+from app.models import SmartHistoryEntry
+
+
+class SmartHistory:
+    """
+    Delta-kodierter SMART-Verlauf pro Disk
+
+    Jede Auslesung wird als flacher Zustand (Kennzahl -> Wert) erfasst. Gespeichert
+    werden nur die Änderungen zum vorherigen Eintrag, alle KEYFRAME_INTERVAL
+    Einträge ein vollständiger Keyframe. Unveränderte Attribute kosten so nur
+    einen leeren Eintrag.
+    """
+
+    KEYFRAME_INTERVAL = 32
+
+    # Kennzahlen für Trend-Abfragen
+    TREND_METRICS = ('power_on_hours', 'temperature', 'reallocated_sectors', 'pending_sectors', 'media_wear')
+
+    # ATA-Attribute (ID) für abgeleitete Kennzahlen
+    REALLOCATED_ATTRIBUTE = 5
+    PENDING_ATTRIBUTE = 197
+    # Verschleiß-Indikatoren, deren normalisierter Wert von 100 abwärts zählt
+    WEAR_ATTRIBUTES = (177, 231, 233, 202)
+
+    # Kennzahlen, die beim Downsampling gemittelt statt als letzter Wert übernommen werden
+    AVERAGED_METRICS = ('temperature',)
+
+    _last_compaction = None
+    _compaction_lock = threading.Lock()
+
+    @staticmethod
+    def extract_state(smart_data):
+        """Wandelt eine SMART-Auslesung in einen flachen Zustand (nur gesetzte Werte)"""
+        state = {}
+
+        for key in ('smart_status', 'power_on_hours', 'power_cycle_count', 'temperature'):
+            if smart_data.get(key) is not None:
+                state[key] = smart_data[key]
+
+        attributes_by_id = {}
+        for name, attribute in (smart_data.get('attributes') or {}).items():
+            if not isinstance(attribute, dict):
+                continue
+            state[f'attr.{name}'] = [attribute.get('value'), attribute.get('worst'), attribute.get('raw')]
+            if attribute.get('id') is not None:
+                attributes_by_id[attribute['id']] = attribute
+
+        nvme_health = smart_data.get('nvme_health') or {}
+        for key, value in nvme_health.items():
+            state[f'nvme.{key}'] = value
+
+        # Abgeleitete Kennzahlen für Trends
+        if SmartHistory.REALLOCATED_ATTRIBUTE in attributes_by_id:
+            state['reallocated_sectors'] = attributes_by_id[SmartHistory.REALLOCATED_ATTRIBUTE].get('raw')
+        if SmartHistory.PENDING_ATTRIBUTE in attributes_by_id:
+            state['pending_sectors'] = attributes_by_id[SmartHistory.PENDING_ATTRIBUTE].get('raw')
+
+        if nvme_health.get('percentage_used') is not None:
+            state['media_wear'] = nvme_health['percentage_used']
+        else:
+            for attribute_id in SmartHistory.WEAR_ATTRIBUTES:
+                value = attributes_by_id.get(attribute_id, {}).get('value')
+                if value is not None:
+                    state['media_wear'] = max(0, 100 - value)
+                    break
+            else:
+                if smart_data.get('wear') is not None:
+                    state['media_wear'] = smart_data['wear']
+
+        return {key: value for key, value in state.items() if value is not None}
+
+    @staticmethod
+    def append(disk_id, smart_data, captured_at=None):
+        """Hängt eine Auslesung an den Verlauf an (Commit durch den Aufrufer)"""
+        state = SmartHistory.extract_state(smart_data)
+        previous, entries_since_keyframe = SmartHistory._current_state(disk_id)
+
+        if previous is None or entries_since_keyframe >= SmartHistory.KEYFRAME_INTERVAL:
+            entry = SmartHistory._entry(disk_id, captured_at, state, keyframe=True)
+        else:
+            entry = SmartHistory._entry(disk_id, captured_at, SmartHistory._delta(previous, state), keyframe=False)
+
+        db.session.add(entry)
+        return entry
+
+    @staticmethod
+    def _entry(disk_id, captured_at, payload, keyframe):
+        return SmartHistoryEntry(
+            disk_id=disk_id,
+            captured_at=captured_at or datetime.utcnow(),
+            is_keyframe=keyframe,
+            payload=json.dumps(payload, separators=(',', ':'))
+        )
+
+    @staticmethod
+    def _delta(previous, state):
+        delta = {key: value for key, value in state.items() if previous.get(key) != value}
+        delta.update({key: None for key in previous if key not in state})
+        return delta
+
+    @staticmethod
+    def _apply(state, entry):
+        payload = json.loads(entry.payload)
+        if entry.is_keyframe:
+            return payload
+
+        state = dict(state)
+        for key, value in payload.items():
+            if value is None:
+                state.pop(key, None)
+            else:
+                state[key] = value
+        return state
+
+    @staticmethod
+    def _ordered(query):
+        return query.order_by(SmartHistoryEntry.captured_at, SmartHistoryEntry.id)
+
+    @staticmethod
+    def _current_state(disk_id):
+        """Rekonstruiert den jüngsten Zustand ab dem letzten Keyframe"""
+        keyframe = (SmartHistoryEntry.query
+                    .filter_by(disk_id=disk_id, is_keyframe=True)
+                    .order_by(SmartHistoryEntry.captured_at.desc(), SmartHistoryEntry.id.desc())
+                    .first())
+        if keyframe is None:
+            return None, 0
+
+        state = SmartHistory._apply({}, keyframe)
+        deltas = SmartHistory._ordered(SmartHistoryEntry.query.filter(
+            SmartHistoryEntry.disk_id == disk_id,
+            SmartHistoryEntry.is_keyframe.is_(False),
+            (SmartHistoryEntry.captured_at > keyframe.captured_at) |
+            ((SmartHistoryEntry.captured_at == keyframe.captured_at) & (SmartHistoryEntry.id > keyframe.id))
+        )).all()
+
+        for entry in deltas:
+            state = SmartHistory._apply(state, entry)
+        return state, len(deltas) + 1
+
+    @staticmethod
+    def iter_states(disk_id, since=None):
+        """Liefert (captured_at, Zustand) in zeitlicher Reihenfolge, optional ab since"""
+        query = SmartHistoryEntry.query.filter_by(disk_id=disk_id)
+        if since is not None:
+            # Ab dem letzten Keyframe vor since lesen, damit der Zustand rekonstruierbar ist
+            keyframe = (SmartHistoryEntry.query
+                        .filter(SmartHistoryEntry.disk_id == disk_id,
+                                SmartHistoryEntry.is_keyframe.is_(True),
+                                SmartHistoryEntry.captured_at <= since)
+                        .order_by(SmartHistoryEntry.captured_at.desc())
+                        .first())
+            if keyframe is not None:
+                query = query.filter(SmartHistoryEntry.captured_at >= keyframe.captured_at)
+
+        state = {}
+        for entry in SmartHistory._ordered(query).yield_per(500):
+            state = SmartHistory._apply(state, entry)
+            if since is None or entry.captured_at >= since:
+                yield entry.captured_at, state
+
+    @staticmethod
+    def series(disk_id, metrics=None, since=None, max_points=200):
+        """
+        Trend-Reihen einer Disk, auf höchstens max_points Punkte pro Kennzahl reduziert
+        Returns: {kennzahl: [[zeitpunkt_iso, wert], ...]}
+        """
+        metrics = metrics or SmartHistory.TREND_METRICS
+        points = {metric: [] for metric in metrics}
+
+        for captured_at, state in SmartHistory.iter_states(disk_id, since):
+            for metric in metrics:
+                value = state.get(metric)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    points[metric].append((captured_at, value))
+
+        return {
+            metric: [
+                [captured_at.isoformat(), value]
+                for captured_at, value in SmartHistory._downsample(values, max_points, metric in SmartHistory.AVERAGED_METRICS)
+            ]
+            for metric, values in points.items()
+        }
+
+    @staticmethod
+    def _downsample(values, max_points, average=False):
+        """Teilt den Zeitraum in gleich breite Intervalle, pro Intervall ein Punkt"""
+        if len(values) <= max_points or max_points < 2:
+            return values
+
+        start = values[0][0]
+        span = (values[-1][0] - start).total_seconds() or 1
+        buckets = {}
+        for captured_at, value in values:
+            index = min(max_points - 1, int((captured_at - start).total_seconds() / span * max_points))
+            buckets.setdefault(index, []).append((captured_at, value))
+
+        result = []
+        for index in sorted(buckets):
+            bucket = buckets[index]
+            if average:
+                result.append((bucket[-1][0], round(sum(value for _, value in bucket) / len(bucket), 1)))
+            else:
+                # Zähler (Betriebsstunden, Sektoren): letzter Wert des Intervalls
+                result.append(bucket[-1])
+        return result
+
+    @staticmethod
+    def compact(retention_days=365, full_resolution_days=30, now=None):
+        """
+        Verkleinert den Verlauf:
+        - Einträge älter als retention_days werden gelöscht
+        - Einträge älter als full_resolution_days werden auf einen pro Tag reduziert
+        Betroffene Disks werden vollständig neu kodiert. Returns: Anzahl entfernter Einträge
+        """
+        now = now or datetime.utcnow()
+        delete_before = now - timedelta(days=retention_days)
+        daily_before = now - timedelta(days=full_resolution_days)
+
+        disk_ids = [row[0] for row in db.session.query(SmartHistoryEntry.disk_id)
+                    .filter(SmartHistoryEntry.captured_at < daily_before)
+                    .distinct()]
+
+        removed = 0
+        for disk_id in disk_ids:
+            states = list(SmartHistory.iter_states(disk_id))
+            kept = []
+            for captured_at, state in states:
+                if captured_at < delete_before:
+                    continue
+                if (captured_at < daily_before and kept and kept[-1][0] < daily_before
+                        and kept[-1][0].date() == captured_at.date()):
+                    # Gleicher Tag: nur den letzten Zustand des Tages behalten
+                    kept[-1] = (captured_at, state)
+                    continue
+                kept.append((captured_at, state))
+
+            if len(kept) == len(states):
+                continue
+
+            SmartHistoryEntry.query.filter_by(disk_id=disk_id).delete(synchronize_session=False)
+            previous = None
+            for index, (captured_at, state) in enumerate(kept):
+                if index % SmartHistory.KEYFRAME_INTERVAL == 0:
+                    db.session.add(SmartHistory._entry(disk_id, captured_at, state, keyframe=True))
+                else:
+                    db.session.add(SmartHistory._entry(disk_id, captured_at, SmartHistory._delta(previous, state), keyframe=False))
+                previous = state
+
+            removed += len(states) - len(kept)
+            db.session.commit()
+
+        return removed
+
+    @staticmethod
+    def maybe_compact(app, interval=timedelta(days=1)):
+        """Führt compact() höchstens einmal pro Intervall aus"""
+        with SmartHistory._compaction_lock:
+            now = datetime.utcnow()
+            if SmartHistory._last_compaction and now - SmartHistory._last_compaction < interval:
+                return 0
+            SmartHistory._last_compaction = now
+
+        try:
+            return SmartHistory.compact(
+                retention_days=app.config['SMART_HISTORY_RETENTION_DAYS'],
+                full_resolution_days=app.config['SMART_HISTORY_FULL_RESOLUTION_DAYS'],
+                now=now
+            )
+        except Exception as e:
+            db.session.rollback()
+            print(f"Fehler beim Verdichten des SMART-Verlaufs: {e}")
+            return 0
@@ -1,51 +1,116 @@
 import subprocess
 import json
 import platform
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from app.utils.single_flight import SingleFlight
+from app.utils.tool_registry import ToolRegistry
 
 
 class SmartReader:
     """Liest SMART-Daten von Festplatten aus"""
 
+    # Maximale Laufzeit eines einzelnen smartctl/PowerShell-Aufrufs (Sekunden)
+    DEFAULT_TIMEOUT = 20
+
+    # Übernommene Felder aus dem NVMe SMART/Health Information Log
+    NVME_HEALTH_FIELDS = (
+        'critical_warning', 'temperature', 'available_spare', 'available_spare_threshold',
+        'percentage_used', 'data_units_read', 'data_units_written', 'power_cycles',
+        'power_on_hours', 'unsafe_shutdowns', 'media_errors', 'num_err_log_entries'
+    )
+
     @staticmethod
-    def get_smart_data(device_path):
+    def get_smart_data(device_path, timeout=None):
         """
         Liest SMART-Daten einer Festplatte aus
         Gibt ein Dictionary mit SMART-Informationen zurück
+        Gleichzeitige Aufrufe für dasselbe Gerät teilen sich einen smartctl-Aufruf
         """
+        timeout = timeout or SmartReader.DEFAULT_TIMEOUT
+        return SingleFlight.do(('smart', device_path), SmartReader._read_smart_data, device_path, timeout)
+
+    @staticmethod
+    def _read_smart_data(device_path, timeout):
         system = platform.system()
         
         try:
             if system == 'Linux':
-                return SmartReader._get_smart_linux(device_path)
+                return SmartReader._get_smart_linux(device_path, timeout)
             elif system == 'Windows':
-                return SmartReader._get_smart_windows(device_path)
+                return SmartReader._get_smart_windows(device_path, timeout)
             elif system == 'Darwin':
-                return SmartReader._get_smart_macos(device_path)
+                return SmartReader._get_smart_macos(device_path, timeout)
             else:
                 return {'error': f'System {system} nicht unterstützt'}
+        except subprocess.TimeoutExpired:
+            return SmartReader._timeout_result(device_path, timeout)
         except Exception as e:
             return {'error': str(e)}
 
     @staticmethod
-    def _get_smart_linux(device_path):
+    def iter_smart_data(device_paths, timeout=None, max_workers=8):
+        """
+        Liest SMART-Daten mehrerer Festplatten parallel
+        Liefert (device_path, smart_data) in der Reihenfolge der Fertigstellung.
+        Geräte, die die Deadline überschreiten, werden als Timeout gemeldet statt zu blockieren.
+        """
+        device_paths = list(device_paths)
+        if not device_paths:
+            return
+
+        timeout = timeout or SmartReader.DEFAULT_TIMEOUT
+        workers = max(1, min(max_workers, len(device_paths)))
+        # Jede "Welle" von Workern darf den vollen Timeout ausschöpfen, plus Puffer (Prozessstart, Parsing)
+        waves = -(-len(device_paths) // workers)
+        deadline = time.monotonic() + waves * timeout + 2
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='smart-reader')
+        futures = {
+            executor.submit(SmartReader.get_smart_data, device_path, timeout): device_path
+            for device_path in device_paths
+        }
+        pending = set(futures)
+
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        yield futures[future], future.result()
+                    except Exception as e:
+                        yield futures[future], {'error': str(e)}
+
+            for future in pending:
+                yield futures[future], SmartReader._timeout_result(futures[future], timeout)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _timeout_result(device_path, timeout):
+        return {
+            'error': f'Timeout beim Lesen der SMART-Daten von {device_path} (>{timeout}s)',
+            'timed_out': True
+        }
+
+    @staticmethod
+    def _get_smart_linux(device_path, timeout=None):
         """Liest SMART-Daten unter Linux via smartctl"""
         try:
-            # Prüfe ob smartctl verfügbar ist
-            result = subprocess.run(
-                ['which', 'smartctl'],
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode != 0:
+            # Prüfe ob smartctl verfügbar ist (einmalig ermittelt)
+            if not ToolRegistry.available('smartctl'):
                 return {'error': 'smartctl nicht installiert. Bitte smartmontools installieren.'}
             
+            # Ältere smartctl-Versionen ohne JSON-Ausgabe direkt als Text parsen
+            if not ToolRegistry.has_feature('smartctl', 'json'):
+                return SmartReader._parse_smart_text_linux(device_path, timeout)
+            
             # SMART-Daten als JSON abrufen
-            result = subprocess.run(
-                ['smartctl', '-a', '-j', device_path],
-                capture_output=True,
-                text=True
-            )
+            result = ToolRegistry.run('smartctl', ['-a', '-j', device_path], timeout=timeout)
             
             data = json.loads(result.stdout)
             
@@ -72,7 +137,10 @@ class SmartReader:
                 attr_raw = attr.get('raw', {}).get('value', 0)
                 
                 smart_info['attributes'][attr_name] = {
+                    'id': attr.get('id'),
                     'value': attr_value,
+                    'worst': attr.get('worst'),
+                    'thresh': attr.get('thresh'),
                     'raw': attr_raw
                 }
                 
@@ -84,23 +152,39 @@ class SmartReader:
                 elif 'Temperature' in attr_name:
                     smart_info['temperature'] = attr_raw
             
+            # NVMe-Geräte haben keine Attributtabelle, sondern ein Health-Log
+            nvme_log = data.get('nvme_smart_health_information_log')
+            if nvme_log:
+                smart_info['nvme_health'] = {
+                    key: nvme_log[key] for key in SmartReader.NVME_HEALTH_FIELDS if key in nvme_log
+                }
+                smart_info['power_on_hours'] = nvme_log.get('power_on_hours', 0)
+                smart_info['power_cycle_count'] = nvme_log.get('power_cycles', 0)
+                smart_info['wear'] = nvme_log.get('percentage_used')
+                smart_info['media_errors'] = nvme_log.get('media_errors')
+            
+            # Geräteunabhängige Angaben von smartctl (Temperatur-Rohwerte der Attribute sind oft gepackt)
+            current_temperature = data.get('temperature', {}).get('current')
+            if current_temperature is not None:
+                smart_info['temperature'] = current_temperature
+            if not smart_info['power_on_hours']:
+                smart_info['power_on_hours'] = data.get('power_on_time', {}).get('hours', 0)
+            
             return smart_info
             
         except json.JSONDecodeError:
             # Fallback: Parse Text-Ausgabe
-            return SmartReader._parse_smart_text_linux(device_path)
+            return SmartReader._parse_smart_text_linux(device_path, timeout)
+        except subprocess.TimeoutExpired:
+            return SmartReader._timeout_result(device_path, timeout)
         except Exception as e:
             return {'error': f'Fehler beim Lesen der SMART-Daten: {str(e)}'}
 
     @staticmethod
-    def _parse_smart_text_linux(device_path):
+    def _parse_smart_text_linux(device_path, timeout=None):
         """Fallback: Parse SMART-Daten aus Text-Ausgabe"""
         try:
-            result = subprocess.run(
-                ['smartctl', '-a', device_path],
-                capture_output=True,
-                text=True
-            )
+            result = ToolRegistry.run('smartctl', ['-a', device_path], timeout=timeout)
             
             smart_info = {
                 'device': device_path,
@@ -123,11 +207,13 @@ class SmartReader:
             
             return smart_info
             
+        except subprocess.TimeoutExpired:
+            return SmartReader._timeout_result(device_path, timeout)
         except Exception as e:
             return {'error': str(e)}
 
     @staticmethod
-    def _get_smart_windows(device_path):
+    def _get_smart_windows(device_path, timeout=None):
         """Liest SMART-Daten unter Windows"""
         try:
             # Extrahiere Disk-Nummer aus Path
@@ -170,12 +256,8 @@ class SmartReader:
             }
             """
             
-            result = subprocess.run(
-                ['powershell', '-Command', ps_script, '-DeviceNumber', disk_num],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            result = ToolRegistry.run('powershell', ['-Command', ps_script, '-DeviceNumber', disk_num],
+                                      timeout=timeout or 10)
             
             # Sichere Konvertierung der Werte
             def safe_int(value):
@@ -227,14 +309,10 @@ class SmartReader:
             return {'error': f'Fehler beim Lesen der Windows SMART-Daten: {str(e)}'}
 
     @staticmethod
-    def _get_smart_macos(device_path):
+    def _get_smart_macos(device_path, timeout=None):
         """Liest SMART-Daten unter macOS"""
         try:
-            result = subprocess.run(
-                ['smartctl', '-a', device_path],
-                capture_output=True,
-                text=True
-            )
+            result = ToolRegistry.run('smartctl', ['-a', device_path], timeout=timeout)
             
             # Ähnlich wie Linux-Parsing
             smart_info = {
@@ -258,6 +336,8 @@ class SmartReader:
             
             return smart_info
             
+        except subprocess.TimeoutExpired:
+            return SmartReader._timeout_result(device_path, timeout)
         except Exception as e:
             return {'error': f'Fehler beim Lesen der macOS SMART-Daten: {str(e)}'}
 
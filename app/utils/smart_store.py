@@ -0,0 +1,351 @@
+import hashlib
+import json
+from datetime import datetime
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import flag_modified
+from app import db
+from app.models import Disk, WipeLog, SmartSnapshot, SmartAttribute, SmartRawBlob
+from app.models.types import PayloadCodec
+from app.utils.smart_history import SmartHistory
+
+
+class SmartStore:
+    """
+    Speichert SMART-Auslesungen normalisiert (Snapshot + Attributzeilen)
+
+    Die smartctl-Rohausgabe landet komprimiert und dedupliziert in smart_raw_blobs,
+    die JSON-Spalten (Disk.smart_data, WipeLog.smart_data_*) enthalten nur noch
+    die kompakte Zusammenfassung ohne raw_data. Der zeitliche Verlauf wird über
+    SmartHistory fortgeschrieben.
+    """
+
+    # Felder, die nicht in die JSON-Spalten übernommen werden
+    RAW_FIELDS = ('raw_data', 'raw_output', 'raw_error')
+
+    # Phasen der Auslesungen zu einem Wipe
+    WIPE_PHASES = ('before', 'after')
+
+    # Vergleichsoperatoren für Flotten-Abfragen
+    OPERATORS = {
+        'gt': lambda column, value: column > value,
+        'ge': lambda column, value: column >= value,
+        'lt': lambda column, value: column < value,
+        'le': lambda column, value: column <= value,
+        'eq': lambda column, value: column == value,
+        'ne': lambda column, value: column != value,
+    }
+
+    @staticmethod
+    def compact(smart_data):
+        """Gibt eine Kopie der SMART-Daten ohne Rohausgabe zurück"""
+        return {key: value for key, value in smart_data.items() if key not in SmartStore.RAW_FIELDS}
+
+    @staticmethod
+    def to_json(smart_data):
+        """Kompakte JSON-Darstellung für die JSON-Spalten"""
+        return json.dumps(SmartStore.compact(smart_data))
+
+    @staticmethod
+    def save(disk, smart_data, phase='scan', wipe_log_id=None):
+        """
+        Übernimmt eine SMART-Auslesung in Disk.smart_data/smart_status und legt einen Snapshot an
+        Fehlerhafte Auslesungen werden ignoriert. Commit erfolgt durch den Aufrufer.
+        """
+        if not smart_data or 'error' in smart_data:
+            return None
+
+        disk.smart_data = SmartStore.to_json(smart_data)
+        disk.smart_status = smart_data.get('smart_status', 'UNKNOWN')
+        return SmartStore.record(disk, smart_data, phase, wipe_log_id)
+
+    @staticmethod
+    def record(disk, smart_data, phase='scan', wipe_log_id=None, captured_at=None):
+        """
+        Legt einen Snapshot mit Attributzeilen an (Commit durch den Aufrufer)
+        captured_at: Zeitpunkt der Auslesung, Standard jetzt (z.B. für migrierte Altdaten abweichend)
+        """
+        if not smart_data or 'error' in smart_data:
+            return None
+
+        if disk.id is None:
+            db.session.flush()
+
+        # Bisherige Scan-Auslesung ersetzen, Auslesungen zu Wipes bleiben erhalten
+        if phase == 'scan':
+            for old in SmartSnapshot.query.filter_by(disk_id=disk.id, phase='scan', wipe_log_id=None):
+                db.session.delete(old)
+
+        SmartSnapshot.query.filter_by(disk_id=disk.id, is_latest=True).update({'is_latest': False})
+
+        snapshot = SmartStore._build_snapshot(smart_data, captured_at)
+        snapshot.disk_id = disk.id
+        snapshot.wipe_log_id = wipe_log_id
+        snapshot.phase = phase
+
+        raw = smart_data.get('raw_data')
+        if raw:
+            snapshot.raw_blob = SmartStore.store_blob(raw if isinstance(raw, bytes) else raw.encode('utf-8'))
+
+        db.session.add(snapshot)
+        
+        # Jede Auslesung landet zusätzlich im (delta-kodierten) Verlauf
+        SmartHistory.append(disk.id, smart_data, snapshot.captured_at)
+        return snapshot
+
+    @staticmethod
+    def copy_latest(disk_id, wipe_log_id, phase='before'):
+        """Übernimmt die jüngste Auslesung einer Disk als Snapshot eines Wipes (z.B. Zustand vor dem Wipe)"""
+        latest = SmartSnapshot.query.filter_by(disk_id=disk_id, is_latest=True).first()
+        if not latest:
+            return None
+
+        snapshot = SmartSnapshot(
+            disk_id=disk_id,
+            wipe_log_id=wipe_log_id,
+            phase=phase,
+            captured_at=latest.captured_at,
+            is_latest=False,
+            smart_status=latest.smart_status,
+            model=latest.model,
+            serial=latest.serial,
+            firmware=latest.firmware,
+            power_on_hours=latest.power_on_hours,
+            power_cycle_count=latest.power_cycle_count,
+            temperature=latest.temperature,
+            raw_blob_id=latest.raw_blob_id,
+            attributes=[
+                SmartAttribute(attr_id=attribute.attr_id, name=attribute.name, value=attribute.value,
+                               worst=attribute.worst, thresh=attribute.thresh, raw=attribute.raw)
+                for attribute in latest.attributes
+            ]
+        )
+        db.session.add(snapshot)
+        return snapshot
+
+    @staticmethod
+    def _build_snapshot(smart_data, captured_at=None):
+        snapshot = SmartSnapshot(
+            captured_at=captured_at or datetime.utcnow(),
+            is_latest=True,
+            smart_status=smart_data.get('smart_status'),
+            model=smart_data.get('model'),
+            serial=smart_data.get('serial'),
+            firmware=smart_data.get('firmware'),
+            power_on_hours=SmartStore._to_int(smart_data.get('power_on_hours')),
+            power_cycle_count=SmartStore._to_int(smart_data.get('power_cycle_count')),
+            temperature=SmartStore._to_int(smart_data.get('temperature'))
+        )
+
+        for name, attribute in (smart_data.get('attributes') or {}).items():
+            if not isinstance(attribute, dict):
+                continue
+            snapshot.attributes.append(SmartAttribute(
+                attr_id=SmartStore._to_int(attribute.get('id')),
+                name=name,
+                value=SmartStore._to_int(attribute.get('value')),
+                worst=SmartStore._to_int(attribute.get('worst')),
+                thresh=SmartStore._to_int(attribute.get('thresh')),
+                raw=SmartStore._to_int(attribute.get('raw'))
+            ))
+
+        return snapshot
+
+    @staticmethod
+    def store_blob(data):
+        """Speichert Rohdaten komprimiert, identische Inhalte werden nur einmal abgelegt"""
+        digest = hashlib.sha256(data).hexdigest()
+        blob = SmartRawBlob.query.filter_by(sha256=digest).first()
+        if blob is None:
+            blob = SmartRawBlob(sha256=digest, data=PayloadCodec.compress(data), size_bytes=len(data))
+            db.session.add(blob)
+        return blob
+
+    @staticmethod
+    def load_raw(snapshot):
+        """Gibt die Rohausgabe eines Snapshots als Text zurück (oder None)"""
+        if not snapshot or not snapshot.raw_blob:
+            return None
+        return PayloadCodec.decompress(snapshot.raw_blob.data).decode('utf-8', 'replace')
+
+    @staticmethod
+    def raw_phases(wipe_log_id):
+        """Phasen (before/after), für die zu einem Wipe eine Rohausgabe gespeichert ist"""
+        phases = set()
+        for session, ids in SmartStore._wipe_sessions([wipe_log_id]):
+            phases.update(session.scalars(
+                select(SmartSnapshot.phase)
+                .where(SmartSnapshot.wipe_log_id.in_(ids),
+                       SmartSnapshot.phase.in_(SmartStore.WIPE_PHASES),
+                       SmartSnapshot.raw_blob_id.isnot(None))
+                .distinct()
+            ))
+        return phases
+
+    @staticmethod
+    def load_wipe_raw(wipe_log_ids, phases=None):
+        """
+        Rohausgaben der Auslesungen vor/nach mehreren (auch archivierten) Wipes
+        Returns: {wipe_log_id: {phase: Text}}, bei mehreren Snapshots einer Phase gilt der jüngste
+        """
+        raw = {}
+        for session, ids in SmartStore._wipe_sessions(wipe_log_ids):
+            snapshots = session.scalars(
+                select(SmartSnapshot)
+                .options(joinedload(SmartSnapshot.raw_blob))
+                .where(SmartSnapshot.wipe_log_id.in_(ids),
+                       SmartSnapshot.phase.in_(phases or SmartStore.WIPE_PHASES),
+                       SmartSnapshot.raw_blob_id.isnot(None))
+                .order_by(SmartSnapshot.id)
+            )
+            for snapshot in snapshots:
+                raw.setdefault(snapshot.wipe_log_id, {})[snapshot.phase] = SmartStore.load_raw(snapshot)
+        return raw
+
+    @staticmethod
+    def _wipe_sessions(wipe_log_ids):
+        """(Session, IDs): erst die aktive Datenbank, dann die Archivdateien der archivierten Wipes"""
+        # Zirkulärer Import (WipeArchive nutzt SmartStore)
+        from app.utils.wipe_archive import WipeArchive
+
+        wipe_log_ids = list(wipe_log_ids)
+        active = {row.id for row in db.session.query(WipeLog.id).filter(WipeLog.id.in_(wipe_log_ids))}
+        if active:
+            yield db.session, list(active)
+        archived = [wipe_log_id for wipe_log_id in wipe_log_ids if wipe_log_id not in active]
+        if archived:
+            yield from WipeArchive.sessions(archived)
+
+    @staticmethod
+    def prune_blobs():
+        """Entfernt Blobs, auf die kein Snapshot mehr verweist"""
+        referenced = db.session.query(SmartSnapshot.raw_blob_id).filter(SmartSnapshot.raw_blob_id.isnot(None))
+        return SmartRawBlob.query.filter(~SmartRawBlob.id.in_(referenced)).delete(synchronize_session=False)
+
+    @staticmethod
+    def fleet_query(attribute, op='gt', value=0):
+        """
+        Sucht Disks, deren jüngste Auslesung die Bedingung erfüllt
+        attribute: Attribut-ID (z.B. 5) oder Name (z.B. 'Reallocated_Sector_Ct'), verglichen wird der Raw-Wert
+        Returns: Liste von (Disk, SmartAttribute)
+        """
+        if op not in SmartStore.OPERATORS:
+            raise ValueError(f"Ungültiger Operator: {op}")
+
+        if str(attribute).isdigit():
+            attribute_filter = SmartAttribute.attr_id == int(attribute)
+        else:
+            attribute_filter = SmartAttribute.name == attribute
+
+        return (
+            db.session.query(Disk, SmartAttribute)
+            .join(SmartSnapshot, SmartSnapshot.disk_id == Disk.id)
+            .join(SmartAttribute, SmartAttribute.snapshot_id == SmartSnapshot.id)
+            .filter(SmartSnapshot.is_latest.is_(True))
+            .filter(attribute_filter)
+            .filter(SmartStore.OPERATORS[op](SmartAttribute.raw, value))
+            .order_by(SmartAttribute.raw.desc())
+            .all()
+        )
+
+    @staticmethod
+    def migrate_legacy(batch_size=100):
+        """
+        Verschiebt raw_data aus bestehenden JSON-Spalten in Snapshots/Blobs
+        Läuft beim Start, bereits migrierte Zeilen enthalten kein raw_data mehr
+        """
+        migrated = 0
+
+        for disk in SmartStore._legacy_rows(Disk, Disk.smart_data, batch_size):
+            smart_data = SmartStore._loads(disk.smart_data)
+            if smart_data is not None:
+                # Auslesung stammt vom letzten Scan der Disk, nicht von der Migration
+                SmartStore.record(disk, smart_data, captured_at=disk.last_seen)
+            disk.smart_data = SmartStore.to_json(smart_data) if smart_data is not None else None
+            # last_seen unverändert mitschreiben, sonst setzt onupdate den Zeitpunkt der Migration
+            flag_modified(disk, 'last_seen')
+            migrated += 1
+
+        for column, phase in ((WipeLog.smart_data_before, 'before'), (WipeLog.smart_data_after, 'after')):
+            for wipe_log in SmartStore._legacy_rows(WipeLog, column, batch_size):
+                smart_data = SmartStore._loads(getattr(wipe_log, column.key))
+                if smart_data is not None and 'error' not in smart_data:
+                    snapshot = SmartStore._build_snapshot(smart_data)
+                    snapshot.disk_id = wipe_log.disk_id
+                    snapshot.wipe_log_id = wipe_log.id
+                    snapshot.phase = phase
+                    snapshot.is_latest = False
+                    snapshot.captured_at = wipe_log.start_time if phase == 'before' else wipe_log.end_time
+                    raw = smart_data.get('raw_data')
+                    if raw:
+                        snapshot.raw_blob = SmartStore.store_blob(raw.encode('utf-8'))
+                    db.session.add(snapshot)
+                setattr(wipe_log, column.key, SmartStore.to_json(smart_data) if smart_data is not None else None)
+                migrated += 1
+
+        return migrated
+
+    @staticmethod
+    def migrate_compression(batch_size=500):
+        """
+        Schreibt unkomprimierte Altwerte der JSON-Spalten komprimiert zurück (siehe CompressedText)
+        Nach migrate_legacy aufrufen, dessen Suche nach raw_data trifft nur unkomprimierte Werte
+        Returns: Anzahl umgeschriebener Werte
+        """
+        migrated = 0
+        columns = (Disk.smart_data, WipeLog.smart_data_before, WipeLog.smart_data_after, WipeLog.verification_data)
+
+        for column in columns:
+            model = column.class_
+            last_id = 0
+            while True:
+                rows = db.session.execute(
+                    select(model.id, column)
+                    .where(func.typeof(column) == 'text', model.id > last_id)
+                    .order_by(model.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+
+                # ORM-Sammel-Update per Primärschlüssel, der Spaltentyp komprimiert beim Schreiben
+                db.session.execute(update(model), [{'id': row_id, column.key: value} for row_id, value in rows])
+                db.session.commit()
+                last_id = rows[-1][0]
+                migrated += len(rows)
+
+        return migrated
+
+    @staticmethod
+    def _legacy_rows(model, column, batch_size):
+        """Liefert Zeilen mit raw_data in der JSON-Spalte, Commit nach jedem Batch"""
+        last_id = 0
+        while True:
+            rows = (model.query
+                    .filter(column.like('%"raw_data"%'), model.id > last_id)
+                    .order_by(model.id)
+                    .limit(batch_size)
+                    .all())
+            if not rows:
+                return
+            for row in rows:
+                yield row
+            last_id = rows[-1].id
+            db.session.commit()
+
+    @staticmethod
+    def _loads(value):
+        try:
+            smart_data = json.loads(value) if value else None
+            return smart_data if isinstance(smart_data, dict) else None
+        except (ValueError, TypeError):
+            return None
+
+    @staticmethod
+    def _to_int(value):
+        if value is None or value == '' or isinstance(value, bool):
+            return None
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            return None
@@ -0,0 +1,507 @@
+import os
+import tempfile
+import time
+
+
+class SysfsScanner:
+    """
+    Liest Block-Devices direkt aus sysfs/procfs (Linux) ohne externe Prozesse
+
+    Alle Wurzelverzeichnisse sind konfigurierbar (configure() bzw. SYSFS_ROOT,
+    PROCFS_ROOT, DEVFS_ROOT, UDEV_ROOT), damit der Scanner gegen einen
+    nachgebildeten sysfs-Baum (Fixture) laufen kann, siehe self_test().
+    """
+
+    # Mountpoints, deren Quell-Disk als Boot-Disk gilt
+    BOOT_MOUNTPOINTS = ('/', '/boot', '/boot/efi')
+
+    # Virtuelle bzw. nicht löschbare Geräte, die lsblk nicht als TYPE=disk meldet
+    IGNORED_PREFIXES = ('loop', 'ram', 'zram', 'sr', 'fd', 'md', 'dm-', 'nbd')
+
+    # Standard-Wurzelverzeichnisse neuer Scanner (siehe configure)
+    _roots = {'sys_root': '/sys', 'proc_root': '/proc', 'dev_root': '/dev', 'udev_root': '/run/udev'}
+
+    def __init__(self, sys_root=None, proc_root=None, dev_root=None, udev_root=None):
+        self.sys_root = sys_root or SysfsScanner._roots['sys_root']
+        self.proc_root = proc_root or SysfsScanner._roots['proc_root']
+        self.dev_root = dev_root or SysfsScanner._roots['dev_root']
+        self.udev_root = udev_root or SysfsScanner._roots['udev_root']
+
+    @staticmethod
+    def configure(sys_root=None, proc_root=None, dev_root=None, udev_root=None):
+        """Setzt die Wurzelverzeichnisse für alle danach erstellten Scanner (None = unverändert)"""
+        roots = {'sys_root': sys_root, 'proc_root': proc_root, 'dev_root': dev_root, 'udev_root': udev_root}
+        SysfsScanner._roots.update({key: value for key, value in roots.items() if value})
+
+    @property
+    def block_root(self):
+        return os.path.join(self.sys_root, 'block')
+
+    def is_available(self):
+        """Prüft ob sysfs lesbar ist"""
+        return os.path.isdir(self.block_root)
+
+    def scan(self):
+        """
+        Gibt alle physischen Festplatten zurück
+        Format entspricht dem disk_info-Dict von DiskManager._get_linux_disks
+        """
+        mounts = self.read_mounts()
+        boot_devices = self._boot_devices(mounts)
+        by_id = self.read_by_id()
+
+        disks = []
+        for name in self.list_disk_names():
+            disk_info = self._build_disk_info(name, mounts, boot_devices, by_id)
+            if disk_info:
+                disks.append(disk_info)
+
+        return disks
+
+    def scan_device(self, name):
+        """Liest genau ein Gerät (z.B. 'sdb'), gibt None zurück wenn es keine Disk ist"""
+        if name not in self.list_disk_names():
+            return None
+
+        mounts = self.read_mounts()
+        return self._build_disk_info(name, mounts, self._boot_devices(mounts), self.read_by_id())
+
+    def list_block_devices(self):
+        """Alle Einträge unter /sys/block (inkl. virtueller Geräte)"""
+        try:
+            return sorted(os.listdir(self.block_root))
+        except OSError:
+            return []
+
+    def list_disk_names(self):
+        """Namen aller physischen Festplatten unter /sys/block"""
+        names = []
+        for name in self.list_block_devices():
+            if name.startswith(self.IGNORED_PREFIXES):
+                continue
+
+            base = os.path.join(self.block_root, name)
+
+            # Virtuelle Geräte (loop, dm, md, ...) haben keinen device-Link
+            if not os.path.exists(os.path.join(base, 'device')):
+                continue
+
+            # Versteckte NVMe-Multipath-Pfade (nvme0c0n1) überspringen
+            if self._read(os.path.join(base, 'hidden')) == '1':
+                continue
+
+            names.append(name)
+
+        return names
+
+    def list_partitions(self, name):
+        """Partitionen einer Disk (Unterverzeichnisse mit 'partition'-Datei)"""
+        base = os.path.join(self.block_root, name)
+        partitions = []
+        try:
+            entries = sorted(os.listdir(base))
+        except OSError:
+            return partitions
+
+        for entry in entries:
+            if os.path.exists(os.path.join(base, entry, 'partition')):
+                partitions.append(entry)
+
+        return partitions
+
+    def holders_of(self, name, partition_of=None):
+        """Direkte Holder (dm/md) eines Geräts bzw. einer Partition"""
+        if partition_of:
+            path = os.path.join(self.block_root, partition_of, name, 'holders')
+        else:
+            path = os.path.join(self.block_root, name, 'holders')
+
+        try:
+            return sorted(os.listdir(path))
+        except OSError:
+            return []
+
+    def stacked_devices(self, name, partitions=None):
+        """
+        Alle Geräte, die rekursiv auf einer Disk bzw. ihren Partitionen aufsetzen
+        (dm-crypt -> LVM -> ..., md-RAID)
+        """
+        if partitions is None:
+            partitions = self.list_partitions(name)
+
+        stack = list(self.holders_of(name))
+        for part in partitions:
+            stack.extend(self.holders_of(part, partition_of=name))
+
+        seen = set()
+        while stack:
+            holder = stack.pop()
+            if holder in seen:
+                continue
+            seen.add(holder)
+            stack.extend(self.holders_of(holder))
+
+        return seen
+
+    def device_number(self, name, partition_of=None):
+        """Gibt 'major:minor' eines Geräts zurück"""
+        if partition_of:
+            return self._read(os.path.join(self.block_root, partition_of, name, 'dev'))
+        return self._read(os.path.join(self.block_root, name, 'dev'))
+
+    def read_mounts(self):
+        """
+        Parst /proc/self/mountinfo
+        Returns: Liste von Dicts mit 'dev' (major:minor), 'source' und 'mountpoint'
+        """
+        mounts = []
+        content = self._read(os.path.join(self.proc_root, 'self', 'mountinfo'), strip=False)
+        if not content:
+            return mounts
+
+        for line in content.splitlines():
+            fields = line.split()
+            if len(fields) < 7 or '-' not in fields:
+                continue
+
+            separator = fields.index('-')
+            mounts.append({
+                'dev': fields[2],
+                'mountpoint': self._unescape(fields[4]),
+                'fstype': fields[separator + 1] if len(fields) > separator + 1 else '',
+                'source': self._unescape(fields[separator + 2]) if len(fields) > separator + 2 else ''
+            })
+
+        return mounts
+
+    def read_swaps(self):
+        """Aktive Swap-Geräte aus /proc/swaps"""
+        swaps = []
+        content = self._read(os.path.join(self.proc_root, 'swaps'), strip=False)
+        if not content:
+            return swaps
+
+        for line in content.splitlines()[1:]:
+            fields = line.split()
+            if fields and fields[1:2] == ['partition']:
+                swaps.append(self._unescape(fields[0]))
+
+        return swaps
+
+    def read_by_id(self):
+        """Mapping Kernel-Name -> sortierte Liste der /dev/disk/by-id Links"""
+        by_id = {}
+        path = os.path.join(self.dev_root, 'disk', 'by-id')
+        try:
+            entries = os.listdir(path)
+        except OSError:
+            return by_id
+
+        for entry in entries:
+            try:
+                target = os.path.basename(os.readlink(os.path.join(path, entry)))
+            except OSError:
+                continue
+            by_id.setdefault(target, []).append(entry)
+
+        for links in by_id.values():
+            links.sort()
+
+        return by_id
+
+    def read_udev_properties(self, dev_number):
+        """Liest die udev-Datenbank (/run/udev/data/b<major>:<minor>) - Quelle von lsblk"""
+        properties = {}
+        if not dev_number:
+            return properties
+
+        content = self._read(os.path.join(self.udev_root, 'data', f'b{dev_number}'), strip=False)
+        if not content:
+            return properties
+
+        for line in content.splitlines():
+            if line.startswith('E:') and '=' in line:
+                key, value = line[2:].split('=', 1)
+                properties[key] = value
+
+        return properties
+
+    def resolve_source(self, source):
+        """Löst eine Mount-Quelle (/dev/mapper/x, /dev/disk/by-uuid/...) auf den Kernel-Namen auf"""
+        if not source.startswith('/dev/'):
+            return None
+
+        relative = source[len('/dev/'):]
+        path = os.path.join(self.dev_root, relative)
+        try:
+            if os.path.islink(path):
+                return os.path.basename(os.path.realpath(path))
+        except OSError:
+            pass
+
+        return os.path.basename(relative)
+
+    def _build_disk_info(self, name, mounts, boot_devices, by_id):
+        """Baut das disk_info-Dict für ein Gerät aus sysfs, udev-DB und by-id"""
+        base = os.path.join(self.block_root, name)
+        dev_number = self._read(os.path.join(base, 'dev'))
+        udev = self.read_udev_properties(dev_number)
+
+        try:
+            size_bytes = int(self._read(os.path.join(base, 'size')) or 0) * 512
+        except ValueError:
+            size_bytes = 0
+
+        partitions = []
+        for part in self.list_partitions(name):
+            part_number = self.device_number(part, partition_of=name)
+            try:
+                part_size = int(self._read(os.path.join(base, part, 'size')) or 0) * 512
+            except ValueError:
+                part_size = 0
+
+            partitions.append({
+                'name': part,
+                'size': part_size,
+                'type': 'part',
+                'mountpoint': self._mountpoint_for(part, part_number, mounts),
+                'holders': self.holders_of(part, partition_of=name)
+            })
+
+        device_path = f"/dev/{name}"
+        is_boot = self._is_boot_disk(name, dev_number, partitions, boot_devices)
+
+        return {
+            'device_path': device_path,
+            'model': self._model(base, udev),
+            'serial_number': self._serial(base, name, udev, by_id),
+            'size_bytes': size_bytes,
+            'size_human': self._format_size(size_bytes),
+            'is_boot_disk': is_boot,
+            'partitions': partitions,
+            'wwid': self._wwid(base, udev),
+            'rotational': self._read(os.path.join(base, 'queue', 'rotational')) == '1',
+            'removable': self._read(os.path.join(base, 'removable')) == '1',
+            'transport': self._transport(name, base, udev),
+            'holders': self.holders_of(name),
+            'by_id': by_id.get(name, [])
+        }
+
+    def _boot_devices(self, mounts):
+        """Menge der Kernel-Namen und Gerätenummern, die Boot-Mountpoints tragen"""
+        devices = set()
+        for mount in mounts:
+            if mount['mountpoint'] in self.BOOT_MOUNTPOINTS:
+                devices.add(mount['dev'])
+                resolved = self.resolve_source(mount['source'])
+                if resolved:
+                    devices.add(resolved)
+        return devices
+
+    def _is_boot_disk(self, name, dev_number, partitions, boot_devices):
+        """Disk ist Boot-Disk, wenn sie selbst, eine Partition oder ein Holder (LVM/RAID) / oder /boot trägt"""
+        if name in boot_devices or dev_number in boot_devices:
+            return True
+
+        if any(part['mountpoint'] in self.BOOT_MOUNTPOINTS for part in partitions):
+            return True
+
+        for part in partitions:
+            if part['name'] in boot_devices:
+                return True
+
+        for holder in self.stacked_devices(name, [part['name'] for part in partitions]):
+            if holder in boot_devices or self.device_number(holder) in boot_devices:
+                return True
+
+        return False
+
+    def _mountpoint_for(self, name, dev_number, mounts):
+        for mount in mounts:
+            if mount['dev'] == dev_number or self.resolve_source(mount['source']) == name:
+                return mount['mountpoint']
+        return None
+
+    def _model(self, base, udev):
+        model = udev.get('ID_MODEL_ENC')
+        if model:
+            model = self._unescape(model)
+        else:
+            model = self._read(os.path.join(base, 'device', 'model'))
+        return (model or 'Unknown').strip()
+
+    def _serial(self, base, name, udev, by_id):
+        """Seriennummer: udev-DB -> sysfs -> VPD Page 0x80 -> by-id Link -> Fallback"""
+        serial = udev.get('ID_SERIAL_SHORT') or udev.get('ID_SERIAL')
+        if serial:
+            return serial.strip()
+
+        serial = self._read(os.path.join(base, 'device', 'serial'))
+        if serial:
+            return serial
+
+        serial = self._read_vpd_serial(os.path.join(base, 'device', 'vpd_pg80'))
+        if serial:
+            return serial
+
+        for link in by_id.get(name, []):
+            if link.startswith('nvme-eui.'):
+                continue
+            if link.startswith(('ata-', 'nvme-', 'scsi-SATA_')) and '_' in link:
+                return link.rsplit('_', 1)[1]
+
+        # Fallback: Verwende Device-Path als eindeutigen Identifier (wie bisher)
+        return f"UNKNOWN__dev_{name}"
+
+    def _read_vpd_serial(self, path):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # Byte 3 = Länge, Seriennummer ab Byte 4
+        if len(data) < 4:
+            return None
+        serial = data[4:4 + data[3]].decode('ascii', errors='ignore').strip()
+        return serial or None
+
+    def _wwid(self, base, udev):
+        wwid = self._read(os.path.join(base, 'wwid')) or self._read(os.path.join(base, 'device', 'wwid'))
+        return wwid or udev.get('ID_WWN')
+
+    def _transport(self, name, base, udev):
+        if name.startswith('nvme'):
+            return 'nvme'
+        if name.startswith('mmcblk'):
+            return 'mmc'
+        if name.startswith('vd'):
+            return 'virtio'
+
+        bus = udev.get('ID_BUS')
+        if bus == 'ata':
+            return 'sata'
+        if bus:
+            return bus
+
+        try:
+            real = os.path.realpath(base)
+        except OSError:
+            return None
+
+        if '/usb' in real:
+            return 'usb'
+        if '/ata' in real:
+            return 'sata'
+        if '/virtio' in real:
+            return 'virtio'
+        return None
+
+    @staticmethod
+    def build_fixture(root):
+        """
+        Bildet unter root einen kleinen sysfs-/procfs-/dev-/udev-Baum nach:
+        sda (SATA, / über dm-crypt auf sda2), nvme0n1, sdb (USB, Seriennummer nur im by-id-Link),
+        dazu loop0, dm-0 und den versteckten Multipath-Pfad nvme0c0n1, die keine Disks sind
+        Returns: (Scanner auf den Baum, erwartete Angaben je device_path)
+        """
+        def write(path, content=''):
+            path = os.path.join(root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(content)
+
+        def disk(name, dev, size, **files):
+            write(f'sys/block/{name}/dev', f'{dev}\n')
+            write(f'sys/block/{name}/size', f'{size}\n')
+            os.makedirs(os.path.join(root, 'sys', 'block', name, 'device'), exist_ok=True)
+            for path, content in files.items():
+                write(f'sys/block/{name}/{path.replace("__", "/")}', f'{content}\n')
+
+        disk('sda', '8:0', 976773168, queue__rotational='0', removable='0', device__model='Samsung SSD 860')
+        write('sys/block/sda/sda1/partition', '1\n')
+        write('sys/block/sda/sda1/dev', '8:1\n')
+        write('sys/block/sda/sda1/size', '1048576\n')
+        write('sys/block/sda/sda2/partition', '2\n')
+        write('sys/block/sda/sda2/dev', '8:2\n')
+        write('sys/block/sda/sda2/size', '975722496\n')
+        os.makedirs(os.path.join(root, 'sys', 'block', 'sda', 'sda2', 'holders', 'dm-0'))
+        write('run/udev/data/b8:0', 'E:ID_BUS=ata\nE:ID_SERIAL_SHORT=S3Z9NB0K123\nE:ID_MODEL_ENC=Samsung\\x20SSD\\x20860\n')
+
+        disk('nvme0n1', '259:0', 2000409264, queue__rotational='0', removable='0',
+             device__model='Fast NVMe', device__serial='NVME123')
+        disk('nvme0c0n1', '259:1', 2000409264, hidden='1')
+        disk('sdb', '8:16', 60063744, queue__rotational='1', removable='1', device__model='USB Stick')
+        write('sys/block/loop0/dev', '7:0\n')
+        write('sys/block/dm-0/dev', '253:0\n')
+
+        write('proc/self/mountinfo',
+              '22 1 253:0 / / rw,relatime shared:1 - ext4 /dev/mapper/root rw\n')
+        write('proc/swaps', 'Filename\tType\tSize\tUsed\tPriority\n')
+        os.makedirs(os.path.join(root, 'dev', 'mapper'))
+        os.symlink('../dm-0', os.path.join(root, 'dev', 'mapper', 'root'))
+        os.makedirs(os.path.join(root, 'dev', 'disk', 'by-id'))
+        os.symlink('../../sdb', os.path.join(root, 'dev', 'disk', 'by-id', 'ata-WDC_WD40_WD-ABC123'))
+
+        scanner = SysfsScanner(os.path.join(root, 'sys'), os.path.join(root, 'proc'),
+                               os.path.join(root, 'dev'), os.path.join(root, 'run', 'udev'))
+        expected = {
+            '/dev/nvme0n1': {'serial_number': 'NVME123', 'model': 'Fast NVMe', 'size_bytes': 2000409264 * 512,
+                             'transport': 'nvme', 'is_boot_disk': False, 'rotational': False, 'removable': False},
+            '/dev/sda': {'serial_number': 'S3Z9NB0K123', 'model': 'Samsung SSD 860', 'size_bytes': 976773168 * 512,
+                         'transport': 'sata', 'is_boot_disk': True, 'rotational': False, 'removable': False},
+            '/dev/sdb': {'serial_number': 'WD-ABC123', 'model': 'USB Stick', 'size_bytes': 60063744 * 512,
+                         'is_boot_disk': False, 'rotational': True, 'removable': True,
+                         'by_id': ['ata-WDC_WD40_WD-ABC123']},
+        }
+        return scanner, expected
+
+    @staticmethod
+    def self_test():
+        """
+        Scannt den Fixture-Baum aus build_fixture() in einem temporären Verzeichnis
+        Returns: (Liste der Abweichungen, Dauer des Scans in ms)
+        """
+        with tempfile.TemporaryDirectory() as root:
+            scanner, expected = SysfsScanner.build_fixture(root)
+            started = time.perf_counter()
+            disks = {disk_info['device_path']: disk_info for disk_info in scanner.scan()}
+            duration_ms = (time.perf_counter() - started) * 1000
+
+        errors = []
+        if sorted(disks) != sorted(expected):
+            errors.append(f"Gefundene Disks {sorted(disks)}, erwartet {sorted(expected)}")
+        for device_path, fields in expected.items():
+            disk_info = disks.get(device_path, {})
+            for field, value in fields.items():
+                if disk_info.get(field) != value:
+                    errors.append(f"{device_path} {field}: {disk_info.get(field)!r}, erwartet {value!r}")
+        return errors, round(duration_ms, 2)
+
+    @staticmethod
+    def _read(path, strip=True):
+        try:
+            with open(path, 'r', errors='replace') as f:
+                content = f.read()
+        except OSError:
+            return None
+        return content.strip() if strip else content
+
+    @staticmethod
+    def _unescape(value):
+        """Dekodiert Oktal- (\\040) und Hex-Escapes (\\x20) aus mountinfo/udev"""
+        if '\\' not in value:
+            return value
+        try:
+            return value.encode('latin-1').decode('unicode_escape')
+        except UnicodeError:
+            return value
+
+    @staticmethod
+    def _format_size(size_bytes):
+        """Formatiert Byte-Größe in menschenlesbare Form"""
+        for unit in ['B', 'KB', 'MB', 'GB', 'TB', 'PB']:
+            if size_bytes < 1024.0:
+                return f"{size_bytes:.2f} {unit}"
+            size_bytes /= 1024.0
+        return f"{size_bytes:.2f} PB"
@@ -0,0 +1,231 @@
+import os
+import re
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from app.database import SqliteProfile
+
+
+class ToolRegistry:
+    """
+    Zentrale Verwaltung externer Programme (smartctl, nvme, blkdiscard, ...)
+
+    Pfade, Versionen und unterstützte Features werden einmalig ermittelt.
+    Alle Aufrufe laufen über run(): begrenzte Parallelität pro Tool und gesamt,
+    Deadline inkl. Wartezeit auf einen freien Slot, Kill bei Timeout.
+    Löschende Tools (destructive) warten ohne Deadline auf ihren Slot, die Deadline
+    gilt erst ab dem Start, und sie bekommen mindestens so viele Slots wie Wipe-Threads.
+    """
+
+    # name -> Versionsaufruf, Regex für die Versionsnummer, max. parallele Aufrufe
+    TOOLS = {
+        'smartctl': {'version_args': ['--version'], 'version_pattern': r'smartctl (\d+)\.(\d+)', 'concurrency': 8},
+        'nvme': {'version_args': ['version'], 'version_pattern': r'version v?(\d+)\.(\d+)', 'concurrency': 4,
+                 'destructive': True},
+        'blkdiscard': {'version_args': ['--version'], 'version_pattern': r'util-linux (\d+)\.(\d+)', 'concurrency': 4,
+                       'destructive': True},
+        'lsblk': {'version_args': ['--version'], 'version_pattern': r'util-linux (\d+)\.(\d+)', 'concurrency': 4},
+        'udevadm': {'version_args': ['--version'], 'version_pattern': r'(\d+)', 'concurrency': 4},
+        'powershell': {'version_args': None, 'version_pattern': None, 'concurrency': 4},
+        'diskutil': {'version_args': None, 'version_pattern': None, 'concurrency': 2},
+    }
+
+    DEFAULT_TIMEOUT = 30  # Sekunden
+    PROBE_TIMEOUT = 5
+    MAX_CONCURRENT = 16
+
+    _tools = None
+    _search_path = None
+    _wipe_threads = 0
+    _lock = threading.Lock()
+    _probe_lock = threading.Lock()
+    _semaphores = {}
+    _global_semaphore = threading.BoundedSemaphore(MAX_CONCURRENT)
+
+    @staticmethod
+    def configure(search_path=None, max_concurrent=None, wipe_threads=None):
+        """
+        Setzt den Suchpfad (wird PATH vorangestellt, z.B. für Stub-Tools) und verwirft
+        bisherige Ergebnisse, der nächste Zugriff ermittelt alle Tools neu
+        wipe_threads: Mindestzahl Slots der löschenden Tools (MAX_WIPE_THREADS)
+        """
+        with ToolRegistry._lock:
+            ToolRegistry._search_path = search_path
+            ToolRegistry._wipe_threads = wipe_threads or 0
+            ToolRegistry._tools = None
+            if max_concurrent:
+                ToolRegistry._global_semaphore = threading.BoundedSemaphore(max_concurrent)
+
+    @staticmethod
+    def probe():
+        """Ermittelt Pfad, Version und Features aller bekannten Tools"""
+        path = os.environ.get('PATH', os.defpath)
+        if ToolRegistry._search_path:
+            path = ToolRegistry._search_path + os.pathsep + path
+
+        tools = {}
+        for name, spec in ToolRegistry.TOOLS.items():
+            tools[name] = ToolRegistry._probe_tool(name, spec, path)
+
+        with ToolRegistry._lock:
+            ToolRegistry._tools = tools
+            ToolRegistry._semaphores = {
+                name: threading.BoundedSemaphore(ToolRegistry._concurrency(spec))
+                for name, spec in ToolRegistry.TOOLS.items()
+            }
+        return tools
+
+    @staticmethod
+    def _concurrency(spec):
+        if spec.get('destructive'):
+            # Jeder Wipe-Thread muss sein Tool sofort starten können
+            return max(spec['concurrency'], ToolRegistry._wipe_threads)
+        return spec['concurrency']
+
+    @staticmethod
+    def _probe_tool(name, spec, path):
+        info = {'path': shutil.which(name, path=path), 'version': None, 'features': set()}
+        if not info['path'] or not spec['version_args']:
+            return info
+
+        try:
+            result = subprocess.run(
+                [info['path']] + spec['version_args'],
+                capture_output=True,
+                text=True,
+                timeout=ToolRegistry.PROBE_TIMEOUT
+            )
+            match = re.search(spec['version_pattern'], result.stdout + result.stderr)
+            if match:
+                info['version'] = tuple(int(part) for part in match.groups())
+        except Exception as e:
+            print(f"Version von {name} konnte nicht ermittelt werden: {e}")
+
+        version = info['version'] or (0,)
+        if name == 'smartctl' and version >= (7, 0):
+            # JSON-Ausgabe (-j) gibt es ab smartmontools 7.0
+            info['features'].add('json')
+        elif name == 'lsblk' and version >= (2, 27):
+            info['features'].add('json')
+
+        return info
+
+    @staticmethod
+    def _ensure_probed():
+        # Nur ein Thread ermittelt die Tools, sonst ersetzen sich die Slot-Semaphoren gegenseitig
+        if ToolRegistry._tools is None:
+            with ToolRegistry._probe_lock:
+                if ToolRegistry._tools is None:
+                    ToolRegistry.probe()
+
+    @staticmethod
+    def get(name):
+        """Gibt die Tool-Info (path, version, features) zurück"""
+        ToolRegistry._ensure_probed()
+        return ToolRegistry._tools.get(name) or {'path': None, 'version': None, 'features': set()}
+
+    @staticmethod
+    def available(name):
+        return ToolRegistry.get(name)['path'] is not None
+
+    @staticmethod
+    def has_feature(name, feature):
+        return feature in ToolRegistry.get(name)['features']
+
+    @staticmethod
+    def status():
+        """Übersicht aller Tools (z.B. für Diagnose-Ausgaben)"""
+        ToolRegistry._ensure_probed()
+        return {
+            name: {
+                'path': info['path'],
+                'version': '.'.join(str(part) for part in info['version']) if info['version'] else None,
+                'features': sorted(info['features'])
+            }
+            for name, info in ToolRegistry._tools.items()
+        }
+
+    @staticmethod
+    def run(name, args, timeout=None, check=False, text=True, input=None):
+        """
+        Führt ein Tool aus (Ersatz für subprocess.run mit capture_output)
+
+        Wirft FileNotFoundError wenn das Tool fehlt, subprocess.TimeoutExpired wenn
+        die Deadline (inkl. Wartezeit auf einen Slot, außer bei löschenden Tools)
+        überschritten wird und subprocess.CalledProcessError bei check=True und Exit-Code != 0.
+        """
+        path = ToolRegistry.get(name)['path']
+        if not path:
+            raise FileNotFoundError(f"{name} nicht gefunden")
+
+        if SqliteProfile.holds_writer():
+            # Offene Schreib-Transaktion blockiert alle anderen Schreiber bis das Tool fertig ist
+            print(f"Warnung: {name} wird mit offener Schreib-Transaktion aufgerufen, vorher committen")
+
+        timeout = timeout or ToolRegistry.DEFAULT_TIMEOUT
+        deadline = time.monotonic() + timeout
+        command = [path] + list(args)
+        # Ein Timeout beim Warten würde einen Wipe abbrechen, bevor überhaupt gelöscht wurde
+        wait = ToolRegistry.TOOLS.get(name, {}).get('destructive', False)
+
+        semaphore = ToolRegistry._semaphores.get(name)
+        if semaphore and not semaphore.acquire(timeout=None if wait else timeout):
+            raise subprocess.TimeoutExpired(command, timeout)
+        try:
+            global_semaphore = ToolRegistry._global_semaphore
+            if not global_semaphore.acquire(timeout=None if wait else max(0, deadline - time.monotonic())):
+                raise subprocess.TimeoutExpired(command, timeout)
+            try:
+                if wait:
+                    deadline = time.monotonic() + timeout
+                return ToolRegistry._execute(command, deadline, timeout, check, text, input)
+            finally:
+                global_semaphore.release()
+        finally:
+            if semaphore:
+                semaphore.release()
+
+    @staticmethod
+    def _execute(command, deadline, timeout, check, text, input):
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=text,
+            # Eigene Prozessgruppe, damit bei Timeout auch Kindprozesse beendet werden
+            start_new_session=os.name != 'nt'
+        )
+
+        try:
+            stdout, stderr = process.communicate(input=input, timeout=max(0.1, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            # Hängende Prozesse (z.B. smartctl an einem blockierten Controller) nicht zurücklassen
+            ToolRegistry._kill(process)
+            raise subprocess.TimeoutExpired(command, timeout)
+        except BaseException:
+            ToolRegistry._kill(process)
+            raise
+
+        if check and process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+
+        return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+    @staticmethod
+    def _kill(process):
+        try:
+            if os.name != 'nt':
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+
+        try:
+            process.communicate(timeout=5)
+        except subprocess.TimeoutExpired:
+            # Prozess hängt im Kernel (D-State), Pipes nicht weiter abwarten
+            pass
@@ -0,0 +1,278 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.database import SqliteProfile, upgrade_tables
+from app.models import ArchivedWipe, WipeLog, SmartSnapshot, SmartAttribute, SmartRawBlob
+from app.utils.search_index import SearchIndex
+from app.utils.smart_store import SmartStore
+
+
+class WipeArchive:
+    """
+    Archivierung alter Wipe-Vorgänge in Monatsdateien (wipes_YYYY_MM.db)
+
+    Abgeschlossene Wipes älter als ARCHIVE_AFTER_DAYS werden per ATTACH in die
+    Archivdatei ihres Startmonats kopiert und aus der aktiven Datenbank
+    entfernt, dort bleibt nur ein Katalogeintrag (archived_wipes) für Suche,
+    Kennzahlen und das Auffinden der Datei. Die SMART-Snapshots der Wipes
+    (Attribute und smartctl-Rohausgabe) ziehen mit in die Archivdatei um.
+    get(), load() und search() liefern aktive und archivierte Wipes
+    gemeinsam, archivierte als losgelöste WipeLog-Objekte mit archived=True.
+    """
+
+    STATUSES = ('completed', 'failed')
+    ALIAS = 'archive'
+    # Tabellen einer Archivdatei (Snapshots verweisen auf Blobs, Attribute auf Snapshots)
+    TABLES = (WipeLog.__table__, SmartRawBlob.__table__, SmartSnapshot.__table__, SmartAttribute.__table__)
+
+    _engines = {}
+    _lock = threading.Lock()
+    _last_run = None
+    _run_lock = threading.Lock()
+
+    @staticmethod
+    def enabled():
+        return (current_app.config['ARCHIVE_AFTER_DAYS'] > 0
+                and SqliteProfile.is_file_database(current_app.config['SQLALCHEMY_DATABASE_URI']))
+
+    @staticmethod
+    def path(archive):
+        """Pfad der Archivdatei eines Monats (archive = "YYYY_MM")"""
+        return os.path.join(current_app.config['ARCHIVE_DIR'], f'wipes_{archive}.db')
+
+    @staticmethod
+    def _engine(archive):
+        """Engine einer Archivdatei, beim ersten Zugriff angelegt bzw. auf das aktuelle Schema gebracht"""
+        path = WipeArchive.path(archive)
+        with WipeArchive._lock:
+            engine = WipeArchive._engines.get(path)
+            if engine is None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                engine = create_engine(
+                    f"sqlite:///{path.replace(os.sep, '/')}",
+                    connect_args={'timeout': current_app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}
+                )
+                with engine.begin() as connection:
+                    for table in WipeArchive.TABLES:
+                        table.create(connection, checkfirst=True)
+                    upgrade_tables(connection, WipeArchive.TABLES)
+                WipeArchive._engines[path] = engine
+        return engine
+
+    @staticmethod
+    def archives(conditions=()):
+        """Monate (archive-Schlüssel) mit archivierten Wipes, optional nur mit passenden Katalogeinträgen"""
+        query = db.session.query(ArchivedWipe.archive).filter(*conditions).distinct().order_by(ArchivedWipe.archive)
+        return [row.archive for row in query]
+
+    @staticmethod
+    def connect(archive):
+        """Verbindung zu einer Archivdatei, z.B. für gestreamte Abfragen (Aufrufer schließt sie)"""
+        return WipeArchive._engine(archive).connect()
+
+    @staticmethod
+    def sessions(ids):
+        """
+        Liefert (Session, IDs) je Archivdatei für die archivierten unter den Wipe-IDs
+        Die Session wird nach dem Weiterschalten geschlossen, geladene Felder bleiben nutzbar
+        """
+        by_archive = {}
+        for wipe_id, archive in db.session.query(ArchivedWipe.id, ArchivedWipe.archive).filter(ArchivedWipe.id.in_(ids)):
+            by_archive.setdefault(archive, []).append(wipe_id)
+
+        for archive, archive_ids in by_archive.items():
+            if not os.path.exists(WipeArchive.path(archive)):
+                print(f"Archivdatei fehlt: {WipeArchive.path(archive)}")
+                continue
+            with Session(WipeArchive._engine(archive)) as session:
+                yield session, archive_ids
+
+    @staticmethod
+    def run(older_than_days=None, now=None):
+        """
+        Verschiebt abgeschlossene Wipes älter als older_than_days (Standard: ARCHIVE_AFTER_DAYS) ins Archiv
+        Der Aufrufer darf keine offene Schreib-Transaktion halten, der Schreib-Pool hat nur eine Verbindung.
+        Returns: Anzahl archivierter Wipes
+        """
+        days = current_app.config['ARCHIVE_AFTER_DAYS'] if older_than_days is None else older_than_days
+        if days <= 0 or not SqliteProfile.is_file_database(current_app.config['SQLALCHEMY_DATABASE_URI']):
+            return 0
+
+        # Die höchste ID bleibt immer aktiv, SQLite würde sie sonst erneut vergeben
+        max_id = db.session.query(func.max(WipeLog.id)).scalar()
+        if max_id is None:
+            return 0
+
+        cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+        candidates = (select(WipeLog.id, func.strftime('%Y_%m', WipeLog.start_time))
+                      .where(WipeLog.status.in_(WipeArchive.STATUSES),
+                             WipeLog.start_time < cutoff,
+                             WipeLog.id < max_id)
+                      .order_by(WipeLog.id)
+                      .limit(current_app.config['ARCHIVE_BATCH_SIZE']))
+
+        archived = 0
+        last_id = 0
+        while True:
+            rows = db.session.execute(candidates.where(WipeLog.id > last_id)).all()
+            # Lese-Transaktion beenden, bevor die Schreibverbindung belegt wird
+            db.session.commit()
+            if not rows:
+                break
+
+            by_archive = {}
+            for wipe_id, archive in rows:
+                by_archive.setdefault(archive, []).append(wipe_id)
+            for archive, ids in by_archive.items():
+                WipeArchive._move(archive, ids)
+
+            last_id = rows[-1][0]
+            archived += len(rows)
+
+        if archived:
+            # Rohdaten der verschobenen Snapshots (liegen jetzt in der Archivdatei)
+            SmartStore.prune_blobs()
+            db.session.commit()
+        return archived
+
+    @staticmethod
+    def _move(archive, ids):
+        """
+        Kopiert die Wipes in die Archivdatei und entfernt sie danach aus der aktiven Datenbank
+
+        Zwei Transaktionen: Im WAL-Modus sind Transaktionen über angehängte Datenbanken
+        nicht gemeinsam atomar. Bricht der Vorgang dazwischen ab, liegt der Wipe
+        doppelt vor (die aktive Kopie hat Vorrang) und wird beim nächsten Lauf ersetzt.
+        """
+        WipeArchive._engine(archive)
+
+        columns = ', '.join(column.name for column in WipeLog.__table__.columns)
+        catalog_columns = ', '.join(column.name for column in ArchivedWipe.__table__.columns if column.name != 'archive')
+        attribute_columns = ', '.join(column.name for column in SmartAttribute.__table__.columns)
+        blob_columns = ', '.join(column.name for column in SmartRawBlob.__table__.columns if column.name != 'id')
+        snapshot_columns = [column.name for column in SmartSnapshot.__table__.columns if column.name != 'raw_blob_id']
+        placeholders = ', '.join('?' for _ in ids)
+        snapshot_ids = f'SELECT id FROM main.smart_snapshots WHERE wipe_log_id IN ({placeholders})'
+
+        connection = db.engine.raw_connection()
+        try:
+            sqlite = connection.driver_connection
+            sqlite.execute(f'ATTACH DATABASE ? AS {WipeArchive.ALIAS}', (WipeArchive.path(archive),))
+            try:
+                sqlite.execute('BEGIN IMMEDIATE')
+                sqlite.execute(f'INSERT OR REPLACE INTO {WipeArchive.ALIAS}.wipe_logs ({columns}) '
+                               f'SELECT {columns} FROM main.wipe_logs WHERE id IN ({placeholders})', ids)
+                # Snapshots eines abgebrochenen früheren Laufs ersetzen
+                sqlite.execute(f'DELETE FROM {WipeArchive.ALIAS}.smart_attributes WHERE snapshot_id IN ('
+                               f'SELECT id FROM {WipeArchive.ALIAS}.smart_snapshots WHERE wipe_log_id IN ({placeholders}))', ids)
+                sqlite.execute(f'DELETE FROM {WipeArchive.ALIAS}.smart_snapshots WHERE wipe_log_id IN ({placeholders})', ids)
+                # Blobs bekommen in der Archivdatei eigene IDs (dort per SHA-256 dedupliziert), die Snapshots
+                # verweisen über den Hash auf sie
+                sqlite.execute(f'INSERT OR IGNORE INTO {WipeArchive.ALIAS}.smart_raw_blobs ({blob_columns}) '
+                               f'SELECT {blob_columns} FROM main.smart_raw_blobs WHERE id IN ('
+                               f'SELECT raw_blob_id FROM main.smart_snapshots WHERE wipe_log_id IN ({placeholders}))', ids)
+                sqlite.execute(f'INSERT INTO {WipeArchive.ALIAS}.smart_snapshots ({", ".join(snapshot_columns)}, raw_blob_id) '
+                               f'SELECT {", ".join("s." + name for name in snapshot_columns)}, archived_blob.id '
+                               f'FROM main.smart_snapshots s '
+                               f'LEFT JOIN main.smart_raw_blobs blob ON blob.id = s.raw_blob_id '
+                               f'LEFT JOIN {WipeArchive.ALIAS}.smart_raw_blobs archived_blob ON archived_blob.sha256 = blob.sha256 '
+                               f'WHERE s.wipe_log_id IN ({placeholders})', ids)
+                sqlite.execute(f'INSERT INTO {WipeArchive.ALIAS}.smart_attributes ({attribute_columns}) '
+                               f'SELECT {attribute_columns} FROM main.smart_attributes '
+                               f'WHERE snapshot_id IN ({snapshot_ids})', ids)
+                sqlite.execute('COMMIT')
+
+                sqlite.execute('BEGIN IMMEDIATE')
+                sqlite.execute(f'INSERT OR REPLACE INTO main.archived_wipes (archive, {catalog_columns}) '
+                               f'SELECT ?, {catalog_columns} FROM main.wipe_logs WHERE id IN ({placeholders})',
+                               [archive] + ids)
+                sqlite.execute(f'DELETE FROM main.smart_attributes WHERE snapshot_id IN ({snapshot_ids})', ids)
+                sqlite.execute(f'DELETE FROM main.smart_snapshots WHERE wipe_log_id IN ({placeholders})', ids)
+                # Der Löschtrigger entfernt die Einträge auch aus dem Suchindex
+                sqlite.execute(f'DELETE FROM main.wipe_logs WHERE id IN ({placeholders})', ids)
+                sqlite.execute('COMMIT')
+            except Exception:
+                if sqlite.in_transaction:
+                    sqlite.execute('ROLLBACK')
+                raise
+            finally:
+                sqlite.execute(f'DETACH DATABASE {WipeArchive.ALIAS}')
+        finally:
+            connection.close()
+
+    @staticmethod
+    def backfill_catalog(batch_size=500):
+        """
+        Übernimmt den Fehlertext fehlgeschlagener Wipes, die vor Einführung der Katalogspalte
+        archiviert wurden, aus den Archivdateien in den Katalog (Suchindex per Trigger)
+        Returns: Anzahl ergänzter Katalogeinträge
+        """
+        updated = 0
+        last_id = 0
+        while True:
+            ids = [row.id for row in db.session.query(ArchivedWipe.id)
+                   .filter(ArchivedWipe.status == 'failed', ArchivedWipe.error_message.is_(None), ArchivedWipe.id > last_id)
+                   .order_by(ArchivedWipe.id)
+                   .limit(batch_size)]
+            if not ids:
+                return updated
+
+            messages = []
+            for session, archive_ids in WipeArchive.sessions(ids):
+                messages += session.execute(
+                    select(WipeLog.id, WipeLog.error_message)
+                    .where(WipeLog.id.in_(archive_ids), WipeLog.error_message.isnot(None))
+                ).all()
+            if messages:
+                db.session.execute(update(ArchivedWipe), [{'id': wipe_id, 'error_message': message}
+                                                          for wipe_id, message in messages])
+            db.session.commit()
+            updated += len(messages)
+            last_id = ids[-1]
+
+    @staticmethod
+    def maybe_run(app, interval=timedelta(days=1)):
+        """Führt run() höchstens einmal pro Intervall aus"""
+        with WipeArchive._run_lock:
+            now = datetime.utcnow()
+            if WipeArchive._last_run and now - WipeArchive._last_run < interval:
+                return 0
+            WipeArchive._last_run = now
+
+        try:
+            return WipeArchive.run(now=now)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Fehler beim Archivieren der Wipe-Vorgänge: {e}")
+            return 0
+
+    @staticmethod
+    def get(wipe_id, fields=None):
+        """WipeLog aus der aktiven Datenbank oder dem Archiv (None wenn unbekannt)"""
+        options = WipeLog.load_options(fields or WipeLog.DETAIL_FIELDS)
+        wipe = WipeLog.query.options(*options).filter_by(id=wipe_id).first()
+        if wipe is not None:
+            return wipe
+        archived = WipeArchive.load([wipe_id], fields)
+        return archived[0] if archived else None
+
+    @staticmethod
+    def load(ids, fields=None):
+        """Lädt archivierte WipeLogs aus ihren Monatsdateien, Reihenfolge wie ids"""
+        options = WipeLog.load_options(fields or WipeLog.DETAIL_FIELDS)
+        records = {}
+        for session, archive_ids in WipeArchive.sessions(ids):
+            for wipe in session.scalars(select(WipeLog).options(*options).where(WipeLog.id.in_(archive_ids))):
+                wipe.archived = True
+                records[wipe.id] = wipe
+
+        return [records[wipe_id] for wipe_id in ids if wipe_id in records]
+
+    @staticmethod
+    def search(query, limit=50, fields=None):
+        """Sucht archivierte Wipes über den Katalog (Seriennummer, Modell, Device Path, Fehlertext), wie die aktive Datenbank"""
+        return WipeArchive.load(SearchIndex.search_ids(ArchivedWipe, query, limit), fields)
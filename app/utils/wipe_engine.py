@@ -9,6 +9,14 @@ from app import db
 from app.models import WipeLog
 from app.utils.disk_manager import DiskManager
 from app.utils.smart_reader import SmartReader
+from app.utils.smart_cache import SmartCache
+from app.utils.tool_registry import ToolRegistry
+from app.utils.smart_store import SmartStore
+from app.utils.event_bus import EventBus
+from app.utils.wipe_stats import WipeStats
+from app.utils.report_cache import ReportCache
+from app.utils.smart_diff import SmartDiff
+from app.utils.audit_ledger import AuditLedger
 
 
 class WipeEngine:
@@ -86,7 +94,13 @@ class WipeEngine:
             )
             
             db.session.add(wipe_log)
+            db.session.flush()
+            
+            # Jüngste SMART-Auslesung als Zustand vor dem Wipe festhalten
+            SmartStore.copy_latest(disk_id, wipe_log.id, phase='before')
+            WipeStats.refresh([disk_id])
             db.session.commit()
+            WipeEngine._publish_change(wipe_log.id, 'in_progress')
             
             # App-Context für Thread speichern
             app = current_app._get_current_object()
@@ -124,6 +138,9 @@ class WipeEngine:
                 if not is_safe:
                     raise Exception(f"SICHERHEITSPRÜFUNG FEHLGESCHLAGEN: {message}")
                 
+                # Ab hier ändert sich der Zustand der Disk, gespeicherte SMART-Daten verwerfen
+                SmartCache.invalidate(device_path, wipe_log.serial_number)
+                
                 # Update Status
                 WipeEngine.active_wipes[device_path] = {
                     'status': 'running',
@@ -151,9 +168,12 @@ class WipeEngine:
                 
                 # Lese SMART-Daten nach dem Wipe aus
                 try:
-                    smart_data_after = SmartReader.get_smart_data(device_path)
+                    SmartCache.invalidate(device_path, wipe_log.serial_number)
+                    smart_data_after = SmartCache.get_smart_data(device_path, wipe_log.serial_number,
+                                                                 timeout=app.config['SMART_TIMEOUT'], force=True)
                     if smart_data_after and 'error' not in smart_data_after:
-                        wipe_log.smart_data_after = json.dumps(smart_data_after)
+                        wipe_log.smart_data_after = SmartStore.to_json(smart_data_after)
+                        SmartStore.save(wipe_log.disk, smart_data_after, phase='after', wipe_log_id=wipe_log.id)
                 except Exception as e:
                     # Fehler beim Lesen der SMART-Daten ignorieren (nicht kritisch)
                     print(f"Warnung: SMART-Daten nach Wipe konnten nicht gelesen werden: {e}")
@@ -163,15 +183,42 @@ class WipeEngine:
                 wipe_log.duration_seconds = int(duration)
                 wipe_log.progress_percent = 100.0
                 wipe_log.verified = True
+                # Änderungen der SMART-Werte einmalig festhalten (Reports und Listen lesen nur das Ergebnis)
+                SmartDiff.apply(wipe_log)
+                WipeStats.refresh([wipe_log.disk_id])
                 
                 db.session.commit()
+                WipeEngine._publish_change(wipe_log_id, 'completed')
+                
+                # Zusammenfassung ins Audit-Ledger, fehlende Einträge holt der Backfill beim nächsten Start nach
+                try:
+                    AuditLedger.append(wipe_log)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Fehler beim Eintrag ins Audit-Ledger: {e}")
+                
+                # Zertifikat gleich erstellen, der erste Download kommt dann aus dem Cache
+                ReportCache.prerender(wipe_log)
                 
             except Exception as e:
-                # Fehler aufgetreten
+                # Fehler aufgetreten, die Session kann nach einem DB-Fehler unbrauchbar sein
+                db.session.rollback()
+                wipe_log = db.session.get(WipeLog, wipe_log_id)
                 wipe_log.status = 'failed'
                 wipe_log.error_message = str(e)
                 wipe_log.end_time = datetime.utcnow()
                 db.session.commit()
+                WipeEngine._publish_change(wipe_log_id, 'failed')
+                
+                # SMART-Diff und Statistik nachziehen, Fehler hier dürfen den Status nicht mehr verhindern
+                try:
+                    SmartDiff.apply(wipe_log)
+                    WipeStats.refresh([wipe_log.disk_id])
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Fehler beim Aktualisieren der Wipe-Statistik: {e}")
             
             finally:
                 # Cleanup
@@ -586,12 +633,7 @@ class WipeEngine:
             db.session.commit()
             
             # Führe nvme format aus
-            result = subprocess.run(
-                ['nvme', 'format', device_path, '-s', '1'],
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 Minuten Timeout
-            )
+            result = ToolRegistry.run('nvme', ['format', device_path, '-s', '1'], timeout=300)  # 5 Minuten Timeout
             
             wipe_log.progress_percent = 90.0
             db.session.commit()
@@ -624,12 +666,7 @@ class WipeEngine:
             if os.name != 'nt':
                 try:
                     # blkdiscard löscht alle Daten per TRIM
-                    result = subprocess.run(
-                        ['blkdiscard', device_path],
-                        capture_output=True,
-                        text=True,
-                        timeout=60
-                    )
+                    result = ToolRegistry.run('blkdiscard', [device_path], timeout=300)  # 5 Minuten Timeout
                     
                     wipe_log.progress_percent = 70.0
                     db.session.commit()
@@ -640,12 +677,13 @@ class WipeEngine:
                         return
                 except FileNotFoundError:
                     print("blkdiscard nicht gefunden")
-                except subprocess.TimeoutExpired:
-                    print("blkdiscard Timeout")
             
             # Fallback: Nur Anfang und Ende überschreiben
             WipeEngine._fast_clear_fallback(wipe_log_id, device_path)
             
+        except subprocess.TimeoutExpired:
+            # Abgebrochenes TRIM darf nicht als erfolgreicher Wipe (nur Ränder überschrieben) enden
+            raise Exception("blkdiscard Timeout - der Vorgang dauerte zu lange")
         except Exception as e:
             # Bei Fehler Fallback verwenden
             print(f"SSD Fast Clear Fehler: {e}, verwende Fallback")
@@ -722,6 +760,11 @@ class WipeEngine:
         except Exception as e:
             raise Exception(f"Fehler beim Überschreiben: {str(e)}")
 
+    @staticmethod
+    def _publish_change(wipe_log_id, status):
+        """Meldet Statuswechsel an die Wipe-Historie (Server-Sent-Events)"""
+        EventBus.publish('wipe-changed', json.dumps({'id': wipe_log_id, 'status': status}))
+
     @staticmethod
     def get_wipe_status(wipe_log_id):
         """Gibt den Status eines Wipe-Vorgangs zurück"""
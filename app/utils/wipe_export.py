@@ -0,0 +1,98 @@
+import csv
+import heapq
+import io
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models import ArchivedWipe, WipeLog
+from app.utils.wipe_archive import WipeArchive
+from app.utils.wipe_query import WipeQuery
+
+
+class WipeExport:
+    """
+    Gestreamter Export der Wipe-Vorgänge als NDJSON oder CSV
+
+    Gelesen werden nur die angeforderten Spalten (keine ORM-Objekte) in Batches
+    über einen serverseitigen Cursor (yield_per), ausgegeben wird blockweise.
+    Archivierte Wipes kommen aus den Monatsdateien dazu, die nach ID sortierten
+    Quellen werden per heapq.merge zusammengeführt. Der Speicherbedarf hängt so
+    nur von BATCH_SIZE ab, nicht von der Anzahl der Datensätze. Für inkrementelle
+    Abrufe die zuletzt erhaltene ID als since_id übergeben.
+    """
+
+    BATCH_SIZE = 1000
+    FORMATS = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+
+    @staticmethod
+    def rows(fields, filters=None, since_id=None, include_archived=True):
+        """Generator: ein dict pro Wipe (nur fields), aufsteigend nach ID"""
+        filters = filters or {}
+        columns = ['id'] + [field for field in fields if field not in ('id', 'archived')]
+        statement = (select(*(getattr(WipeLog, column) for column in columns))
+                     .where(*WipeQuery.conditions(WipeLog, **filters))
+                     .order_by(WipeLog.id))
+        if since_id:
+            statement = statement.where(WipeLog.id > since_id)
+
+        sources = [WipeExport._hot_rows(statement)]
+        if include_archived:
+            # Nur Monatsdateien öffnen, deren Katalogeinträge zu den Filtern passen
+            catalog = WipeQuery.conditions(ArchivedWipe, **filters)
+            if since_id:
+                catalog.append(ArchivedWipe.id > since_id)
+            sources += [WipeExport._archive_rows(archive, statement) for archive in WipeArchive.archives(catalog)]
+
+        last_id = None
+        for archived, row in heapq.merge(*sources, key=lambda item: item[1].id):
+            if row.id == last_id:
+                # Nach abgebrochener Archivierung in beiden Datenbanken, die aktive Kopie kommt zuerst
+                continue
+            last_id = row.id
+
+            record = {}
+            for field in fields:
+                value = archived if field == 'archived' else getattr(row, field)
+                record[field] = value.isoformat() if isinstance(value, datetime) else value
+            yield record
+
+    @staticmethod
+    def _hot_rows(statement):
+        for row in db.session.execute(statement.execution_options(yield_per=WipeExport.BATCH_SIZE)):
+            yield False, row
+
+    @staticmethod
+    def _archive_rows(archive, statement):
+        with WipeArchive.connect(archive) as connection:
+            for row in connection.execution_options(yield_per=WipeExport.BATCH_SIZE).execute(statement):
+                yield True, row
+
+    @staticmethod
+    def stream(export_format, fields, **kwargs):
+        """Generator für die Response: Textblöcke mit bis zu BATCH_SIZE Datensätzen (Parameter wie rows)"""
+        buffer = io.StringIO()
+        writer = None
+        if export_format == 'csv':
+            writer = csv.DictWriter(buffer, fieldnames=fields)
+            writer.writeheader()
+
+        count = 0
+        for record in WipeExport.rows(fields, **kwargs):
+            if writer:
+                writer.writerow(record)
+            else:
+                buffer.write(current_app.json.dumps(record))
+                buffer.write('\n')
+
+            count += 1
+            if count % WipeExport.BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
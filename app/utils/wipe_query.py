@@ -0,0 +1,93 @@
+import base64
+from datetime import datetime, timedelta
+from sqlalchemy import tuple_
+from app.models import WipeLog
+from app.utils.smart_diff import SmartDiff
+
+
+class WipeQuery:
+    """
+    Gefilterte Wipe-Historie mit Keyset-Pagination auf (start_time, id)
+
+    Statt OFFSET wird ab dem letzten Eintrag der vorherigen Seite weitergelesen,
+    jede Seite kostet dadurch unabhängig von der Größe der Historie nur einen
+    Indexbereich (siehe Indizes in WipeLog).
+    """
+
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 500
+    STATUSES = ('pending', 'in_progress', 'completed', 'failed')
+
+    @staticmethod
+    def parse_filters(args):
+        """
+        Liest die Filter aus Request-Parametern: status, method, from, to (YYYY-MM-DD, inklusive),
+        smart_severity (Mindest-Schweregrad der SMART-Änderungen während des Wipes)
+        Wirft ValueError bei ungültigen Werten
+        """
+        status = args.get('status') or None
+        if status and status not in WipeQuery.STATUSES:
+            raise ValueError(f"Ungültiger Status: {status}")
+
+        date_from = args.get('from') or None
+        date_to = args.get('to') or None
+        smart_severity = args.get('smart_severity') or None
+        if smart_severity:
+            SmartDiff.at_least(smart_severity)
+        return {
+            'status': status,
+            'method': args.get('method') or None,
+            'date_from': datetime.strptime(date_from, '%Y-%m-%d') if date_from else None,
+            'date_to': datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1) if date_to else None,
+            'smart_severity': smart_severity,
+        }
+
+    @staticmethod
+    def filtered(status=None, method=None, date_from=None, date_to=None, smart_severity=None):
+        """WipeLog-Query mit den angegebenen Filtern (date_to exklusiv)"""
+        return WipeLog.query.filter(*WipeQuery.conditions(WipeLog, status, method, date_from, date_to, smart_severity))
+
+    @staticmethod
+    def conditions(model, status=None, method=None, date_from=None, date_to=None, smart_severity=None):
+        """Filterbedingungen für WipeLog oder ein Modell mit denselben Spalten (z.B. ArchivedWipe)"""
+        conditions = []
+        if status:
+            conditions.append(model.status == status)
+        if method:
+            conditions.append(model.wipe_method == method)
+        if date_from:
+            conditions.append(model.start_time >= date_from)
+        if date_to:
+            conditions.append(model.start_time < date_to)
+        if smart_severity:
+            conditions.append(model.smart_diff_severity.in_(SmartDiff.at_least(smart_severity)))
+        return conditions
+
+    @staticmethod
+    def page(query, cursor=None, limit=PAGE_SIZE):
+        """
+        Liefert eine Seite (neueste zuerst) und den Cursor der nächsten Seite (None am Ende)
+        Wirft ValueError bei einem ungültigen Cursor
+        """
+        if cursor:
+            start_time, wipe_id = WipeQuery.decode_cursor(cursor)
+            query = query.filter(tuple_(WipeLog.start_time, WipeLog.id) < tuple_(start_time, wipe_id))
+
+        rows = query.order_by(WipeLog.start_time.desc(), WipeLog.id.desc()).limit(limit + 1).all()
+        if len(rows) <= limit:
+            return rows, None
+        return rows[:limit], WipeQuery.encode_cursor(rows[limit - 1])
+
+    @staticmethod
+    def encode_cursor(wipe_log):
+        value = f'{wipe_log.start_time.isoformat()}|{wipe_log.id}'
+        return base64.urlsafe_b64encode(value.encode('ascii')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+            start_time, wipe_id = value.split('|')
+            return datetime.fromisoformat(start_time), int(wipe_id)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"Ungültiger Cursor: {cursor}") from e
@@ -0,0 +1,167 @@
+from sqlalchemy import case, event, func, union_all
+from app import db
+from app.database import SqliteProfile
+from app.models import ArchivedWipe, Disk, DiskWipeStats, WipeLog
+
+
+class WipeStats:
+    """
+    Pflegt die Wipe-Kennzahlen pro Disk (disk_wipe_stats)
+
+    Die Werte werden mit einer gruppierten Abfrage über wipe_logs berechnet,
+    beim Start und Ende eines Wipes nur für die betroffene Disk. Als letzter
+    Wipe gilt der mit der höchsten ID. Archivierte Wipes zählen über ihren
+    Katalogeintrag (archived_wipes) mit.
+    """
+
+    # Erwartete SQL-Statements pro Request (ohne BEGIN), unabhängig von der Anzahl der Disks
+    EXPECTED_QUERIES = {
+        '/api/disks': 1,
+        '/api/disks/list': 1,
+        '/api/disks/<id>': 1,
+        '/api/search': 6,
+        '/api/search (HTMX)': 6,
+    }
+
+    @staticmethod
+    def _all_wipes(disk_ids=None):
+        """Aktive und archivierte Wipes als gemeinsame Unterabfrage"""
+        selects = []
+        for model in (WipeLog, ArchivedWipe):
+            statement = db.select(model.id, model.disk_id, model.status, model.size_bytes)
+            if disk_ids is not None:
+                statement = statement.where(model.disk_id.in_(disk_ids))
+            selects.append(statement)
+        return union_all(*selects).subquery()
+
+    @staticmethod
+    def _aggregate(disk_ids=None):
+        """Eine Abfrage: {disk_id: (anzahl, letzte_id, letzter_status, letzter_start, bytes)}"""
+        wipes = WipeStats._all_wipes(disk_ids)
+        aggregate = (db.session.query(
+            wipes.c.disk_id.label('disk_id'),
+            func.count(wipes.c.id).label('wipe_count'),
+            func.max(wipes.c.id).label('last_wipe_id'),
+            func.coalesce(func.sum(case((wipes.c.status == 'completed', wipes.c.size_bytes), else_=0)), 0).label('bytes_wiped')
+        ).group_by(wipes.c.disk_id)).subquery()
+
+        # Letzten Wipe per Primärschlüssel nachschlagen, aktiv oder archiviert
+        rows = (db.session.query(
+            aggregate,
+            func.coalesce(WipeLog.status, ArchivedWipe.status).label('status'),
+            func.coalesce(WipeLog.start_time, ArchivedWipe.start_time).label('start_time'))
+            .outerjoin(WipeLog, WipeLog.id == aggregate.c.last_wipe_id)
+            .outerjoin(ArchivedWipe, ArchivedWipe.id == aggregate.c.last_wipe_id))
+        return {
+            row.disk_id: (row.wipe_count, row.last_wipe_id, row.status, row.start_time, row.bytes_wiped)
+            for row in rows
+        }
+
+    @staticmethod
+    def refresh(disk_ids=None):
+        """
+        Berechnet die Kennzahlen der angegebenen Disks neu (None = alle)
+        Commit erfolgt durch den Aufrufer. Returns: Anzahl aktualisierter Einträge
+        """
+        values = WipeStats._aggregate(disk_ids)
+
+        existing = DiskWipeStats.query
+        if disk_ids is not None:
+            existing = existing.filter(DiskWipeStats.disk_id.in_(disk_ids))
+        existing = {stats.disk_id: stats for stats in existing}
+
+        for disk_id, stats in existing.items():
+            if disk_id not in values:
+                # Keine Wipes (mehr) vorhanden
+                db.session.delete(stats)
+
+        for disk_id, (wipe_count, last_wipe_id, last_wipe_status, last_wipe_at, bytes_wiped) in values.items():
+            stats = existing.get(disk_id)
+            if stats is None:
+                stats = DiskWipeStats(disk_id=disk_id)
+                db.session.add(stats)
+            stats.wipe_count = wipe_count
+            stats.last_wipe_id = last_wipe_id
+            stats.last_wipe_status = last_wipe_status
+            stats.last_wipe_at = last_wipe_at
+            stats.bytes_wiped = bytes_wiped or 0
+
+        return len(values)
+
+    @staticmethod
+    def query_check(app, small=1, large=50, wipes_per_disk=3):
+        """
+        Zählt die SQL-Statements der Disk-Liste und Suche bei small und bei large Disks
+        (je wipes_per_disk Wipes) und vergleicht sie mit EXPECTED_QUERIES.
+        Läuft gegen die Datenbank der übergebenen App (eigene Test-Datenbank verwenden!)
+        Returns: (Liste der Abweichungen, Anzahl Statements je Request und Disk-Anzahl)
+        """
+        from app.utils.disk_inventory import DiskInventory
+        from app.utils.search_index import SearchIndex
+
+        with app.app_context():
+            db.create_all()
+            SearchIndex.install()
+            engines = [db.engine] + [engine for engine in [SqliteProfile.reader_engine()] if engine is not None]
+
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if not statement.lstrip().upper().startswith('BEGIN'):
+                statements.append(statement)
+
+        def seed(total):
+            with app.app_context():
+                existing = Disk.query.filter(Disk.serial_number.like('QCHECK-%')).count()
+                disk_ids = []
+                for index in range(existing, total):
+                    disk = Disk(device_path=f'/dev/qcheck{index}', serial_number=f'QCHECK-{index:04d}',
+                                model='QueryCheck', size_bytes=10 ** 9)
+                    db.session.add(disk)
+                    db.session.flush()
+                    disk_ids.append(disk.id)
+                    # Im Inventar wie nach einem Scan, sonst lädt /api/disks/list nichts
+                    DiskInventory.put({'device_path': disk.device_path, 'serial_number': disk.serial_number})
+                    for number in range(wipes_per_disk):
+                        db.session.add(WipeLog(disk_id=disk.id, device_path=disk.device_path,
+                                               serial_number=disk.serial_number, model=disk.model,
+                                               size_bytes=disk.size_bytes, wipe_method='zeros',
+                                               status='completed' if number else 'failed',
+                                               error_message=None if number else 'QCHECK Schreibfehler'))
+                WipeStats.refresh(disk_ids)
+                db.session.commit()
+                return Disk.query.filter(Disk.serial_number.like('QCHECK-%')).order_by(Disk.id).first().id
+
+        def measure(disk_id):
+            requests = {
+                '/api/disks': ('/api/disks', {}),
+                '/api/disks/list': ('/api/disks/list', {}),
+                '/api/disks/<id>': (f'/api/disks/{disk_id}', {}),
+                # limit über allen Treffern, damit auch der Archiv-Katalog immer abgefragt wird
+                '/api/search': ('/api/search?q=QCHECK&limit=500', {}),
+                '/api/search (HTMX)': ('/api/search?q=QCHECK&limit=500', {'HX-Request': 'true'}),
+            }
+            client = app.test_client()
+            counts = {}
+            for name, (url, headers) in requests.items():
+                del statements[:]
+                response = client.get(url, headers=headers)
+                counts[name] = len(statements) if response.status_code == 200 else f'HTTP {response.status_code}'
+            return counts
+
+        inventory = DiskInventory.get_all()
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', count)
+        try:
+            results = {small: measure(seed(small)), large: measure(seed(large))}
+        finally:
+            for engine in engines:
+                event.remove(engine, 'before_cursor_execute', count)
+            DiskInventory.replace(inventory)
+
+        errors = []
+        for name, expected in WipeStats.EXPECTED_QUERIES.items():
+            for disks, counts in results.items():
+                if counts[name] != expected:
+                    errors.append(f"{name} bei {disks} Disks: {counts[name]} Statements, erwartet {expected}")
+        return errors, results
@@ -15,6 +15,62 @@ class Config:
     db_path = os.path.join(db_dir, 'disk_wiper.db').replace('\\', '/')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'sqlite:///{db_path}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # SQLite-Profil (WAL, getrennte Lese-/Schreib-Pools, siehe app/database.py)
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000))
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # Bytes
+    SQLITE_CACHE_SIZE_KB = 32 * 1024
+    SQLITE_READ_POOL_SIZE = 8  # entspricht den Waitress-Threads
+    SQLITE_WRITE_POOL_SIZE = 1  # SQLite kennt nur einen Schreiber, Wartende reihen sich im Pool ein
+    
+    # Komprimierung gespeicherter SMART-/Verifikationsdaten: 'zlib' oder 'zstd' (benötigt das Paket zstandard)
+    PAYLOAD_COMPRESSION = os.environ.get('PAYLOAD_COMPRESSION', 'zlib')
     WTF_CSRF_ENABLED = True
     MAX_WIPE_THREADS = 4  # Mehrere Disks gleichzeitig löschen
+    
+    # SMART-Auslesen: Timeout pro Gerät und parallele Worker beim Scan
+    SMART_TIMEOUT = 20  # Sekunden
+    SMART_MAX_WORKERS = 8
+    SMART_CACHE_TTL = int(os.environ.get('SMART_CACHE_TTL', 300))  # Sekunden, 0 = Cache deaktiviert
+    SMART_CACHE_MAX_ENTRIES = 256
+    
+    # SMART-Verlauf: volle Auflösung für N Tage, danach ein Eintrag pro Tag, Löschen nach M Tagen
+    SMART_HISTORY_FULL_RESOLUTION_DAYS = 30
+    SMART_HISTORY_RETENTION_DAYS = 365
+    
+    # Externe Tools (smartctl, nvme, ...): zusätzlicher Suchpfad vor PATH, z.B. für Stub-Tools
+    TOOL_SEARCH_PATH = os.environ.get('TOOL_SEARCH_PATH')
+    MAX_TOOL_PROCESSES = 16  # Gleichzeitig laufende externe Prozesse
+    
+    # Wurzelverzeichnisse des sysfs-Scanners (Linux), z.B. für einen nachgebildeten Fixture-Baum
+    SYSFS_ROOT = os.environ.get('SYSFS_ROOT', '/sys')
+    PROCFS_ROOT = os.environ.get('PROCFS_ROOT', '/proc')
+    DEVFS_ROOT = os.environ.get('DEVFS_ROOT', '/dev')
+    UDEV_ROOT = os.environ.get('UDEV_ROOT', '/run/udev')
+    
+    # Archivierung: abgeschlossene Wipe-Vorgänge älter als N Tage wandern in Monatsdateien (0 = deaktiviert)
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 365))
+    ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR') or os.path.join(db_dir, 'archive')
+    ARCHIVE_BATCH_SIZE = 500
+    
+    # Sammel-Export von Reports (ZIP): Worker-Prozesse und max. Wipes pro Export
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+    REPORT_BATCH_MAX_WIPES = 5000
+    
+    # Report-Cache für abgeschlossene Wipes (0 = deaktiviert), Formate, die beim Abschluss vorab erstellt werden
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR') or os.path.join(db_dir, 'report_cache')
+    REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    REPORT_CACHE_PRERENDER = ('pdf',)
+    
+    # Audit-Ledger: Einträge pro Merkle-Checkpoint, ältere offene Einträge werden beim nächsten Scan versiegelt
+    AUDIT_CHECKPOINT_SIZE = int(os.environ.get('AUDIT_CHECKPOINT_SIZE', 256))
+    AUDIT_CHECKPOINT_MAX_AGE_MINUTES = int(os.environ.get('AUDIT_CHECKPOINT_MAX_AGE_MINUTES', 60))
+    
+    # Suche: max. Treffer pro Tabelle (Festplatten, Wipe-Vorgänge)
+    SEARCH_RESULT_LIMIT = 50
+    
+    # Hotplug-Erkennung (Linux: Netlink-Uevents, sonst Polling von /sys/block)
+    HOTPLUG_MONITOR_ENABLED = os.environ.get('HOTPLUG_MONITOR_ENABLED', '1') == '1'
+    HOTPLUG_POLL_INTERVAL = 5  # Sekunden
+    SSE_MAX_DURATION = 300  # Sekunden bis der Browser die Event-Verbindung neu aufbaut
 
@@ -1,6 +1,12 @@
 #!/usr/bin/env python3
+import os
+import tempfile
+import click
 from app import create_app, db
+from app.database import SqliteProfile, upgrade_schema
+from config import Config
 from app.models import Disk, WipeLog
+from app.utils import HotplugMonitor, SysfsScanner, ToolRegistry, SmartStore, SmartHistory, WipeStats, SearchIndex, WipeArchive, PdfReportEngine, SmartDiff, AuditLedger
 from waitress import serve
 
 app = create_app()
@@ -11,16 +17,170 @@ def make_shell_context():
     return {'db': db, 'Disk': Disk, 'WipeLog': WipeLog}
 
 
+@app.cli.command('sqlite-stress')
+@click.option('--writers', default=8, help='Parallele Wipe-Fortschritts-Schreiber')
+@click.option('--readers', default=8, help='Parallele UI-Leser')
+@click.option('--seconds', default=10, help='Laufzeit in Sekunden')
+@click.option('--hold-seconds', default=2.0, help='Dauer, die ein Schreiber seine Transaktion offen hält (0 = aus)')
+def sqlite_stress(writers, readers, seconds, hold_seconds):
+    """Lasttest des SQLite-Profils gegen eine temporäre Datenbank"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stress.db').replace('\\', '/')
+        stress_config = type('StressConfig', (Config,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+        result = SqliteProfile.stress_test(create_app(stress_config), writers, readers, seconds, hold_seconds)
+    
+    for role, stats in result.items():
+        click.echo(f"{role}: {stats}")
+    if any(stats['errors'] for stats in result.values()):
+        raise SystemExit(1)
+
+
+@app.cli.command('query-check')
+@click.option('--disks', default=50, help='Anzahl Disks beim zweiten Durchlauf')
+def query_check(disks):
+    """Zählt die SQL-Statements von Disk-Liste und Suche gegen eine temporäre Datenbank"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'queries.db').replace('\\', '/')
+        check_config = type('QueryCheckConfig', (Config,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+        errors, result = WipeStats.query_check(create_app(check_config), large=disks)
+    
+    for name, counts in result.items():
+        click.echo(f"{name}: {counts}")
+    for error in errors:
+        click.echo(f"FEHLER: {error}")
+    if errors:
+        raise SystemExit(1)
+
+
+@app.cli.command('report-benchmark')
+@click.option('--iterations', default=50, help='Anzahl gerenderter Reports')
+def report_benchmark(iterations):
+    """Misst Renderzeit und Spitzenspeicher der PDF-Reports"""
+    click.echo(PdfReportEngine.benchmark(iterations))
+
+
+@app.cli.command('sysfs-check')
+def sysfs_check():
+    """Prüft den sysfs-Scanner gegen einen nachgebildeten sysfs-Baum"""
+    errors, duration_ms = SysfsScanner.self_test()
+    for error in errors:
+        click.echo(f"FEHLER: {error}")
+    if errors:
+        raise SystemExit(1)
+    click.echo(f"sysfs-Scanner OK ({duration_ms} ms)")
+
+
+@app.cli.command('audit-verify')
+@click.argument('report', type=click.Path(exists=True, dir_okay=False), required=False)
+@click.option('--checkpoint', default=None, help='Veröffentlichter Checkpoint-Hash, dem vertraut wird')
+def audit_verify(report, checkpoint):
+    """
+    Prüft einen Report (PDF/JSON/HTML) offline gegen seinen Audit-Nachweis, ohne REPORT das ganze Ledger
+    Exit-Code 1 bei Fehlern, 2 wenn ein Report ohne --checkpoint nur in sich stimmig ist
+    """
+    if report:
+        with open(report, 'rb') as file:
+            proof, errors = AuditLedger.verify_report(file.read(), checkpoint)
+        if proof:
+            sealed = f"Checkpoint {proof['checkpoint']['checkpoint_hash']}" if proof['checkpoint'] else 'noch nicht versiegelt'
+            click.echo(f"Wipe {proof['wipe_log_id']}, Ledger-Eintrag {proof['entry']}, {sealed}")
+    else:
+        result = AuditLedger.verify_chain()
+        errors = result['errors'] + [f"Wipe {wipe_id}: Datensatz weicht vom Ledger ab" for wipe_id in result['altered']]
+        click.echo(f"Einträge: {result['entries']}, Checkpoints: {result['checkpoints']}")
+    
+    for error in errors:
+        click.echo(f"FEHLER: {error}")
+    if errors:
+        raise SystemExit(1)
+    if report and not checkpoint:
+        # Hashes und Merkle-Pfad stammen aus dem Report selbst und könnten mit ihm neu berechnet worden sein
+        click.echo("Nachweis in sich stimmig, aber NICHT authentifiziert: "
+                   "mit --checkpoint gegen einen extern abgelegten Checkpoint-Hash prüfen")
+        raise SystemExit(2)
+    click.echo("Nachweis gültig")
+
+
+@app.cli.command('archive-wipes')
+@click.option('--days', type=int, default=None, help='Wipes älter als N Tage archivieren (Standard: ARCHIVE_AFTER_DAYS)')
+def archive_wipes(days):
+    """Verschiebt alte, abgeschlossene Wipe-Vorgänge in die Monatsarchive"""
+    archived = WipeArchive.run(older_than_days=days)
+    click.echo(f"Archiviert: {archived} Wipe-Vorgänge")
+    if archived:
+        SqliteProfile.vacuum(db.engine)
+
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        
+        # Neue Spalten/Indizes in bestehenden Tabellen nachziehen
+        for change in upgrade_schema(db):
+            print(f"Datenbank-Schema ergänzt: {change}")
+        
+        # Wipe-Kennzahlen pro Disk abgleichen (z.B. nach Update oder manuellen Änderungen)
+        WipeStats.refresh()
+        db.session.commit()
+        
+        # Volltextindex für die Suche anlegen bzw. prüfen
+        SearchIndex.install()
+        
+        # Fehlertexte älterer archivierter Wipes in den Katalog übernehmen (Suche)
+        WipeArchive.backfill_catalog()
+        
+        # Audit-Ledger gegen UPDATE/DELETE absichern
+        AuditLedger.install()
+        
+        # SMART-Rohdaten aus älteren Datenbanken in die Blob-Tabelle verschieben
+        migrated = SmartStore.migrate_legacy()
+        if migrated:
+            print(f"SMART-Daten migriert: {migrated} Einträge")
+        
+        # Unkomprimierte JSON-Spalten aus älteren Datenbanken komprimieren
+        compressed = SmartStore.migrate_compression()
+        if compressed:
+            print(f"SMART-/Verifikationsdaten komprimiert: {compressed} Werte")
+        
+        # SMART-Vergleich vor/nach für ältere Wipes nachberechnen
+        diffed = SmartDiff.backfill()
+        if diffed:
+            print(f"SMART-Vergleich berechnet: {diffed} Wipe-Vorgänge")
+        
+        # Abgeschlossene Wipes ohne Ledger-Eintrag aufnehmen, alte offene Einträge versiegeln
+        ledgered = AuditLedger.backfill()
+        if ledgered:
+            print(f"Audit-Ledger ergänzt: {ledgered} Wipe-Vorgänge")
+        AuditLedger.maybe_checkpoint(app)
+        
+        # Alte Wipe-Vorgänge in die Monatsarchive verschieben (danach höchstens einmal täglich nach einem Scan),
+        # erst nach Migrationen, SMART-Vergleich und Ledger: Archivdateien werden später nicht mehr umgeschrieben
+        archived = WipeArchive.maybe_run(app)
+        if archived:
+            print(f"Wipe-Vorgänge archiviert: {archived}")
+        if compressed or archived:
+            SqliteProfile.vacuum(db.engine)
+        
+        # SMART-Verlauf verdichten (danach höchstens einmal täglich nach einem Scan)
+        SmartHistory.maybe_compact(app)
+    
+    # Externe Tools einmalig ermitteln
+    ToolRegistry.probe()
+    for name, info in ToolRegistry.status().items():
+        if info['path']:
+            features = f", {', '.join(info['features'])}" if info['features'] else ''
+            print(f"Tool gefunden: {name} {info['version'] or '?'} ({info['path']}{features})")
+    
+    if app.config['HOTPLUG_MONITOR_ENABLED']:
+        HotplugMonitor.start(app, poll_interval=app.config['HOTPLUG_POLL_INTERVAL'])
     
     print("Starte Disk-Wiper mit Waitress WSGI-Server...")
     print("Server läuft auf http://0.0.0.0:5000")
     print("Drücken Sie Ctrl+C zum Beenden")
     
     # Waitress ist ein production-ready WSGI-Server
-    # threads=4: Anzahl der Worker-Threads für gleichzeitige Anfragen
+    # threads=8: Anzahl der Worker-Threads für gleichzeitige Anfragen
+    # (jeder offene Browser-Tab hält eine Event-Verbindung unter /api/events)
     # channel_timeout=300: Timeout für Long-Running-Requests (z.B. Disk-Wipes)
-    serve(app, host='0.0.0.0', port=5000, threads=4, channel_timeout=300)
+    serve(app, host='0.0.0.0', port=5000, threads=8, channel_timeout=300)
 